@@ -0,0 +1,125 @@
+"""일괄 매칭(BatchMatcher)과 템플릿별 cv2.matchTemplate 반복 비교
+
+같은 검색 영역에서 템플릿 N개를 찾을 때, 템플릿마다 matchTemplate을 호출하는
+방식과 프레임을 한 번만 변환하는 일괄 매칭의 틱당 소요 시간을 비교한다.
+두 방식의 최고 위치/점수가 같은지도 함께 확인한다.
+
+    python -m benchmarks.batch_matching --output batch.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from benchmarks.pipeline import load_fixture_templates, make_background, paste, summarize
+from matching import BatchMatcher, TemplateMatcher
+
+DEFAULT_AREAS = ((640, 360), (1280, 720))
+DEFAULT_TEMPLATE_COUNTS = (1, 4, 8, 16, 32, 64)
+
+
+def make_templates(fixtures: List[np.ndarray], count: int, seed: int = 3) -> List[np.ndarray]:
+    """고정 템플릿을 돌려 쓰되, 서로 다른 배열이 되도록 일부를 잘라 N개 생성"""
+    rng = np.random.default_rng(seed)
+    templates = []
+    for index in range(count):
+        source = fixtures[index % len(fixtures)]
+        th, tw = source.shape[:2]
+        dy, dx = rng.integers(0, max(1, th // 4)), rng.integers(0, max(1, tw // 4))
+        templates.append(np.ascontiguousarray(source[dy:, dx:]))
+    return templates
+
+
+def bench_area(fixtures: List[np.ndarray], area: Tuple[int, int], counts: Sequence[int],
+               iterations: int) -> List[dict]:
+    width, height = area
+    templates = make_templates(fixtures, max(counts))
+    screen = make_background((width, height), seed=4)
+    # 일부 템플릿을 화면에 그려 넣어 찾을 대상이 있는 프레임으로 만듦
+    for index, template in enumerate(templates[:4]):
+        x = (index * 160) % max(1, width - template.shape[1])
+        y = (index * 90) % max(1, height - template.shape[0])
+        paste(screen, template, x, y)
+
+    results = []
+    for count in counts:
+        batch = templates[:count]
+        loop_matcher = TemplateMatcher()
+        batch_matcher = BatchMatcher()
+        batch_matcher.match_many(screen, batch)  # 템플릿 스펙트럼 캐시 채우기
+
+        loop_samples, batch_samples = [], []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            expected = [loop_matcher.match_default(screen, template) for template in batch]
+            loop_samples.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            actual = batch_matcher.match_many(screen, batch)
+            batch_samples.append(time.perf_counter() - start)
+
+        agree = sum(a.location == e.location or abs(a.score - e.score) < 1e-3
+                    for a, e in zip(actual, expected))
+        loop_stats, batch_stats = summarize(loop_samples), summarize(batch_samples)
+        results.append({
+            "area": [width, height],
+            "templates": count,
+            "loop": loop_stats,
+            "batch": batch_stats,
+            "speedup": loop_stats["mean_ms"] / batch_stats["mean_ms"] if batch_stats["mean_ms"] else None,
+            "max_score_diff": max(abs(a.score - e.score) for a, e in zip(actual, expected)),
+            "agreement": agree / count,
+        })
+    return results
+
+
+def run_benchmarks(scenarios_dir: str = "scenarios", iterations: int = 10,
+                   areas=DEFAULT_AREAS, counts=DEFAULT_TEMPLATE_COUNTS) -> dict:
+    fixtures = load_fixture_templates(scenarios_dir)
+    if not fixtures:
+        raise RuntimeError(f"벤치마크에 사용할 템플릿이 없습니다: {scenarios_dir}/images")
+    started = time.time()
+    results = []
+    for area in areas:
+        results += bench_area(fixtures, area, counts, iterations)
+    return {
+        "meta": {
+            "timestamp": started,
+            "duration_sec": time.time() - started,
+            "iterations": iterations,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.batch_matching",
+                                     description="일괄 매칭과 matchTemplate 반복 비교")
+    parser.add_argument("--scenarios-dir", default="scenarios")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--template-counts", type=int, nargs="+", default=list(DEFAULT_TEMPLATE_COUNTS))
+    parser.add_argument("--output", help="결과 JSON 파일 경로 (기본: 표준 출력)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scenarios_dir, args.iterations, DEFAULT_AREAS, tuple(args.template_counts))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""캡처 → 매칭 → 클릭 파이프라인 벤치마크
+
+`scenarios/*.json`과 `scenarios/images/*.png`를 고정 입력으로 사용해, 녹화된
+화면(합성 전체 화면)을 실제 `find_target`과 시나리오 실행기에 재생한다.
+가짜 화면 소스와 가짜 입력 장치를 쓰므로 Linux 헤드리스 환경에서도 동작한다.
+
+    python -m benchmarks.pipeline --output bench.json
+
+결과는 릴리스 간 비교를 위한 JSON 문서로 출력된다.
+"""
+
+import argparse
+import dataclasses
+import glob
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from capture import ReplayCaptureSource
+from engine import CancellationToken, ScenarioEngine
+from matching import TemplateMatcher
+from scenario import ScenarioManager
+from template_cache import template_cache
+from watch import area_view, union_area
+
+SCREEN_SIZE = (1920, 1080)
+DEFAULT_AREAS = ((320, 180), (640, 360), (1280, 720), (1920, 1080))
+DEFAULT_TEMPLATE_COUNTS = (1, 4, 8, 16)
+GRAPH_RUN_LIMIT = 10.0  # 그래프 시나리오 1회 실행 제한 (초). 고정 화면에서는 순환 분기가 끝나지 않을 수 있음
+
+
+class FakeInputSink:
+    """클릭을 실제로 보내지 않고 시각과 위치만 기록"""
+
+    def __init__(self):
+        self.clicks: List[Tuple[float, int, int]] = []
+
+    def __call__(self, x: int, y: int):
+        self.clicks.append((time.perf_counter(), x, y))
+
+
+def make_background(size: Tuple[int, int] = SCREEN_SIZE, seed: int = 0) -> np.ndarray:
+    """매번 같은 결과가 나오는 질감 있는 배경 화면"""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (9, 9), 0)
+
+
+def paste(screen: np.ndarray, template: np.ndarray, x: int, y: int):
+    th, tw = template.shape[:2]
+    screen[y:y + th, x:x + tw] = template[:screen.shape[0] - y, :screen.shape[1] - x]
+
+
+def load_fixture_templates(scenarios_dir: str) -> List[np.ndarray]:
+    paths = sorted(glob.glob(os.path.join(scenarios_dir, "images", "*.png")))
+    templates = [template_cache.get(path) for path in paths]
+    return [template for template in templates if template is not None]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """초 단위 측정값을 밀리초 백분위수로 요약"""
+    values = np.asarray(samples, dtype=np.float64) * 1000
+    return {
+        "count": int(values.size),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def peak_memory(run: Callable[[], None], repeat: int = 3) -> int:
+    """`run`을 몇 번 실행하는 동안 새로 할당된 메모리의 최대치 (바이트)"""
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(repeat):
+            run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def bench_search_areas(templates: List[np.ndarray], areas, modes, iterations: int) -> List[dict]:
+    """검색 영역 크기 × 매칭 방식별 캡처/매칭 지연시간"""
+    template = max(templates, key=lambda image: image.size)
+    screen = make_background()
+    paste(screen, template, SCREEN_SIZE[0] - template.shape[1] - 40, SCREEN_SIZE[1] - template.shape[0] - 40)
+    source = ReplayCaptureSource([screen], advance_on_grab=False)
+
+    results = []
+    for width, height in areas:
+        if width < template.shape[1] or height < template.shape[0]:
+            continue
+        # 템플릿이 영역의 오른쪽 아래 모서리에 오도록 영역 배치
+        area = (SCREEN_SIZE[0] - width, SCREEN_SIZE[1] - height, SCREEN_SIZE[0], SCREEN_SIZE[1])
+        for mode in modes:
+            engine = ScenarioEngine(source, TemplateMatcher(), click=FakeInputSink(), verbose=False)
+            engine.matcher.warm(template, mode, source.layout)
+
+            capture_samples, match_samples, found = [], [], 0
+            for _ in range(iterations):
+                start = time.perf_counter()
+                frame = engine.capture_screen(area)
+                captured = time.perf_counter()
+                location = engine.find_target(frame, template, area, mode)
+                match_samples.append(time.perf_counter() - captured)
+                capture_samples.append(captured - start)
+                found += location is not None
+
+            match_stats = summarize(match_samples)
+            results.append({
+                "benchmark": "search_area",
+                "area": [width, height],
+                "mode": mode,
+                "template_shape": list(template.shape),
+                "hit_rate": found / iterations,
+                "stages": {"capture": summarize(capture_samples), "match": match_stats},
+                "matches_per_sec": 1000.0 / match_stats["mean_ms"] if match_stats["mean_ms"] else None,
+                "peak_memory_bytes": peak_memory(
+                    lambda: engine.find_target(engine.capture_screen(area), template, area, mode)),
+            })
+    return results
+
+
+def bench_template_counts(templates: List[np.ndarray], counts, iterations: int) -> List[dict]:
+    """템플릿 수별 한 틱 비용 (공유 캡처 1회 + 템플릿별 매칭)"""
+    screen = make_background(seed=1)
+    placements = []
+    cell_width, cell_height = 400, 150
+    columns = SCREEN_SIZE[0] // cell_width
+    for index in range(max(counts)):
+        template = templates[index % len(templates)]
+        x = (index % columns) * cell_width + 20
+        y = (index // columns) * cell_height + 20
+        paste(screen, template, x, y)
+        placements.append((template, (x - 10, y - 10, x + cell_width - 20, y + cell_height - 20)))
+    source = ReplayCaptureSource([screen], advance_on_grab=False)
+
+    results = []
+    for count in counts:
+        rules = placements[:count]
+        frame_area = union_area([area for _, area in rules])
+        engine = ScenarioEngine(source, TemplateMatcher(), click=FakeInputSink(), verbose=False)
+
+        def tick() -> int:
+            frame = engine.capture_screen(frame_area)
+            return sum(engine.find_target(area_view(frame, frame_area, area), template, area) is not None
+                       for template, area in rules)
+
+        capture_samples, tick_samples, hits = [], [], 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            engine.capture_screen(frame_area)
+            capture_samples.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            hits += tick()
+            tick_samples.append(time.perf_counter() - start)
+
+        tick_stats = summarize(tick_samples)
+        results.append({
+            "benchmark": "template_count",
+            "templates": count,
+            "union_area": list(frame_area),
+            "hit_rate": hits / (iterations * count),
+            "stages": {"capture": summarize(capture_samples), "tick": tick_stats},
+            "matches_per_sec": count * 1000.0 / tick_stats["mean_ms"] if tick_stats["mean_ms"] else None,
+            "peak_memory_bytes": peak_memory(tick),
+        })
+    return results
+
+
+def bench_scenarios(scenarios_dir: str, iterations: int) -> List[dict]:
+    """저장된 시나리오 전체를 실행기로 재생 (대기 시간 0). 그래프 시나리오는 그래프 실행기로 실행"""
+    manager = ScenarioManager(scenarios_dir)
+    results = []
+    for name in sorted(manager.list_scenarios()):
+        actions = manager.load_scenario(name)
+        if not actions:
+            continue
+        graph = manager.load_graph(name)
+        actions = [dataclasses.replace(action, wait_time=0.0)
+                   for action in sorted(actions, key=lambda x: x.order)]
+
+        # 각 액션의 템플릿을 해당 검색 영역에 그려 넣은 화면
+        screen = make_background(seed=2)
+        for action in actions:
+            template = template_cache.get(action.target_image_path)
+            if template is None or action.search_area is None:
+                break
+            paste(screen, template, action.search_area[0], action.search_area[1])
+        else:
+            source = ReplayCaptureSource([screen], advance_on_grab=False)
+            sink = FakeInputSink()
+            engine = ScenarioEngine(source, TemplateMatcher(), click=sink,
+                                    tick_interval=0.0, verbose=False)
+
+            def run_once(engine=engine, actions=actions, graph=graph) -> bool:
+                token = CancellationToken()
+                if graph is None:
+                    return engine.execute_scenario_actions(actions, token)
+                timer = threading.Timer(GRAPH_RUN_LIMIT, token.cancel)
+                timer.start()
+                try:
+                    return engine.execute_graph(actions, graph, token)
+                finally:
+                    timer.cancel()
+
+            run_samples, action_samples, completed = [], [], 0
+            for _ in range(iterations):
+                sink.clicks.clear()
+                start = time.perf_counter()
+                completed += run_once()
+                run_samples.append(time.perf_counter() - start)
+                previous = start
+                for clicked_at, _, _ in sink.clicks:
+                    action_samples.append(clicked_at - previous)
+                    previous = clicked_at
+
+            results.append({
+                "benchmark": "scenario",
+                "scenario": name,
+                "kind": "graph" if graph is not None else "linear",
+                "actions": len(actions),
+                "completion_rate": completed / iterations,
+                "stages": {"scenario": summarize(run_samples),
+                           "time_to_click": summarize(action_samples or [0.0])},
+                "peak_memory_bytes": peak_memory(run_once, repeat=1),
+            })
+    return results
+
+
+def run_benchmarks(scenarios_dir: str = "scenarios", iterations: int = 30,
+                   areas=DEFAULT_AREAS, modes=("default", "pyramid"),
+                   template_counts=DEFAULT_TEMPLATE_COUNTS) -> dict:
+    templates = load_fixture_templates(scenarios_dir)
+    if not templates:
+        raise RuntimeError(f"벤치마크에 사용할 템플릿이 없습니다: {scenarios_dir}/images")
+
+    started = time.time()
+    results = []
+    results += bench_search_areas(templates, areas, modes, iterations)
+    results += bench_template_counts(templates, template_counts, iterations)
+    results += bench_scenarios(scenarios_dir, iterations)
+    return {
+        "meta": {
+            "timestamp": started,
+            "duration_sec": time.time() - started,
+            "iterations": iterations,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pipeline",
+                                     description="캡처 → 매칭 → 클릭 파이프라인 벤치마크")
+    parser.add_argument("--scenarios-dir", default="scenarios")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--modes", nargs="+", default=["default", "pyramid"])
+    parser.add_argument("--template-counts", type=int, nargs="+", default=list(DEFAULT_TEMPLATE_COUNTS))
+    parser.add_argument("--output", help="결과 JSON 파일 경로 (기본: 표준 출력)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scenarios_dir, args.iterations, DEFAULT_AREAS,
+                            tuple(args.modes), tuple(args.template_counts))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
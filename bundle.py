@@ -0,0 +1,107 @@
+"""시나리오 번들 (.acb): 액션 표와 디코딩된 템플릿 픽셀을 담은 단일 파일
+
+파일 구조 (모든 정수는 little-endian)
+
+    0   magic  b"ACLKBNDL"
+    8   uint32 포맷 버전
+    12  uint32 헤더 길이 (바이트)
+    16  헤더 JSON (UTF-8): 시나리오 이름, 액션 표, 템플릿 목록(offset/shape)
+    ..  템플릿 픽셀 (BGR uint8, C 순서), 각각 ALIGNMENT 바이트 경계에서 시작
+
+템플릿은 `np.memmap` 위의 뷰로 바로 열리므로 PNG 디코딩도, 복사도 없다.
+픽셀은 uint8이고 경로는 '/'로 저장하므로 OS와 무관하게 같은 파일을 쓸 수 있다.
+"""
+
+import json
+import os
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BUNDLE_EXT = ".acb"
+MAGIC = b"ACLKBNDL"
+VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sII")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def template_key(bundle_path: str, index: int) -> str:
+    """템플릿 캐시에 등록할 때 쓰는 가상 경로"""
+    return f"{os.path.abspath(bundle_path)}#{index}"
+
+
+def is_template_key(path: str) -> bool:
+    """`template_key`로 만든 가상 경로(디스크에 파일이 없음)인지 여부"""
+    return f"{BUNDLE_EXT}#" in path
+
+
+def write_bundle(path: str, name: str, actions: Sequence[dict], templates: Sequence[np.ndarray],
+                 sources: Optional[Sequence[str]] = None, graph: Optional[dict] = None):
+    """번들 파일 저장
+
+    `actions`의 각 항목은 `template` 키에 `templates`의 인덱스를 가진다.
+    `sources`는 JSON+PNG로 되돌릴 때 쓸 원래 이미지 파일 이름.
+    `graph`는 그래프 시나리오의 단계 정의 (시나리오 JSON의 "graph"와 같은 형식).
+    """
+    entries = []
+    for index, template in enumerate(templates):
+        if template.dtype != np.uint8:
+            raise ValueError(f"uint8 템플릿만 저장할 수 있습니다: {template.dtype}")
+        entries.append({
+            "shape": list(template.shape),
+            "source": sources[index] if sources else f"template_{index}.png",
+        })
+
+    # 헤더 길이가 offset 값에 따라 달라지므로 길이가 고정될 때까지 반복
+    header_size = 0
+    while True:
+        offset = _align(_PREFIX.size + header_size)
+        for entry, template in zip(entries, templates):
+            entry["offset"] = offset
+            offset = _align(offset + template.nbytes)
+        data = {"name": name, "actions": list(actions), "templates": entries}
+        if graph is not None:
+            data["graph"] = graph
+        header = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        if len(header) == header_size:
+            break
+        header_size = len(header)
+
+    # 쓰는 도중의 파일을 다른 프로세스가 매핑하지 않도록 임시 파일 후 교체
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for entry, template in zip(entries, templates):
+            f.write(b"\0" * (entry["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(template).tobytes())
+    os.replace(temp_path, path)
+
+
+def read_bundle_header(path: str) -> dict:
+    """템플릿 픽셀은 건드리지 않고 헤더만 읽음"""
+    with open(path, "rb") as f:
+        magic, version, header_size = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"시나리오 번들 파일이 아닙니다: {path}")
+        if version > VERSION:
+            raise ValueError(f"지원하지 않는 번들 버전입니다: {version}")
+        return json.loads(f.read(header_size).decode("utf-8"))
+
+
+def read_bundle(path: str) -> Tuple[dict, List[np.ndarray]]:
+    """번들 헤더와 메모리 매핑된 템플릿 배열(읽기 전용) 반환"""
+    header = read_bundle_header(path)
+    entries = header["templates"]
+    templates = []
+    if entries:
+        mapped = np.memmap(path, dtype=np.uint8, mode="r")
+        for entry in entries:
+            shape = tuple(entry["shape"])
+            templates.append(np.ndarray(shape, dtype=np.uint8, buffer=mapped, offset=entry["offset"]))
+    return header, templates
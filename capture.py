@@ -0,0 +1,441 @@
+"""화면 캡처 백엔드
+
+모든 백엔드는 `grab(bbox)`로 (x1, y1, x2, y2) 영역을 NumPy 배열로 반환한다.
+반환되는 프레임은 백엔드 고유의 채널 순서(`layout`)를 그대로 유지하며,
+템플릿 쪽을 한 번만 같은 순서로 변환해서 매 틱마다의 색 변환 복사를 없앤다.
+"""
+
+import ctypes
+import ctypes.util
+import glob
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+BBox = Tuple[int, int, int, int]
+
+# (원본 순서, 대상 순서) -> cv2 변환 코드
+_LAYOUT_CONVERSIONS = {
+    ("BGR", "RGB"): cv2.COLOR_BGR2RGB,
+    ("RGB", "BGR"): cv2.COLOR_RGB2BGR,
+    ("BGR", "BGRA"): cv2.COLOR_BGR2BGRA,
+    ("BGRA", "BGR"): cv2.COLOR_BGRA2BGR,
+    ("RGB", "BGRA"): cv2.COLOR_RGB2BGRA,
+    ("BGRA", "RGB"): cv2.COLOR_BGRA2RGB,
+}
+
+
+def convert_layout(image: np.ndarray, src: str, dst: str) -> np.ndarray:
+    """채널 순서 변환. 같은 순서면 원본을 그대로 반환"""
+    if src == dst:
+        return image
+    return cv2.cvtColor(image, _LAYOUT_CONVERSIONS[(src, dst)])
+
+
+def to_bgr(image: np.ndarray, layout: str) -> np.ndarray:
+    """저장용 BGR 사본 생성 (캡처 버퍼는 재사용되므로 항상 복사)"""
+    if layout == "BGR":
+        return image.copy()
+    return convert_layout(image, layout, "BGR")
+
+
+class CaptureSource:
+    """캡처 백엔드 기본 클래스"""
+
+    name = "base"
+    layout = "BGR"  # grab()이 반환하는 프레임의 채널 순서
+
+    def __init__(self):
+        self.frames = 0
+        self.total_seconds = 0.0
+        # 닫기(close)와 grab이 겹치지 않도록 호출을 직렬화
+        self._lock = threading.Lock()
+
+    def grab(self, bbox: BBox) -> Optional[np.ndarray]:
+        """영역 캡처. 반환 프레임은 백엔드가 재사용하는 버퍼의 뷰일 수 있어 다음 grab() 전까지만 유효
+
+        잠금은 grab 호출끼리만 직렬화하므로, 다른 스레드가 프레임을 읽는 동안 grab()하면
+        그 프레임이 바뀔 수 있다. 프레임을 쓰는 스레드마다 백엔드를 따로 만든다.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            frame = self._grab(bbox)
+            self.total_seconds += time.perf_counter() - start
+            self.frames += 1
+        return frame
+
+    def _grab(self, bbox: BBox) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PILCaptureSource(CaptureSource):
+    """PIL ImageGrab 기반 캡처 (모든 OS에서 동작하는 기본 백엔드)"""
+
+    name = "pil"
+    layout = "RGB"
+
+    def __init__(self):
+        super().__init__()
+        from PIL import ImageGrab
+        self._image_grab = ImageGrab
+
+    def _grab(self, bbox: BBox) -> Optional[np.ndarray]:
+        # RGB 그대로 반환 (BGR 변환 복사 없음)
+        return np.asarray(self._image_grab.grab(bbox=bbox))
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class _XImage(ctypes.Structure):
+    # 필요한 앞부분 필드만 정의 (구조체는 Xlib이 할당)
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+    ]
+
+
+class XShmCaptureSource(CaptureSource):
+    """X11 MIT-SHM 공유 메모리 캡처 (Linux)
+
+    화면 크기만큼의 공유 메모리를 한 번만 할당하고, X 서버가 그 메모리에
+    직접 픽셀을 써 넣는다. 반환 프레임은 공유 메모리 위의 뷰이므로
+    다음 grab() 호출 전까지만 유효하다.
+    """
+
+    name = "xshm"
+    layout = "BGRA"
+
+    _ZPIXMAP = 2
+    _IPC_PRIVATE = 0
+    _IPC_CREAT = 0o1000
+    _IPC_RMID = 0
+    _ALL_PLANES = ctypes.c_ulong(-1).value
+
+    def __init__(self, display_name: Optional[str] = None):
+        super().__init__()
+        self._display_name = display_name
+        self._display = None
+        self._images: Dict[Tuple[int, int], ctypes.POINTER(_XImage)] = {}
+        self._shminfo = _XShmSegmentInfo()
+        self._buffer: Optional[np.ndarray] = None
+        self._open()
+
+    @staticmethod
+    def available() -> bool:
+        return (platform.system() == "Linux"
+                and bool(os.environ.get("DISPLAY"))
+                and ctypes.util.find_library("X11") is not None
+                and ctypes.util.find_library("Xext") is not None)
+
+    def _open(self):
+        x11 = ctypes.CDLL(ctypes.util.find_library("X11"))
+        xext = ctypes.CDLL(ctypes.util.find_library("Xext"))
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        x11.XRootWindow.restype = ctypes.c_ulong
+        x11.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultVisual.restype = ctypes.c_void_p
+        x11.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDestroyImage.argtypes = [ctypes.POINTER(_XImage)]
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+            ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint,
+        ]
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage),
+            ctypes.c_int, ctypes.c_int, ctypes.c_ulong,
+        ]
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+        self._x11, self._xext, self._libc = x11, xext, libc
+
+        name = self._display_name.encode() if self._display_name else None
+        self._display = x11.XOpenDisplay(name)
+        if not self._display:
+            raise RuntimeError("X 디스플레이를 열 수 없습니다")
+        if not xext.XShmQueryExtension(self._display):
+            x11.XCloseDisplay(self._display)
+            self._display = None
+            raise RuntimeError("X 서버가 MIT-SHM 확장을 지원하지 않습니다")
+
+        screen = x11.XDefaultScreen(self._display)
+        self._root = x11.XRootWindow(self._display, screen)
+        self._visual = x11.XDefaultVisual(self._display, screen)
+        self._depth = x11.XDefaultDepth(self._display, screen)
+        self.screen_size = (x11.XDisplayWidth(self._display, screen),
+                            x11.XDisplayHeight(self._display, screen))
+
+        # 전체 화면 크기의 공유 메모리 세그먼트를 한 번만 생성
+        size = self.screen_size[0] * self.screen_size[1] * 4
+        shmid = libc.shmget(self._IPC_PRIVATE, size, self._IPC_CREAT | 0o600)
+        if shmid < 0:
+            raise OSError(ctypes.get_errno(), "shmget 실패")
+        addr = libc.shmat(shmid, None, 0)
+        if addr in (None, ctypes.c_void_p(-1).value):
+            libc.shmctl(shmid, self._IPC_RMID, None)
+            raise OSError(ctypes.get_errno(), "shmat 실패")
+        self._shminfo.shmid = shmid
+        self._shminfo.shmaddr = addr
+        self._shminfo.readOnly = 0
+        xext.XShmAttach(self._display, ctypes.byref(self._shminfo))
+        x11.XSync(self._display, 0)
+        # 모든 프로세스가 분리되면 자동으로 해제되도록 미리 삭제 표시
+        libc.shmctl(shmid, self._IPC_RMID, None)
+
+        self._buffer = np.ctypeslib.as_array(
+            (ctypes.c_ubyte * size).from_address(addr))
+
+    def _image_for(self, width: int, height: int):
+        # 영역 크기별 XImage 헤더를 캐시 (모두 같은 공유 메모리를 가리킴)
+        image = self._images.get((width, height))
+        if image is None:
+            image = self._xext.XShmCreateImage(
+                self._display, self._visual, self._depth, self._ZPIXMAP,
+                None, ctypes.byref(self._shminfo), width, height)
+            if not image:
+                raise RuntimeError("XShmCreateImage 실패")
+            image.contents.data = self._shminfo.shmaddr
+            self._images[(width, height)] = image
+        return image
+
+    def _grab(self, bbox: BBox) -> Optional[np.ndarray]:
+        if not self._display:
+            return None  # 이미 닫힘
+        x1, y1, x2, y2 = bbox
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.screen_size[0], x2), min(self.screen_size[1], y2)
+        width, height = x2 - x1, y2 - y1
+        if width <= 0 or height <= 0:
+            return None
+
+        image = self._image_for(width, height)
+        if not self._xext.XShmGetImage(self._display, self._root, image, x1, y1, self._ALL_PLANES):
+            return None
+
+        stride = image.contents.bytes_per_line
+        frame = self._buffer[:stride * height].reshape(height, stride // 4, 4)
+        return frame[:, :width]
+
+    def close(self):
+        # 진행 중인 grab이 끝난 뒤에 공유 메모리와 디스플레이를 해제
+        with self._lock:
+            if not self._display:
+                return
+            for image in self._images.values():
+                self._x11.XDestroyImage(image)
+            self._images.clear()
+            self._xext.XShmDetach(self._display, ctypes.byref(self._shminfo))
+            self._libc.shmdt(self._shminfo.shmaddr)
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+            self._buffer = None
+
+
+class ReplayCaptureSource(CaptureSource):
+    """녹화된 전체 화면 이미지/동영상을 재생하는 캡처 (헤드리스 테스트용)
+
+    프레임은 화면 좌표계의 전체 화면으로 간주하며, grab()은 해당 영역의
+    뷰(복사 없음)를 반환한다. `advance_on_grab`이 켜져 있으면 grab()마다
+    다음 프레임으로 넘어간다.
+    """
+
+    name = "replay"
+    layout = "BGR"
+
+    def __init__(self, frames: Union[str, Sequence[Union[str, np.ndarray]]],
+                 loop: bool = True, advance_on_grab: bool = True,
+                 origin: Tuple[int, int] = (0, 0)):
+        super().__init__()
+        self.loop = loop
+        self.advance_on_grab = advance_on_grab
+        self.origin = origin  # 첫 프레임 왼쪽 위 픽셀의 화면 좌표
+        self.index = 0
+        self._video = None
+        self._video_frame: Optional[np.ndarray] = None
+        self._frames: List[np.ndarray] = []
+
+        if isinstance(frames, str) and os.path.isdir(frames):
+            frames = sorted(glob.glob(os.path.join(frames, "*.png")))
+        if isinstance(frames, str):
+            # 동영상 파일은 하나의 버퍼에 순차 디코딩
+            self._video = cv2.VideoCapture(frames)
+            if not self._video.isOpened():
+                raise ValueError(f"재생할 수 없는 파일입니다: {frames}")
+            self._read_video_frame()
+        else:
+            for frame in frames:
+                image = cv2.imread(frame) if isinstance(frame, str) else frame
+                if image is None:
+                    raise ValueError(f"이미지를 불러올 수 없습니다: {frame}")
+                self._frames.append(image)
+            if not self._frames:
+                raise ValueError("재생할 프레임이 없습니다")
+
+    def _read_video_frame(self) -> bool:
+        ok, frame = self._video.read(self._video_frame)
+        if not ok and self.loop:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._video.read(self._video_frame)
+        if ok:
+            self._video_frame = frame
+        return ok
+
+    def current_frame(self) -> Optional[np.ndarray]:
+        if self._video is not None:
+            return self._video_frame
+        return self._frames[self.index]
+
+    def seek(self, index: int):
+        if self._video is not None:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, index)
+            self._read_video_frame()
+        else:
+            self.index = min(index, len(self._frames) - 1)
+
+    def advance(self):
+        if self._video is not None:
+            self._read_video_frame()
+        elif self.index + 1 < len(self._frames):
+            self.index += 1
+        elif self.loop:
+            self.index = 0
+
+    def _grab(self, bbox: BBox) -> Optional[np.ndarray]:
+        frame = self.current_frame()
+        if self.advance_on_grab:
+            self.advance()
+        if frame is None:
+            return None
+
+        height, width = frame.shape[:2]
+        x1, y1 = max(0, bbox[0] - self.origin[0]), max(0, bbox[1] - self.origin[1])
+        x2, y2 = min(width, bbox[2] - self.origin[0]), min(height, bbox[3] - self.origin[1])
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return frame[y1:y2, x1:x2]
+
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+
+
+CAPTURE_BACKENDS = {
+    PILCaptureSource.name: PILCaptureSource,
+    XShmCaptureSource.name: XShmCaptureSource,
+    ReplayCaptureSource.name: ReplayCaptureSource,
+}
+
+
+def create_capture_source(name: Optional[str] = None, **kwargs) -> CaptureSource:
+    """이름으로 캡처 백엔드 생성. 이름이 없으면 사용 가능한 가장 빠른 백엔드 선택"""
+    if name is None:
+        if XShmCaptureSource.available():
+            try:
+                return XShmCaptureSource(**kwargs)
+            except (OSError, RuntimeError) as e:
+                print(f"XShm 캡처를 사용할 수 없어 PIL로 대체합니다: {e}")
+        return PILCaptureSource()
+    return CAPTURE_BACKENDS[name](**kwargs)
+
+
+def measure_capture_source(source: CaptureSource, bbox: BBox, frames: int = 100) -> dict:
+    """백엔드의 초당 프레임 수와 프레임당 할당 바이트 측정"""
+    source.grab(bbox)  # 버퍼 초기화 등 첫 호출 비용 제외
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    allocated = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        source.grab(bbox)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+    elapsed = time.perf_counter() - start
+    if not was_tracing:
+        tracemalloc.stop()
+
+    return {
+        "backend": source.name,
+        "layout": source.layout,
+        "bbox": list(bbox),
+        "frames": frames,
+        "fps": frames / elapsed if elapsed > 0 else float("inf"),
+        "bytes_per_frame": allocated // frames,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="캡처 백엔드별 성능 리포트")
+    parser.add_argument("--bbox", type=int, nargs=4, default=[0, 0, 1920, 1080])
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--backend", action="append", choices=["pil", "xshm"],
+                        help="측정할 백엔드 (기본: 사용 가능한 전부)")
+    parser.add_argument("--replay", help="replay 백엔드로 측정할 이미지 디렉토리 또는 동영상")
+    args = parser.parse_args()
+
+    sources = []
+    for name in args.backend or ["pil", "xshm"]:
+        try:
+            sources.append(create_capture_source(name))
+        except Exception as e:
+            print(f"{name} 백엔드를 사용할 수 없습니다: {e}")
+    if args.replay:
+        sources.append(ReplayCaptureSource(args.replay))
+
+    for source in sources:
+        with source:
+            print(json.dumps(measure_capture_source(source, tuple(args.bbox), args.frames)))
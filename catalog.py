@@ -0,0 +1,187 @@
+"""시나리오 카탈로그: 시나리오 목록과 요약 정보를 담은 영구 색인
+
+`scenarios/.catalog.json`에 시나리오별 이름, 액션 수, 템플릿 경로, 파일 수정 시각,
+최근 실행 통계를 저장한다. `refresh()`는 디렉토리를 훑어 수정 시각/크기가 바뀐
+파일만 다시 읽으므로, 바뀌지 않은 시나리오 파일은 프로그램을 다시 시작해도 읽지 않는다.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from bundle import BUNDLE_EXT, read_bundle_header, template_key
+
+CATALOG_FILE = ".catalog.json"
+CATALOG_VERSION = 1
+
+
+@dataclass
+class CatalogEntry:
+    name: str
+    path: str  # 실제로 불러올 파일 (JSON 또는 번들)
+    mtime_ns: int
+    size: int
+    action_count: int = 0
+    template_paths: List[str] = field(default_factory=list)
+    run_count: int = 0
+    last_run: Optional[float] = None  # 마지막 실행 시각 (epoch 초)
+    last_result: Optional[str] = None  # "finished", "error", "stopped"
+    last_duration: Optional[float] = None  # 마지막 실행 소요 시간 (초)
+
+    @property
+    def file_key(self) -> Tuple[int, int]:
+        return (self.mtime_ns, self.size)
+
+
+def scenario_source(json_path: Optional[str], bundle_path: Optional[str]) -> Optional[str]:
+    """JSON과 번들 중 불러올 파일 선택 (JSON보다 오래되지 않은 번들 우선)"""
+    if bundle_path and (not json_path or os.path.getmtime(bundle_path) >= os.path.getmtime(json_path)):
+        return bundle_path
+    return json_path
+
+
+def read_summary(path: str) -> Tuple[int, List[str]]:
+    """시나리오 파일의 액션 수와 템플릿 경로"""
+    if path.endswith(BUNDLE_EXT):
+        header = read_bundle_header(path)
+        return len(header["actions"]), [template_key(path, i) for i in range(len(header["templates"]))]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return len(data["actions"]), [action["target_image"] for action in data["actions"]]
+
+
+class ScenarioCatalog:
+    def __init__(self, scenarios_dir: str = "scenarios"):
+        self.scenarios_dir = scenarios_dir
+        self.index_path = os.path.join(scenarios_dir, CATALOG_FILE)
+        self.entries: Dict[str, CatalogEntry] = {}
+        self.files_read = 0  # refresh에서 다시 읽은 파일 수 (누적)
+        self.dirty = False  # 저장하지 않은 실행 통계가 있음 (`record_run(save=False)`)
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CATALOG_VERSION:
+                self.entries = {item["name"]: CatalogEntry(**item) for item in data["entries"]}
+        except (OSError, ValueError, TypeError, KeyError):
+            self.entries = {}
+
+    def save(self):
+        with self._lock:
+            self.dirty = False
+            data = {"version": CATALOG_VERSION,
+                    "entries": [asdict(entry) for entry in self.entries.values()]}
+        # 여러 프로세스(팜 작업 프로세스 등)나 스레드가 동시에 저장해도 서로의 임시 파일을 덮어쓰지 않도록 PID/스레드 포함
+        temp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"카탈로그 저장 중 오류 발생: {e}")
+
+    def refresh(self) -> bool:
+        """디렉토리 변경 사항을 반영. 목록이나 내용이 바뀌었으면 True"""
+        files: Dict[str, Dict[str, str]] = {}
+        try:
+            with os.scandir(self.scenarios_dir) as it:
+                for item in it:
+                    stem, ext = os.path.splitext(item.name)
+                    if ext in (".json", BUNDLE_EXT) and item.name != CATALOG_FILE and item.is_file():
+                        files.setdefault(stem, {})[ext] = item.path
+        except OSError:
+            return False
+
+        changed = False
+        with self._lock:
+            for name in list(self.entries):
+                if name not in files:
+                    del self.entries[name]
+                    changed = True
+
+            for name, paths in files.items():
+                try:
+                    path = scenario_source(paths.get(".json"), paths.get(BUNDLE_EXT))
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = self.entries.get(name)
+                if entry is not None and entry.path == path and entry.file_key == (stat.st_mtime_ns, stat.st_size):
+                    continue
+
+                # 새 파일이거나 바뀐 파일만 다시 읽음
+                try:
+                    action_count, template_paths = read_summary(path)
+                except Exception as e:
+                    print(f"카탈로그 갱신 중 오류 발생 ({name}): {e}")
+                    action_count, template_paths = 0, []
+                self.files_read += 1
+                if entry is None:
+                    entry = self.entries[name] = CatalogEntry(name, path, stat.st_mtime_ns, stat.st_size)
+                entry.path, entry.mtime_ns, entry.size = path, stat.st_mtime_ns, stat.st_size
+                entry.action_count, entry.template_paths = action_count, template_paths
+                changed = True
+
+        if changed:
+            self.save()
+        return changed
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self.entries)
+
+    def get(self, name: str) -> Optional[CatalogEntry]:
+        with self._lock:
+            return self.entries.get(name)
+
+    def search(self, query: str = "") -> List[str]:
+        """이름 검색 (대소문자 무시). 접두사 일치 항목을 먼저, 그다음 부분 문자열 일치 항목"""
+        query = query.strip().lower()
+        names = self.names()
+        if not query:
+            return names
+        prefix = [name for name in names if name.lower().startswith(query)]
+        substring = [name for name in names if query in name.lower() and not name.lower().startswith(query)]
+        return prefix + substring
+
+    def rename(self, old_name: str, new_name: str):
+        """이름을 바꾼 시나리오의 실행 통계를 새 이름으로 옮김 (파일 정보는 다음 refresh에서 갱신)"""
+        with self._lock:
+            entry = self.entries.pop(old_name, None)
+            if entry is not None:
+                entry.name = new_name
+                self.entries[new_name] = entry
+
+    def flush(self) -> bool:
+        """`record_run(save=False)`로 미뤄 둔 실행 통계를 저장. 저장했으면 True"""
+        if not self.dirty:
+            return False
+        self.save()
+        return True
+
+    def record_run(self, name: str, result: str, seconds: Optional[float] = None, save: bool = True):
+        """실행 결과를 기록하고 색인 저장
+
+        `save`가 False면 메모리에만 기록하고, 저장은 다음 `flush()`/`save()`에 맡긴다
+        (반복 실행처럼 결과가 자주 들어올 때 매번 색인 파일을 쓰지 않도록).
+        """
+        if name not in self.entries:
+            # 색인을 갱신하기 전에 새로 만든 시나리오를 실행한 경우
+            self.refresh()
+        with self._lock:
+            entry = self.entries.get(name)
+            if entry is None:
+                return
+            entry.run_count += 1
+            entry.last_run = time.time()
+            entry.last_result = result
+            entry.last_duration = seconds
+            self.dirty = True
+        if save:
+            self.save()
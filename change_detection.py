@@ -0,0 +1,60 @@
+"""검색 영역이 직전 프레임과 같으면 템플릿 매칭을 건너뛰기 위한 변화 감지"""
+
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class ChangeDetector:
+    """하나의 검색 영역에 대한 변화 감지기
+
+    직전 프레임을 미리 할당한 버퍼에 보관하고 벡터화된 비교로 변화를 판단한다.
+    영역 크기가 바뀌지 않는 한 매 틱마다 새 메모리를 할당하지 않는다.
+    """
+
+    def __init__(self):
+        self._previous: Optional[np.ndarray] = None
+        self.last_result: Optional[Tuple[int, int]] = None  # 직전 매칭 결과
+        self.reused = False  # 마지막으로 돌려준 결과가 매칭 없이 재사용한 직전 결과인지
+
+    def changed(self, frame: np.ndarray) -> bool:
+        """직전 프레임과 픽셀이 다르면 True. 현재 프레임을 다음 비교용으로 보관"""
+        previous = self._previous
+        if previous is None or previous.shape != frame.shape:
+            self._previous = np.array(frame, copy=True)
+            return True
+        if np.array_equal(previous, frame):
+            return False
+        np.copyto(previous, frame)
+        return True
+
+    def reset(self):
+        self._previous = None
+        self.last_result = None
+        self.reused = False
+
+
+class ChangeStats:
+    """건너뛴 매칭 수와 실제로 수행한 매칭 수"""
+
+    def __init__(self):
+        self.skipped = 0
+        self.performed = 0
+        self._lock = threading.Lock()
+
+    def record(self, skipped: bool):
+        with self._lock:
+            if skipped:
+                self.skipped += 1
+            else:
+                self.performed += 1
+
+    def reset(self):
+        with self._lock:
+            self.skipped = 0
+            self.performed = 0
+
+    def report(self) -> dict:
+        with self._lock:
+            return {"matches_skipped": self.skipped, "matches_performed": self.performed}
@@ -0,0 +1,469 @@
+"""GUI 없이 시나리오를 실행하는 명령줄 진입점
+
+    python -m cli list
+    python -m cli pack <시나리오 이름> / python -m cli unpack <번들 파일>
+    python -m cli compile [시나리오 이름...] [--force]
+    python -m cli flight <기록 파일> [--export DIR]
+    python -m cli run <시나리오 이름> [--dry-run] [--capture xshm|pil|replay]
+    python -m cli run <시나리오 이름> --metrics-dir out/ --trace
+    python -m cli run <시나리오 이름> --repeat 1000 [--duration 초] [--jitter 초] [--soak-report soak.json]
+    python -m cli serve [--port 8765 | --socket 경로] [--warm] / python -m cli submit <시나리오 이름> [--wait]
+
+Tk, pyautogui 등 무거운 모듈은 실제로 필요할 때만 불러온다.
+"""
+
+import argparse
+import os
+import queue
+import signal
+import sys
+import time
+
+
+class StartupTimer:
+    """시작 단계별 소요 시간 기록"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self) -> str:
+        lines = [f"  {phase:<12} {seconds * 1000:8.1f}ms" for phase, seconds in self.phases]
+        lines.append(f"  {'total':<12} {(self.last - self.start) * 1000:8.1f}ms")
+        return "시작 단계별 소요 시간:\n" + "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="화면 인식 클릭 시나리오 실행")
+    parser.add_argument("--scenarios-dir", default="scenarios", help="시나리오 디렉토리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    listing = subparsers.add_parser("list", help="저장된 시나리오 목록 출력")
+    listing.add_argument("query", nargs="?", default="", help="이름 검색어 (접두사 일치 우선)")
+    listing.add_argument("-l", "--long", action="store_true", help="액션 수와 최근 실행 결과도 출력")
+
+    pack = subparsers.add_parser("pack", help="JSON+PNG 시나리오를 번들(.acb) 파일로 저장")
+    pack.add_argument("name", help="시나리오 이름")
+    pack.add_argument("-o", "--output", help="번들 파일 경로 (기본: 시나리오 디렉토리)")
+
+    unpack = subparsers.add_parser("unpack", help="번들(.acb) 파일을 JSON+PNG 시나리오로 풀기")
+    unpack.add_argument("path", help="번들 파일 경로")
+    unpack.add_argument("--name", help="저장할 시나리오 이름 (기본: 번들에 저장된 이름)")
+
+    compile_ = subparsers.add_parser("compile", help="템플릿 산출물(.tpl) 생성/갱신")
+    compile_.add_argument("names", nargs="*", help="시나리오 이름 (기본: 전체)")
+    compile_.add_argument("--force", action="store_true", help="원본이 바뀌지 않았어도 다시 생성")
+
+    run = subparsers.add_parser("run", help="시나리오 실행")
+    run.add_argument("name", help="실행할 시나리오 이름")
+    run.add_argument("--capture", choices=["pil", "xshm", "replay"],
+                     help="캡처 백엔드 (기본: 자동 선택)")
+    run.add_argument("--replay", help="replay 캡처에 사용할 이미지 디렉토리 또는 동영상")
+    run.add_argument("--dry-run", action="store_true", help="클릭하지 않고 위치만 출력")
+    run.add_argument("--input", choices=["xtest", "pyautogui", "record"],
+                     help="입력 백엔드 (기본: 사용 가능한 가장 빠른 백엔드)")
+    run.add_argument("--input-interval", type=float, default=0.0, help="입력 이벤트 사이 간격 (초)")
+    run.add_argument("--pipelined", action="store_true", help="대기 중 다음 액션 미리 탐색")
+    run.add_argument("--feature-fallback", action="store_true",
+                     help="템플릿 매칭 실패 시 특징점(ORB) 매칭으로 재시도")
+    run.add_argument("--no-location-memory", action="store_true",
+                     help="지난 매칭 위치 주변부터 검색하지 않고 항상 전체 영역 검색")
+    run.add_argument("--tick", type=float, default=0.5, help="재시도 간격 (초)")
+    run.add_argument("--timings", action="store_true", help="시작 단계별 소요 시간 출력")
+    run.add_argument("--metrics-dir", help="실행 후 계측 결과(metrics.prom, events.jsonl)를 저장할 디렉토리")
+    run.add_argument("--trace", action="store_true", help="Chrome trace/Perfetto 파일(trace.json)도 저장")
+    run.add_argument("--flight-dir", default="flight",
+                     help="오류/시간 초과 시 최근 화면 기록을 저장할 디렉토리 (SIGUSR1로 즉시 저장)")
+    run.add_argument("--flight-keep", type=int, default=50, help="기록 디렉토리에 남겨 둘 최근 기록 파일 수")
+    soak = run.add_argument_group("반복 실행", "지정하면 대화 없이 반복하며 회차별 결과와 메모리 추이를 출력")
+    soak.add_argument("--repeat", type=int, help="반복 횟수 (0이면 무기한)")
+    soak.add_argument("--duration", type=float, help="반복할 시간 (초)")
+    soak.add_argument("--jitter", type=float, default=0.0, help="회차 사이 임의 대기 최대 시간 (초)")
+    soak.add_argument("--sample-every", type=int, default=1, help="메모리 표본 간격 (회차)")
+    soak.add_argument("--trace-allocations", action="store_true",
+                      help="tracemalloc으로 Python 할당량도 추적 (느려짐)")
+    soak.add_argument("--soak-report", help="반복 실행 요약/회차별 결과/메모리 표본을 저장할 JSON 경로")
+
+    flight = subparsers.add_parser("flight", help="최근 화면 기록(.acfr) 보기/내보내기")
+    flight.add_argument("path", help="기록 파일 경로")
+    flight.add_argument("--export", metavar="DIR", help="프레임을 PNG로 저장할 디렉토리")
+
+    serve = subparsers.add_parser("serve", help="실행 요청을 받는 로컬 HTTP 서비스 시작")
+    serve.add_argument("--host", default="127.0.0.1", help="받을 주소 (기본: 로컬만)")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--socket", help="TCP 대신 사용할 Unix 소켓 경로")
+    serve.add_argument("--token-file", help="인증 토큰 파일 (기본: ~/.autoclicker/service.token, 없으면 0600으로 생성)")
+    serve.add_argument("--capture", choices=["pil", "xshm", "replay"],
+                       help="화면 캡처 백엔드 (기본: 가능하면 xshm, 아니면 pil)")
+    serve.add_argument("--replay", help="replay 캡처에 사용할 이미지 디렉토리 또는 동영상 (작업마다 처음부터 재생)")
+    serve.add_argument("--dry-run", action="store_true", help="클릭하지 않고 위치만 출력")
+    serve.add_argument("--input", choices=["xtest", "pyautogui", "record"], help="클릭 입력 백엔드")
+    serve.add_argument("--input-interval", type=float, default=0.0, help="입력 이벤트 사이 간격 (초)")
+    serve.add_argument("--pipelined", action="store_true", help="대기 중 다음 액션 미리 탐색")
+    serve.add_argument("--feature-fallback", action="store_true", help="템플릿 매칭 실패 시 특징점 매칭으로 재시도")
+    serve.add_argument("--no-location-memory", action="store_true", help="지난 실행 위치 주변 우선 검색 끄기")
+    serve.add_argument("--tick", type=float, default=0.5, help="재시도 간격 (초)")
+    serve.add_argument("--flight-dir", default="flight", help="최근 화면 기록을 저장할 디렉토리 (빈 값이면 저장 안 함)")
+    serve.add_argument("--flight-keep", type=int, default=50, help="기록 디렉토리에 남겨 둘 최근 기록 파일 수")
+    serve.add_argument("--warm", action="store_true", help="시작할 때 모든 시나리오와 템플릿을 미리 불러옴")
+    serve.add_argument("--verbose", action="store_true", help="요청 로그와 매칭 진행 상황 출력")
+
+    submit = subparsers.add_parser("submit", help="실행 서비스에 시나리오 실행 요청")
+    submit.add_argument("name", help="실행할 시나리오 이름")
+    submit.add_argument("--priority", type=int, default=0, help="우선순위 (클수록 먼저 실행)")
+    submit.add_argument("--timeout", type=float, help="실행 제한 시간 (초)")
+    submit.add_argument("--wait", action="store_true", help="끝날 때까지 이벤트를 출력하며 대기")
+    submit.add_argument("--host", default="127.0.0.1")
+    submit.add_argument("--port", type=int, default=8765)
+    submit.add_argument("--socket", help="서비스의 Unix 소켓 경로")
+    submit.add_argument("--token-file", help="인증 토큰 파일 (기본: ~/.autoclicker/service.token)")
+
+    farm = subparsers.add_parser("farm", help="가상 디스플레이(Xvfb)별 작업 프로세스로 병렬 실행")
+    farm.add_argument("names", nargs="+", help="실행할 시나리오 이름들")
+    farm.add_argument("--workers", type=int, help="작업 프로세스 수 (기본: CPU 코어 수)")
+    farm.add_argument("--repeat", type=int, default=1, help="시나리오 목록 반복 횟수")
+    farm.add_argument("--capture", choices=["pil", "xshm", "replay"], default="xshm")
+    farm.add_argument("--replay", help="replay 캡처에 사용할 이미지 디렉토리 또는 동영상")
+    farm.add_argument("--dry-run", action="store_true", help="클릭하지 않음")
+    farm.add_argument("--no-xvfb", action="store_true", help="Xvfb를 띄우지 않음 (replay 점검용)")
+    farm.add_argument("--screen", default="1920x1080", help="가상 디스플레이 해상도")
+    farm.add_argument("--base-display", type=int, default=100, help="첫 디스플레이 번호")
+    farm.add_argument("--job-timeout", type=float, help="작업당 제한 시간 (초)")
+    return parser
+
+
+def command_list(args) -> int:
+    from scenario import ScenarioManager
+
+    manager = ScenarioManager(args.scenarios_dir)
+    for name in manager.search_scenarios(args.query, refresh=True):
+        entry = manager.catalog.get(name)
+        if args.long and entry is not None:
+            print(f"{name}\t{entry.action_count}\t{entry.run_count}\t{entry.last_result or '-'}")
+        else:
+            print(name)
+    return 0
+
+
+def command_pack(args) -> int:
+    from scenario import ScenarioManager
+
+    path = ScenarioManager(args.scenarios_dir).export_bundle(args.name, args.output)
+    if path is None:
+        return 1
+    print(path)
+    return 0
+
+
+def command_unpack(args) -> int:
+    from scenario import ScenarioManager
+
+    name = ScenarioManager(args.scenarios_dir).import_bundle(args.path, args.name)
+    if name is None:
+        return 1
+    print(name)
+    return 0
+
+
+def command_compile(args) -> int:
+    from scenario import ScenarioManager
+    from template_artifacts import artifact_store
+
+    manager = ScenarioManager(args.scenarios_dir)
+    failed = 0
+    for name in args.names or manager.list_scenarios():
+        count = manager.compile_scenario(name, args.force)
+        if count is None:
+            failed += 1
+            continue
+        print(f"{name}\t{count}")
+    print(f"새로 생성 {artifact_store.compiled}개, 재사용 {artifact_store.loaded}개", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def command_flight(args) -> int:
+    from flight_recorder import read_flight
+
+    try:
+        header, frames = read_flight(args.path)
+    except (OSError, ValueError) as e:
+        print(f"기록 파일을 읽을 수 없습니다: {e}", file=sys.stderr)
+        return 1
+    print(f"사유: {header['reason']}, 저장 시각: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['created']))}")
+    if args.export:
+        import cv2
+        from capture import to_bgr
+        os.makedirs(args.export, exist_ok=True)
+    for index, (entry, frame) in enumerate(zip(header["records"], frames)):
+        score = "-" if entry["score"] is None else f"{entry['score']:.3f}"
+        clock = time.strftime('%H:%M:%S', time.localtime(entry["time"])) + f".{int(entry['time'] % 1 * 1000):03d}"
+        line = (f"{index:3d}  {clock}  {entry['label']}\t점수 {score}\t{'찾음' if entry['found'] else '-'}"
+                f"\t영역 {tuple(entry['area'])}\t{frame.shape[1]}x{frame.shape[0]}")
+        if entry["decimation"] > 1:
+            line += f" (1/{entry['decimation']})"
+        if args.export:
+            image = frame if entry["layout"] == "GRAY" else to_bgr(frame, entry["layout"])
+            image_path = os.path.join(args.export, f"{index:03d}_{entry['label']}.png")
+            # cv2.imwrite는 비 ASCII 경로를 쓰지 못하는 플랫폼이 있어 인코딩 후 저장
+            ok, encoded = cv2.imencode(".png", image)
+            if ok:
+                encoded.tofile(image_path)
+                line += f"\t-> {image_path}"
+        print(line)
+    return 0
+
+
+def command_run(args) -> int:
+    timer = StartupTimer()
+
+    from scenario import ScenarioManager
+    timer.mark("import")
+
+    manager = ScenarioManager(args.scenarios_dir)
+    actions = manager.load_scenario(args.name)
+    if not actions:
+        print(f"시나리오를 불러올 수 없습니다: {args.name}", file=sys.stderr)
+        return 1
+    timer.mark("load")
+
+    from capture import ReplayCaptureSource, create_capture_source
+    if args.capture == "replay":
+        if not args.replay:
+            print("--capture replay에는 --replay 경로가 필요합니다", file=sys.stderr)
+            return 2
+        capture_source = ReplayCaptureSource(args.replay)
+    else:
+        capture_source = create_capture_source(args.capture)
+    timer.mark("capture")
+
+    from engine import ScenarioEngine
+    from input_sink import RecordingInputSink, create_input_sink
+    from metrics import Instrumentation
+    soak = None
+    if args.repeat is not None or args.duration is not None:
+        from soak import MemoryMonitor, SoakRunner
+        soak = SoakRunner(args.repeat or None, args.duration, args.jitter, args.sample_every,
+                          MemoryMonitor(trace_allocations=args.trace_allocations))
+    if args.dry_run:
+        # 반복 실행에서는 입력 기록을 보관하지 않음 (출력만)
+        input_sink = RecordingInputSink(echo=True, max_events=0 if soak is not None else 10000)
+    else:
+        input_sink = create_input_sink(args.input, interval=args.input_interval)
+    timer.mark("input")
+    # 반복 실행에서 계측을 저장하지 않으면 이벤트 로그는 남기지 않음
+    # (최대 길이까지 차는 동안 메모리 증가로 보이지 않도록)
+    metrics = Instrumentation(trace=args.trace,
+                              max_events=0 if soak is not None and not args.metrics_dir else 100_000)
+    engine = ScenarioEngine(capture_source, click=input_sink, tick_interval=args.tick,
+                            pipelined=args.pipelined, feature_fallback=args.feature_fallback,
+                            metrics=metrics)
+    if not args.no_location_memory:
+        engine.location_memory = manager.location_memory(args.name)
+    engine.flight_dir = args.flight_dir
+    engine.flight_keep = args.flight_keep
+    if hasattr(signal, "SIGUSR1"):
+        # 실행 중인 프로세스에서 최근 화면 기록을 바로 저장: kill -USR1 <pid>
+        signal.signal(signal.SIGUSR1, lambda signum, frame: engine.dump_flight("manual"))
+    engine.prepare_actions(actions)
+    timer.mark("engine")
+
+    if args.timings:
+        print(timer.report(), file=sys.stderr)
+
+    graph = manager.load_graph(args.name)
+    started = time.perf_counter()
+    if soak is not None:
+        engine.start_soak(actions, graph, soak)
+    elif graph is not None:
+        engine.start_graph(actions, graph)
+    else:
+        engine.start_scenario(sorted(actions, key=lambda x: x.order))
+    result = 1
+    flushed = time.perf_counter()
+    try:
+        while engine.running or not engine.events.empty():
+            try:
+                event = engine.events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if event.kind == "iteration":
+                print(event.message, flush=True)
+                # 색인 파일은 회차마다 쓰지 않고 모아서 저장
+                manager.catalog.record_run(args.name, event.data["result"], event.data["seconds"], save=False)
+                if time.perf_counter() - flushed > 10:
+                    manager.catalog.flush()
+                    flushed = time.perf_counter()
+            if event.kind == "finished":
+                result = 0 if soak is None or event.data["errors"] == 0 else 1
+                if soak is not None:
+                    print(event.message)
+            if event.kind == "error":
+                print(event.message, file=sys.stderr)
+    except KeyboardInterrupt:
+        engine.cancel()
+        result = 130
+    finally:
+        # 중지(Ctrl+C)한 경우 작업 스레드가 캡처/입력을 다 쓸 때까지 기다린 뒤 백엔드를 닫음
+        engine.join(timeout=5)
+        capture_source.close()
+        input_sink.close()
+        if args.timings:
+            print(f"입력 지연: {input_sink.stats()}", file=sys.stderr)
+        if soak is None:
+            manager.catalog.record_run(args.name, {0: "finished", 130: "stopped"}.get(result, "error"),
+                                       time.perf_counter() - started)
+        else:
+            manager.catalog.flush()
+            if result == 130:
+                print(f"반복 실행 중지: {soak.describe_summary(soak.summary())}")
+            if args.soak_report:
+                soak.write_report(args.soak_report)
+                print(f"반복 실행 보고서 저장: {args.soak_report}", file=sys.stderr)
+        if args.metrics_dir:
+            engine.metrics.export(args.metrics_dir)
+    return result
+
+
+def command_serve(args) -> int:
+    from capture import ReplayCaptureSource, create_capture_source
+    from engine import ScenarioEngine
+    from input_sink import RecordingInputSink, create_input_sink
+    from scenario import ScenarioManager
+    from service import DEFAULT_TOKEN_PATH, ScenarioService, create_server, load_or_create_token
+
+    if args.capture == "replay":
+        if not args.replay:
+            print("--capture replay에는 --replay 경로가 필요합니다", file=sys.stderr)
+            return 2
+        capture_source = ReplayCaptureSource(args.replay)
+    else:
+        capture_source = create_capture_source(args.capture)
+    if args.dry_run:
+        input_sink = RecordingInputSink(echo=True)
+    else:
+        input_sink = create_input_sink(args.input, interval=args.input_interval)
+    engine = ScenarioEngine(capture_source, click=input_sink, tick_interval=args.tick,
+                            pipelined=args.pipelined, feature_fallback=args.feature_fallback,
+                            verbose=args.verbose)
+    engine.flight_dir = args.flight_dir
+    engine.flight_keep = args.flight_keep
+    manager = ScenarioManager(args.scenarios_dir)
+    service = ScenarioService(engine, manager, seek_replay=args.capture == "replay",
+                              location_memory=not args.no_location_memory)
+    if args.warm:
+        started = time.perf_counter()
+        count = service.warm()
+        print(f"시나리오 {count}개 준비 완료 ({time.perf_counter() - started:.2f}초)", file=sys.stderr)
+
+    try:
+        token = load_or_create_token(args.token_file or DEFAULT_TOKEN_PATH)
+        server = create_server(service, args.host, args.port, args.socket, verbose=args.verbose, token=token)
+    except OSError as e:
+        print(f"서비스를 시작할 수 없습니다: {e}", file=sys.stderr)
+        capture_source.close()
+        input_sink.close()
+        return 1
+    service.start()
+    print(f"실행 서비스 대기 중: {args.socket or f'http://{args.host}:{args.port}'}", file=sys.stderr)
+    # 종료 요청(SIGTERM)도 Ctrl+C처럼 처리해 실행 중인 작업을 중지하고 정리
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        engine.join(timeout=5)
+        capture_source.close()
+        input_sink.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+def command_submit(args) -> int:
+    import json
+    from service import DEFAULT_TOKEN_PATH, ServiceClient, read_token
+
+    token_file = args.token_file or DEFAULT_TOKEN_PATH
+    token = read_token(token_file)
+    if token is None:
+        print(f"인증 토큰 파일을 읽을 수 없습니다: {token_file} (서비스를 먼저 시작하세요)", file=sys.stderr)
+        return 1
+    client = ServiceClient(args.host, args.port, args.socket, token=token)
+    job = None
+    try:
+        job = client.submit(args.name, args.priority, args.timeout)
+        if not args.wait:
+            print(json.dumps(job, ensure_ascii=False))
+            return 0
+        for event in client.events(job["id"]):
+            if event["kind"] == "job":
+                job = event
+            elif event.get("message"):
+                print(event["message"])
+    except KeyboardInterrupt:
+        if job is not None:
+            client.cancel(job["id"])
+        return 130
+    except (OSError, RuntimeError) as e:
+        print(f"요청 실패: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(job, ensure_ascii=False))
+    return 0 if job["state"] == "finished" else 1
+
+
+def command_farm(args) -> int:
+    import json
+    from farm import ScenarioFarm
+
+    if args.capture == "replay" and not args.replay:
+        print("--capture replay에는 --replay 경로가 필요합니다", file=sys.stderr)
+        return 2
+    width, height = (int(value) for value in args.screen.lower().split("x"))
+    farm = ScenarioFarm(args.workers, args.scenarios_dir, (width, height), args.base_display,
+                        capture=args.capture, replay=args.replay, dry_run=args.dry_run,
+                        use_xvfb=not args.no_xvfb, job_timeout=args.job_timeout)
+    try:
+        with farm:
+            report = farm.run(list(args.names) * args.repeat)
+    except KeyboardInterrupt:
+        return 130
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    summary = report.summary()
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary["failed"] == 0 else 1
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "list":
+        return command_list(args)
+    if args.command == "pack":
+        return command_pack(args)
+    if args.command == "unpack":
+        return command_unpack(args)
+    if args.command == "compile":
+        return command_compile(args)
+    if args.command == "flight":
+        return command_flight(args)
+    if args.command == "farm":
+        return command_farm(args)
+    if args.command == "serve":
+        return command_serve(args)
+    if args.command == "submit":
+        return command_submit(args)
+    return command_run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
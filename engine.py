@@ -0,0 +1,642 @@
+"""캡처 → 매칭 → 클릭 루프를 Tk 메인 스레드 밖에서 실행하는 엔진
+
+GUI와는 스레드 안전한 이벤트 큐(`events`)로만 통신하며,
+실행 중지는 `CancellationToken`으로 요청한다.
+"""
+
+import itertools
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from change_detection import ChangeDetector, ChangeStats
+from features import FeatureMatcher, FeatureStore
+from flight_recorder import FlightRecorder, dump_name, prune_dumps
+from location_memory import LocationMemory, LocationStats
+from matching import BatchMatcher, TemplateMatcher
+from metrics import Instrumentation
+from template_artifacts import artifact_store
+from template_cache import template_cache
+from watch import WatchStats, area_view, group_rules, rules_from_actions, union_area
+
+
+class CancellationToken:
+    """실행 중지 요청을 전달하는 토큰. 대기 중에도 즉시 깨어난다"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.run_id = 0  # 엔진이 실행을 시작할 때 붙이는 번호 (EngineEvent.run과 같음)
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, seconds: float) -> bool:
+        """최대 `seconds` 동안 대기. 중지 요청이 들어오면 True 반환"""
+        return self._event.wait(seconds)
+
+
+@dataclass
+class EngineEvent:
+    # "status", "action_done", "click", "finished", "stopped", "error", "iteration" (반복 실행 회차 완료)
+    kind: str
+    message: str = ""
+    data: Dict = field(default_factory=dict)
+    run: int = 0  # 이벤트를 보낸 실행 번호. 이전 실행이 늦게 보낸 이벤트를 걸러낼 때 사용
+
+
+def pyautogui_click(x: int, y: int):
+    """기본 클릭 동작: 지정 위치로 이동 후 클릭"""
+    import pyautogui
+    pyautogui.moveTo(x, y)
+    pyautogui.click()
+
+
+class ScenarioEngine:
+    def __init__(self, capture_source, matcher: Optional[TemplateMatcher] = None,
+                 click: Callable[[int, int], None] = pyautogui_click,
+                 events: Optional[queue.Queue] = None,
+                 tick_interval: float = 0.5, display: str = "",
+                 skip_unchanged: bool = True, pipelined: bool = False,
+                 settle_time: float = 0.2, lookahead_interval: float = 0.05,
+                 verbose: bool = True, metrics: Optional[Instrumentation] = None,
+                 feature_fallback: bool = False):
+        self.capture_source = capture_source
+        self.matcher = matcher or TemplateMatcher()
+        self.click = click
+        self.events = events if events is not None else queue.Queue()
+        self.tick_interval = tick_interval  # 감지 재시도 간격 (초)
+        self.display = display  # 배율 기억용 디스플레이 식별자
+        self.skip_unchanged = skip_unchanged  # 영역이 그대로면 매칭 생략
+        self.change_stats = ChangeStats()
+        # 파이프라인 모드: 클릭 후 wait_time을 다 기다리지 않고, 최소 안정화 시간
+        # (settle_time) 이후부터 다음 액션 대상을 짧은 간격으로 탐색해 보이는 즉시 실행
+        self.pipelined = pipelined
+        self.settle_time = settle_time
+        self.lookahead_interval = lookahead_interval
+        self.verbose = verbose  # 매칭 신뢰도 등 진행 상황 출력 여부
+        # 계측은 메모리에만 기록되므로 항상 켜 둔다
+        self.metrics = metrics if metrics is not None else Instrumentation()
+        # 템플릿 매칭이 실패하면 특징점(ORB) 매칭으로 한 번 더 찾음 (테마/배율 변화 대응)
+        self.feature_fallback = feature_fallback
+        self.features = FeatureStore()
+        self.feature_matcher = FeatureMatcher()
+        # 같은 영역을 검색하는 여러 템플릿은 프레임 변환을 공유해 한 번에 매칭
+        self.batch_matcher = BatchMatcher(self.matcher.threshold)
+        # 지난 실행의 매칭 위치 주변부터 검색 (실행 전에 시나리오별로 지정, None이면 사용 안 함)
+        self.location_memory: Optional[LocationMemory] = None
+        self.location_stats = LocationStats()
+        # 최근 캡처 프레임과 점수를 고정 크기 버퍼에 항상 기록하고, 오류/시간 초과 시에만 파일로 저장
+        self.flight_recorder = FlightRecorder()
+        self.flight_dir: Optional[str] = "flight"  # None이면 파일로 저장하지 않음
+        self.flight_keep = 50  # flight_dir에 남겨 둘 최근 기록 파일 수 (반복 실행은 회차마다 저장할 수 있음)
+        self.slow_action_seconds = 30.0  # 한 액션을 이보다 오래 찾지 못하면 기록 저장
+        self.last_score: Optional[float] = None  # 마지막 매칭 점수 (플라이트 레코더용)
+        self.last_match_scale = 1.0  # 마지막으로 찾은 템플릿 배율 (위치 기억의 검색 창 크기용)
+        self.last_error: Optional[str] = None  # 마지막 실행의 오류 메시지
+        self.token: Optional[CancellationToken] = None
+        self.watch_stats = WatchStats()
+        self._thread: Optional[threading.Thread] = None
+        self._run_ids = itertools.count(1)
+        self._local = threading.local()  # 작업 스레드별 실행 번호
+
+    def emit(self, kind: str, message: str = "", **data):
+        self.events.put(EngineEvent(kind, message, data, getattr(self._local, "run_id", 0)))
+
+    def dump_flight(self, reason: str) -> Optional[str]:
+        """플라이트 레코더의 최근 프레임을 `flight_dir`에 저장. 저장한 경로 반환"""
+        if not self.flight_dir:
+            return None
+        try:
+            path = self.flight_recorder.dump(os.path.join(self.flight_dir, dump_name(reason)), reason)
+        except OSError as e:
+            print(f"플라이트 기록 저장 중 오류 발생: {e}")
+            return None
+        if path is not None:
+            print(f"최근 화면 기록 저장: {path}")
+            self.metrics.event("flight_dump", reason=reason, path=path)
+            prune_dumps(self.flight_dir, self.flight_keep)
+        return path
+
+    # ------------------------------------------------------------------
+    # 실행 제어
+    # ------------------------------------------------------------------
+    def start(self, target: Callable, *args, token: Optional[CancellationToken] = None) -> CancellationToken:
+        """`target(*args, token)`을 작업 스레드에서 실행 (`token`을 주지 않으면 새로 만듦)"""
+        self.cancel()
+        token = token if token is not None else CancellationToken()
+        token.run_id = next(self._run_ids)
+        self.token = token
+        self._thread = threading.Thread(target=self._run, args=(target, args, token), daemon=True)
+        self._thread.start()
+        return token
+
+    def _run(self, target: Callable, args, token: CancellationToken):
+        self._local.run_id = token.run_id
+        try:
+            target(*args, token)
+        except Exception as e:
+            # 실행 함수가 직접 처리하지 못한 예외 (감지 규칙 핸들러 등)도 GUI/서비스가
+            # 실행 종료를 알 수 있도록 오류 이벤트로 보냄
+            print(f"작업 스레드에서 오류 발생: {e}")
+            self.last_error = str(e)
+            self.metrics.event("scenario_error", error=str(e))
+            self.dump_flight("error")
+            self.emit("error", f"실행 중 오류가 발생했습니다: {e}")
+
+    def start_scenario(self, actions) -> CancellationToken:
+        return self.start(self.execute_scenario_actions, actions)
+
+    def start_graph(self, actions, graph) -> CancellationToken:
+        return self.start(self.execute_graph, actions, graph)
+
+    def start_soak(self, actions, graph, soak) -> CancellationToken:
+        """`soak`(SoakRunner) 설정대로 시나리오를 반복 실행"""
+        return self.start(soak.run, self, actions, graph)
+
+    def start_watch(self, rules) -> CancellationToken:
+        return self.start(self.run_watch, rules)
+
+    def cancel(self):
+        if self.token is not None:
+            self.token.cancel()
+
+    def join(self, timeout: Optional[float] = None):
+        """작업 스레드가 끝날 때까지 대기"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ------------------------------------------------------------------
+    # 캡처 / 매칭
+    # ------------------------------------------------------------------
+    def capture_screen(self, search_area) -> Optional[np.ndarray]:
+        if search_area is None:
+            return None
+
+        try:
+            # 지정된 영역의 스크린샷 캡처 (백엔드 채널 순서 그대로, 변환 복사 없음)
+            with self.metrics.span("capture"):
+                return self.capture_source.grab(search_area)
+        except Exception as e:
+            print(f"화면 캡처 중 오류 발생: {e}")
+            return None
+
+    def find_target(self, screen: np.ndarray, template: np.ndarray, search_area,
+                    match_mode: str = "default") -> Optional[Tuple[int, int]]:
+        if template is None or screen is None:
+            return None
+
+        try:
+            # 템플릿을 캡처 프레임과 같은 채널 순서로 맞춘 뒤 매칭 수행
+            with self.metrics.span("match", mode=match_mode):
+                match = self.matcher.match(screen, template, match_mode,
+                                           self.capture_source.layout, self.display)
+            self.metrics.observe_confidence(match.score, mode=match_mode)
+            # exact 모드는 정확 일치로 찾았는지(exact), default 매칭으로 대체했는지(default) 구분
+            self.metrics.increment("match_path_total", mode=match_mode, path=match.mode)
+            self.last_score = match.score
+
+            # 디버깅을 위한 출력 (단계별 소요 시간 포함)
+            if self.verbose:
+                timings = ", ".join(f"{stage} {seconds * 1000:.2f}ms"
+                                    for stage, seconds in match.timings.items())
+                print(f"매칭 신뢰도: {match.score} ({match.mode} x{match.scale:g}: {timings})")
+
+            # 임계값 미만이면 특징점 매칭으로 재시도
+            if not match.found and self.feature_fallback:
+                with self.metrics.span("match", mode="feature"):
+                    match = self.feature_matcher.match(screen, self.features.get(template),
+                                                       self.capture_source.layout)
+                self.metrics.observe_confidence(match.score, mode="feature")
+                self.last_score = match.score
+                if self.verbose:
+                    print(f"특징점 매칭: inlier 비율 {match.score:.2f}, 배율 {match.scale:.2f}")
+
+            # 임계값 이상일 때만 위치 반환
+            if match.found:
+                self.last_match_scale = match.scale
+                return (
+                    match.location[0] + search_area[0],  # 전체 화면 좌표로 변환
+                    match.location[1] + search_area[1]
+                )
+        except Exception as e:
+            print(f"이미지 매칭 중 오류 발생: {e}")
+            print(f"Target shape: {template.shape}")
+            print(f"Screen shape: {screen.shape}")
+        return None
+
+    def find_targets(self, screen: np.ndarray, templates, search_area) -> list:
+        """같은 검색 영역에서 여러 템플릿을 한 번에 찾음 (default 매칭과 같은 기준)
+
+        템플릿 순서대로 전체 화면 좌표 또는 None을 반환한다.
+        """
+        if screen is None:
+            return [None] * len(templates)
+        try:
+            with self.metrics.span("match", mode="batch"):
+                matches = self.batch_matcher.match_many(screen, list(templates), self.capture_source.layout)
+        except Exception as e:
+            print(f"이미지 매칭 중 오류 발생: {e}")
+            return [None] * len(templates)
+
+        self.last_score = max((match.score for match in matches), default=None)
+        locations = []
+        for template, match in zip(templates, matches):
+            self.metrics.observe_confidence(match.score, mode="batch")
+            if not match.found and self.feature_fallback:
+                locations.append(self.find_target(screen, template, search_area))
+            elif match.found:
+                locations.append((match.location[0] + search_area[0], match.location[1] + search_area[1]))
+            else:
+                locations.append(None)
+        if self.verbose:
+            print("매칭 신뢰도 (일괄): " + ", ".join(f"{match.score:.3f}" for match in matches))
+        return locations
+
+    def find_predicted(self, action, template: np.ndarray,
+                       detector: Optional[ChangeDetector] = None) -> Optional[Tuple[int, int]]:
+        """지난 실행에서 찾은 위치 주변의 작은 창만 캡처해 매칭. 창이 없거나 못 찾으면 None
+
+        `detector`를 주면 창 픽셀이 직전과 같을 때 매칭 없이 직전 결과를 쓴다.
+        """
+        if self.location_memory is None:
+            return None
+        window = self.location_memory.window(action.name, template.shape, action.search_area)
+        if window is None:
+            return None
+        screen = self.capture_screen(window)
+        if screen is None:
+            return None
+        if detector is not None:
+            location = self.find_target_if_changed(detector, screen, template, window, action.match_mode)
+        else:
+            location = self.find_target(screen, template, window, action.match_mode)
+
+        # 같은 픽셀 형식으로 전체 영역을 검색했을 때의 바이트 수와 비교
+        x1, y1, x2, y2 = action.search_area
+        full_bytes = screen.nbytes // (screen.shape[0] * screen.shape[1]) * (x2 - x1) * (y2 - y1)
+        self.location_stats.record_window(screen.nbytes, full_bytes, location is not None)
+        return location
+
+    def find_target_if_changed(self, detector: ChangeDetector, screen: np.ndarray,
+                               template: np.ndarray, search_area,
+                               match_mode: str = "default") -> Optional[Tuple[int, int]]:
+        """영역 픽셀이 직전과 같으면 매칭 없이 직전 결과를 그대로 반환"""
+        if screen is None:
+            return None
+        if self.skip_unchanged and not detector.changed(screen):
+            self.change_stats.record(skipped=True)
+            detector.reused = True
+            return detector.last_result
+
+        self.change_stats.record(skipped=False)
+        detector.reused = False
+        detector.last_result = self.find_target(screen, template, search_area, match_mode)
+        return detector.last_result
+
+    def find_targets_if_changed(self, detector: ChangeDetector, screen: np.ndarray,
+                                templates, search_area) -> list:
+        """`find_targets`의 변화 감지 버전. 영역이 그대로면 직전 결과 목록을 반환"""
+        if screen is None:
+            return [None] * len(templates)
+        if self.skip_unchanged and not detector.changed(screen) and detector.last_result is not None:
+            self.change_stats.record(skipped=True)
+            detector.reused = True
+            return detector.last_result
+
+        self.change_stats.record(skipped=False)
+        detector.reused = False
+        detector.last_result = self.find_targets(screen, templates, search_area)
+        return detector.last_result
+
+    def match_rule_groups(self, frame: np.ndarray, frame_area, groups, detectors) -> list:
+        """한 번 캡처한 프레임에서 규칙 묶음별로 매칭. 묶음마다 규칙 순서대로 위치 목록 반환"""
+        results = []
+        for group, detector in zip(groups, detectors):
+            area = group[0].search_area
+            screen = area_view(frame, frame_area, area)
+            if len(group) == 1:
+                results.append([self.find_target_if_changed(detector, screen, group[0].template,
+                                                            area, group[0].match_mode)])
+            else:
+                results.append(self.find_targets_if_changed(detector, screen,
+                                                            [rule.template for rule in group], area))
+        return results
+
+    def prepare_actions(self, actions):
+        """매칭 모드에 필요한 파생 템플릿(배율별 템플릿, 특징점 등)을 미리 생성
+
+        템플릿 옆에 저장된 산출물(흑백 피라미드 등)이 원본과 맞으면 계산 없이 읽어 쓴다.
+        산출물이 없거나 오래되었으면 메모리에서만 계산하고 파일은 쓰지 않는다 (저장은 시나리오 저장/컴파일 시).
+        """
+        for action in actions:
+            template = template_cache.get(action.target_image_path)
+            if template is not None:
+                artifact = artifact_store.load(action.target_image_path, template)
+                if artifact.flat and self.verbose:
+                    print(f"단색 템플릿이라 매칭 신뢰도를 믿을 수 없습니다: {action.name}")
+                self.matcher.warm(template, action.match_mode, self.capture_source.layout, artifact)
+                if self.feature_fallback:
+                    # 저장된 특징점이 있으면 읽고, 없으면 계산해 이미지 옆에 저장
+                    self.features.load(action.target_image_path, template)
+
+    # ------------------------------------------------------------------
+    # 실행 루프 (작업 스레드에서 호출)
+    # ------------------------------------------------------------------
+    def execute_scenario_actions(self, actions, token: CancellationToken, report: bool = True) -> bool:
+        """정렬된 액션들을 순서대로 실행. 모두 완료하면 True 반환
+
+        `report`가 False면 완료/중지/오류 이벤트를 보내지 않는다 (반복 실행에서 회차별로 호출할 때).
+        """
+        self.last_error = None
+        try:
+            started = time.perf_counter()
+            self.location_stats = LocationStats()
+            self.change_stats.reset()  # 통계는 실행(회차)마다 새로 집계
+            # 모든 액션의 템플릿을 미리 준비해 두므로 다음 액션 전환 시 준비 비용이 없음
+            self.prepare_actions(actions)
+            detector = ChangeDetector()
+            window_detector = ChangeDetector()  # 위치 기억 창 전용 (전체 영역과 크기가 달라 따로 비교)
+            lookahead_until = 0.0  # 이 시각까지는 짧은 간격으로 탐색
+
+            for action in actions:
+                template = template_cache.get(action.target_image_path)
+                if template is None:
+                    raise Exception(f"이미지를 불러올 수 없습니다: {action.target_image_path}")
+
+                # 상태 업데이트
+                self.emit("status", f"액션 실행 중: {action.name}", action=action.name)
+                self.metrics.event("action_started", action=action.name)
+                action_started = time.perf_counter()
+                retries = 0
+                slow_dumped = False
+
+                # 이미지 감지 (찾지 못하면 tick_interval 후 재시도)
+                detector.reset()
+                window_detector.reset()
+                try_predicted = True
+                while True:
+                    if token.cancelled:
+                        if report:
+                            self.emit("stopped", "시나리오 실행 중지됨")
+                        return False
+
+                    # 지난 위치 주변은 액션마다 처음 한 번, 그리고 파이프라인 탐색 중(직전 액션의 원래
+                    # 대기 시간)에는 매 틱 봄. 창도 변화 감지를 거치므로 그대로면 다시 매칭하지 않음.
+                    # 그 뒤로는 전체 검색 영역만 검색
+                    if try_predicted or time.perf_counter() < lookahead_until:
+                        try_predicted = False
+                        location = self.find_predicted(action, template, window_detector)
+                        if location is not None:
+                            predicted_hit = True
+                            break
+
+                    screen = self.capture_screen(action.search_area)
+                    if screen is None:
+                        raise Exception("화면을 캡처할 수 없습니다.")
+
+                    location = self.find_target_if_changed(detector, screen, template,
+                                                           action.search_area, action.match_mode)
+                    self.location_stats.record_full(screen.nbytes)
+                    self.flight_recorder.record(screen, action.name, self.last_score, location is not None,
+                                                action.search_area, self.capture_source.layout)
+                    if location is not None:
+                        predicted_hit = False
+                        break
+
+                    if self.verbose:
+                        print(f"이미지를 찾을 수 없습니다: {action.name}")
+                    if not slow_dumped and time.perf_counter() - action_started > self.slow_action_seconds:
+                        self.dump_flight(f"slow_{action.name}")
+                        slow_dumped = True
+                    retries += 1
+                    self.metrics.increment("retries_total", action=action.name)
+                    if time.perf_counter() < lookahead_until:
+                        token.wait(self.lookahead_interval)
+                    else:
+                        token.wait(self.tick_interval)
+
+                if self.location_memory is not None:
+                    self.location_memory.remember(action.name, location, predicted_hit, self.last_match_scale)
+                time_to_find = time.perf_counter() - action_started
+                self.metrics.observe("time_to_find_seconds", time_to_find, action=action.name)
+                self.metrics.event("action_found", action=action.name, retries=retries,
+                                   time_to_find=time_to_find, location=list(location))
+
+                # 클릭 위치로 이동 및 클릭 (클릭 위치가 없는 액션은 대상이 보일 때까지 기다리기만 함)
+                if action.click_position is not None:
+                    with self.metrics.span("click"):
+                        self.click(*action.click_position)
+                    self.metrics.event("action_clicked", action=action.name,
+                                       click_position=list(action.click_position))
+                self.metrics.observe("action_seconds", time.perf_counter() - action_started,
+                                     action=action.name)
+                if self.verbose:
+                    print(f"액션 실행 완료: {action.name}")
+                self.emit("action_done", f"액션 실행 완료: {action.name}", action=action.name)
+
+                # 대기 시간 후 다음 액션 실행
+                wait_time = action.wait_time
+                if self.pipelined:
+                    # 원래 대기 시간 동안은 다음 액션 대상을 짧은 간격으로 탐색
+                    lookahead_until = time.perf_counter() + wait_time
+                    wait_time = min(wait_time, self.settle_time)
+                with self.metrics.span("wait", action=action.name):
+                    cancelled = token.wait(wait_time)
+                if cancelled:
+                    if report:
+                        self.emit("stopped", "시나리오 실행 중지됨")
+                    return False
+
+            self.metrics.event("scenario_finished", seconds=time.perf_counter() - started)
+            if self.verbose:
+                print(f"매칭 통계: {self.change_stats.report()}")
+                if self.location_memory is not None:
+                    print(f"위치 예측 통계: {self.location_stats.report()}")
+                print(f"시나리오 소요 시간: {time.perf_counter() - started:.2f}초")
+            if report:
+                self.emit("finished", "시나리오 실행이 완료되었습니다.")
+            return True
+
+        except Exception as e:
+            print(f"액션 실행 중 오류 발생: {e}")
+            self.last_error = str(e)
+            self.metrics.event("scenario_error", error=str(e))
+            self.dump_flight("error")
+            if report:
+                self.emit("error", f"액션 실행 중 오류가 발생했습니다: {e}")
+            return False
+        finally:
+            # 중지/오류로 끝나도 그때까지 찾은 위치는 저장
+            if self.location_memory is not None:
+                self.location_memory.save()
+
+    def execute_graph(self, actions, graph, token: CancellationToken, report: bool = True) -> bool:
+        """그래프 시나리오 실행. 종료 단계까지 도달하면 True 반환
+
+        단계마다 후보 대상들의 검색 영역을 한 번만 캡처해 모든 후보를 매칭하고,
+        먼저 보이는 후보(같은 틱이면 앞에 적힌 후보)를 클릭한 뒤 그 분기로 이동한다.
+        제한 시간 안에 아무것도 보이지 않으면 `on_timeout` 단계로 이동한다.
+        """
+        self.last_error = None
+        try:
+            started = time.perf_counter()
+            self.change_stats.reset()
+            by_name = {action.name: action for action in actions}
+            self.prepare_actions(actions)
+            step_name = graph.start
+
+            while step_name is not None:
+                step = graph.steps[step_name]
+                candidates = [by_name[branch.action] for branch in step.branches]
+                rules = rules_from_actions(candidates)
+                frame_area = union_area([rule.search_area for rule in rules])
+                groups = group_rules(rules)
+                detectors = [ChangeDetector() for _ in groups]
+
+                self.emit("status", f"단계 실행 중: {step.name}", step=step.name)
+                self.metrics.event("step_started", step=step.name)
+                step_started = time.perf_counter()
+                retries = 0
+                found = None
+                self.last_score = None
+
+                while found is None:
+                    if token.cancelled:
+                        if report:
+                            self.emit("stopped", "시나리오 실행 중지됨")
+                        return False
+                    remaining = (step.timeout - (time.perf_counter() - step_started)
+                                 if step.timeout is not None else None)
+                    if remaining is not None and remaining <= 0:
+                        break
+
+                    frame = self.capture_screen(frame_area)
+                    if frame is None:
+                        raise Exception("화면을 캡처할 수 없습니다.")
+                    locations = {}
+                    for group, group_locations in zip(groups, self.match_rule_groups(frame, frame_area,
+                                                                                     groups, detectors)):
+                        for rule, location in zip(group, group_locations):
+                            locations[id(rule)] = location
+                    found_any = any(location is not None for location in locations.values())
+                    self.flight_recorder.record(frame, step.name, self.last_score, found_any,
+                                                frame_area, self.capture_source.layout)
+                    for index, rule in enumerate(rules):
+                        if locations[id(rule)] is not None:
+                            found = index
+                            break
+                    else:
+                        retries += 1
+                        self.metrics.increment("retries_total", step=step.name)
+                        token.wait(self.tick_interval if remaining is None else min(self.tick_interval, remaining))
+
+                if found is None:
+                    self.metrics.event("step_timeout", step=step.name, next=step.on_timeout)
+                    if step.on_timeout is None:
+                        raise Exception(f"제한 시간 안에 대상을 찾지 못했습니다: {step.name}")
+                    self.dump_flight(f"timeout_{step.name}")
+                    if self.verbose:
+                        print(f"단계 시간 초과: {step.name} -> {step.on_timeout}")
+                    step_name = step.on_timeout
+                    continue
+
+                action, branch = candidates[found], step.branches[found]
+                location = locations[id(rules[found])]
+                time_to_find = time.perf_counter() - step_started
+                self.metrics.observe("time_to_find_seconds", time_to_find, action=action.name)
+                self.metrics.event("action_found", action=action.name, step=step.name, retries=retries,
+                                   time_to_find=time_to_find, location=list(location))
+
+                # 클릭 위치가 없는 후보는 분기 조건으로만 사용
+                if action.click_position is not None:
+                    with self.metrics.span("click"):
+                        self.click(*action.click_position)
+                    self.metrics.event("action_clicked", action=action.name,
+                                       click_position=list(action.click_position))
+                self.metrics.observe("action_seconds", time.perf_counter() - step_started, action=action.name)
+                if self.verbose:
+                    print(f"액션 실행 완료: {step.name} / {action.name} -> {branch.next or '종료'}")
+                self.emit("action_done", f"액션 실행 완료: {action.name}", action=action.name, step=step.name)
+
+                with self.metrics.span("wait", action=action.name):
+                    cancelled = token.wait(action.wait_time)
+                if cancelled:
+                    if report:
+                        self.emit("stopped", "시나리오 실행 중지됨")
+                    return False
+                step_name = branch.next
+
+            self.metrics.event("scenario_finished", seconds=time.perf_counter() - started)
+            if self.verbose:
+                print(f"매칭 통계: {self.change_stats.report()}")
+                print(f"시나리오 소요 시간: {time.perf_counter() - started:.2f}초")
+            if report:
+                self.emit("finished", "시나리오 실행이 완료되었습니다.")
+            return True
+
+        except Exception as e:
+            print(f"액션 실행 중 오류 발생: {e}")
+            self.last_error = str(e)
+            self.metrics.event("scenario_error", error=str(e))
+            self.dump_flight("error")
+            if report:
+                self.emit("error", f"액션 실행 중 오류가 발생했습니다: {e}")
+            return False
+
+    def run_watch(self, rules, token: CancellationToken):
+        """규칙의 대상 이미지가 보일 때마다 클릭/핸들러 실행 (감지 모드)
+
+        매 틱마다 모든 규칙 영역을 포함하는 영역을 한 번만 캡처하고,
+        각 규칙은 그 프레임의 뷰(복사 없음)에 대해 매칭한다. 영역이 직전 틱과 같아 매칭을 건너뛴
+        경우에는 `repeat` 규칙만 다시 실행한다.
+        핸들러/매칭/캡처에서 난 예외는 `_run`이 오류 이벤트로 보낸다.
+        """
+        self.last_error = None
+        frame_area = union_area([rule.search_area for rule in rules])
+        self.watch_stats = stats = WatchStats()
+        self.change_stats.reset()
+        groups = group_rules(rules)
+        detectors = [ChangeDetector() for _ in groups]
+
+        while not token.cancelled:
+            start = time.perf_counter()
+            frame = self.capture_screen(frame_area)
+            captured = time.perf_counter()
+
+            if frame is not None:
+                matches = self.match_rule_groups(frame, frame_area, groups, detectors)
+                for group, detector, locations in zip(groups, detectors, matches):
+                    for rule, location in zip(group, locations):
+                        if location is None:
+                            continue
+                        if detector.reused and not rule.repeat:
+                            continue  # 화면이 그대로인 동안 같은 대상을 다시 클릭하지 않음
+
+                        stats.record_hit(rule.name)
+                        if rule.handler is not None:
+                            rule.handler(rule, location)
+                        elif rule.click_position is not None:
+                            with self.metrics.span("click"):
+                                self.click(*rule.click_position)
+                        self.metrics.event("watch_hit", rule=rule.name, location=list(location))
+                        self.emit("click", f"{rule.name} 클릭 수행: {location}",
+                                  rule=rule.name, location=location)
+
+            stats.record_tick(captured - start, time.perf_counter() - captured)
+            token.wait(self.tick_interval)
+
+        print(f"감지 통계: {stats.report()}, {self.change_stats.report()}")
+        self.emit("stopped", "감지 중지됨")
@@ -0,0 +1,453 @@
+"""팜 모드: 가상 X 디스플레이(Xvfb)마다 작업 프로세스 하나씩 두고 시나리오를 병렬 실행
+
+pyautogui와 화면 캡처는 프로세스 전체(디스플레이 하나)에 묶여 있으므로, 코어 수만큼
+프로세스를 띄우고 각 프로세스의 DISPLAY를 서로 다른 Xvfb 화면으로 지정해 격리한다.
+각 작업 프로세스는 자기 디스플레이의 캡처 소스와 입력 백엔드를 따로 가진다.
+
+    with ScenarioFarm(workers=4) as farm:
+        report = farm.run(["Scenario_A", "Scenario_B"] * 10)
+    print(report.summary())
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import select
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+XVFB_SOCKET_DIR = "/tmp/.X11-unix"
+
+
+@dataclass
+class FarmJob:
+    job_id: int
+    scenario: str
+    attempts: int = 0
+
+
+@dataclass
+class JobResult:
+    job_id: int
+    scenario: str
+    worker: int
+    display: Optional[str]
+    ok: bool
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class FarmReport:
+    results: List[JobResult] = field(default_factory=list)
+    seconds: float = 0.0
+    restarts: int = 0
+
+    def summary(self) -> dict:
+        per_worker: Dict[int, dict] = {}
+        for result in self.results:
+            stats = per_worker.setdefault(result.worker, {"jobs": 0, "ok": 0, "busy_seconds": 0.0})
+            stats["jobs"] += 1
+            stats["ok"] += result.ok
+            stats["busy_seconds"] += result.seconds
+        succeeded = sum(result.ok for result in self.results)
+        return {
+            "jobs": len(self.results),
+            "succeeded": succeeded,
+            "failed": len(self.results) - succeeded,
+            "seconds": self.seconds,
+            "jobs_per_sec": len(self.results) / self.seconds if self.seconds else 0.0,
+            "restarts": self.restarts,
+            "workers": per_worker,
+        }
+
+
+class XvfbDisplay:
+    """Xvfb 가상 디스플레이 프로세스"""
+
+    def __init__(self, number: int, size: Tuple[int, int] = (1920, 1080), depth: int = 24):
+        self.number = number
+        self.name = f":{number}"
+        self.size = size
+        self.depth = depth
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 10.0, attempts: int = 8):
+        """`number`부터 비어 있는 디스플레이 번호를 골라 Xvfb 시작
+
+        잠금 파일(`/tmp/.X<n>-lock`)이나 소켓이 있는 번호는 다른 X 서버가 쓰는 것으로 보고 건너뛴다.
+        서버가 `-displayfd`로 접속 준비 완료를 알리고 그 뒤에도 살아 있어야 성공으로 본다.
+        (확인과 시작 사이에 다른 서버가 번호를 차지하면 다음 번호로 다시 시도)
+        """
+        executable = shutil.which("Xvfb")
+        if executable is None:
+            raise RuntimeError("Xvfb를 찾을 수 없습니다. 팜 모드에는 Xvfb가 필요합니다")
+        number = self.number
+        for _ in range(attempts):
+            number = self._free_number(number)
+            if self._launch(executable, number, timeout):
+                self.number, self.name = number, f":{number}"
+                return
+            number += 1
+        raise RuntimeError(f"Xvfb {self.name} 시작 실패 ({attempts}회 시도)")
+
+    @staticmethod
+    def _free_number(number: int) -> int:
+        while (os.path.exists(f"/tmp/.X{number}-lock")
+               or os.path.exists(os.path.join(XVFB_SOCKET_DIR, f"X{number}"))):
+            number += 1
+        return number
+
+    def _launch(self, executable: str, number: int, timeout: float) -> bool:
+        width, height = self.size
+        read_fd, write_fd = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [executable, f":{number}", "-displayfd", str(write_fd),
+                 "-screen", "0", f"{width}x{height}x{self.depth}", "-nolisten", "tcp"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, pass_fds=(write_fd,))
+        finally:
+            os.close(write_fd)
+
+        # 준비가 되면 서버가 디스플레이 번호와 줄바꿈을 씀. 먼저 종료되면 파이프가 닫힘(EOF)
+        data = b""
+        deadline = time.monotonic() + timeout
+        try:
+            while not data.endswith(b"\n"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+                    break
+                chunk = os.read(read_fd, 64)
+                if not chunk:
+                    break
+                data += chunk
+        finally:
+            os.close(read_fd)
+
+        if data.strip() == str(number).encode() and self.process.poll() is None:
+            return True
+        self.stop()
+        return False
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+def _worker_main(worker_id: int, display: Optional[str], scenarios_dir: str, capture: Optional[str],
+                 replay: Optional[str], dry_run: bool, job_timeout: Optional[float],
+                 inbox, outbox, heartbeat_interval: float):
+    """작업 프로세스 본체. 디스플레이를 지정한 뒤에 캡처/입력 모듈을 불러온다"""
+    if display is not None:
+        os.environ["DISPLAY"] = display
+
+    from capture import ReplayCaptureSource, create_capture_source
+    from engine import CancellationToken, ScenarioEngine
+    from input_sink import RecordingInputSink, create_input_sink
+    from scenario import ScenarioManager
+
+    def heartbeat():
+        while True:
+            outbox.put(("heartbeat", worker_id, time.time()))
+            time.sleep(heartbeat_interval)
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    try:
+        capture_source = ReplayCaptureSource(replay) if capture == "replay" else create_capture_source(capture)
+        # 입력도 이 작업 프로세스의 디스플레이로 보냄
+        input_sink = RecordingInputSink() if dry_run else create_input_sink()
+    except Exception as e:
+        outbox.put(("failed", worker_id, str(e)))
+        return
+    engine = ScenarioEngine(capture_source, click=input_sink, verbose=False)
+    manager = ScenarioManager(scenarios_dir)
+    outbox.put(("ready", worker_id, None))
+
+    while True:
+        job = inbox.get()
+        if job is None:
+            break
+        outbox.put(("started", worker_id, job.job_id))
+        start = time.perf_counter()
+        error = None
+        ok = False
+        try:
+            actions = manager.load_scenario(job.scenario)
+            if not actions:
+                raise Exception(f"시나리오를 불러올 수 없습니다: {job.scenario}")
+            engine.prepare_actions(actions)
+            if capture == "replay":
+                capture_source.seek(0)
+            token = CancellationToken()
+            timer = threading.Timer(job_timeout, token.cancel) if job_timeout else None
+            if timer:
+                timer.start()
+            try:
+                # 결과는 반환값과 last_error로 받으므로 완료/중지/오류 이벤트는 보내지 않음
+                graph = manager.load_graph(job.scenario)
+                if graph is not None:
+                    ok = engine.execute_graph(actions, graph, token, report=False)
+                else:
+                    ok = engine.execute_scenario_actions(sorted(actions, key=lambda x: x.order), token,
+                                                         report=False)
+            finally:
+                if timer:
+                    timer.cancel()
+            if not ok:
+                error = "시간 초과" if token.cancelled else (engine.last_error or "실행 실패")
+                if token.cancelled:
+                    engine.dump_flight(f"timeout_{job.scenario}")
+        except Exception as e:
+            error = str(e)
+        finally:
+            # 진행 상황 이벤트(status, action_done)는 읽는 쪽이 없으므로 작업마다 비움
+            _drain(engine.events)
+        result = JobResult(job.job_id, job.scenario, worker_id, display, ok,
+                           time.perf_counter() - start, error)
+        outbox.put(("done", worker_id, asdict(result)))
+
+    capture_source.close()
+    input_sink.close()
+
+
+def _drain(events: "queue.Queue"):
+    try:
+        while True:
+            events.get_nowait()
+    except queue.Empty:
+        pass
+
+
+class _Worker:
+    def __init__(self, worker_id: int, display: Optional[XvfbDisplay]):
+        self.worker_id = worker_id
+        self.display = display
+        self.process = None
+        self.inbox = None
+        self.job: Optional[FarmJob] = None  # 처리 중인 작업
+        self.ready = False
+        self.startup_failures = 0  # 준비되기 전에 연속으로 죽은 횟수
+        self.last_heartbeat = time.time()
+        self.last_error: Optional[str] = None  # 작업 프로세스가 보고한 초기화 오류
+        self.disabled: Optional[str] = None  # 계속 시작되지 않아 더 쓰지 않는 이유
+
+
+class ScenarioFarm:
+    """작업 프로세스 풀
+
+    - 작업은 준비된(비어 있는) 작업 프로세스에 하나씩 배정한다.
+    - 작업 프로세스나 Xvfb가 죽거나 하트비트가 끊기면 다시 띄우고 처리 중이던 작업을 재배정한다.
+    - 계속 시작되지 않는 작업 프로세스는 빼고 나머지로 계속 실행한다. 모두 빠지면 남은 작업은
+      실패로 기록한다 (예외로 팜 전체를 중단하지 않음).
+    - `use_xvfb=False`면 디스플레이를 띄우지 않는다 (replay 캡처 + dry-run 점검용).
+    """
+
+    def __init__(self, workers: Optional[int] = None, scenarios_dir: str = "scenarios",
+                 screen_size: Tuple[int, int] = (1920, 1080), base_display: int = 100,
+                 capture: Optional[str] = "xshm", replay: Optional[str] = None,
+                 dry_run: bool = False, use_xvfb: bool = True, job_timeout: Optional[float] = None,
+                 max_attempts: int = 2, max_startup_failures: int = 3,
+                 heartbeat_interval: float = 1.0, health_timeout: float = 10.0):
+        self.worker_count = workers or os.cpu_count() or 1
+        self.scenarios_dir = scenarios_dir
+        self.screen_size = screen_size
+        self.base_display = base_display
+        self.capture = capture
+        self.replay = replay
+        self.dry_run = dry_run
+        self.use_xvfb = use_xvfb
+        self.job_timeout = job_timeout
+        self.max_attempts = max_attempts
+        self.max_startup_failures = max_startup_failures
+        self.heartbeat_interval = heartbeat_interval
+        self.health_timeout = health_timeout
+        self.restarts = 0
+
+        # fork는 부모의 X 연결/스레드를 복제하므로 항상 spawn 사용
+        self._context = mp.get_context("spawn")
+        self._outbox = None
+        self._workers: List[_Worker] = []
+
+    # ------------------------------------------------------------------
+    # 수명 주기
+    # ------------------------------------------------------------------
+    def start(self):
+        self._outbox = self._context.Queue()
+        for worker_id in range(self.worker_count):
+            display = XvfbDisplay(self.base_display + worker_id, self.screen_size) if self.use_xvfb else None
+            worker = _Worker(worker_id, display)
+            self._workers.append(worker)
+            self._spawn(worker)
+
+    def _spawn(self, worker: _Worker):
+        if worker.display is not None and not worker.display.alive():
+            worker.display.start()
+        worker.inbox = self._context.Queue()
+        worker.ready = False
+        worker.last_heartbeat = time.time()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.worker_id, worker.display.name if worker.display else None, self.scenarios_dir,
+                  self.capture, self.replay, self.dry_run, self.job_timeout,
+                  worker.inbox, self._outbox, self.heartbeat_interval),
+            daemon=True)
+        worker.process.start()
+
+    def _restart(self, worker: _Worker, reason: str):
+        if worker.process is not None and worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(timeout=5)
+        # 시작하자마자 계속 죽으면 재시작해도 소용없으므로 이 작업 프로세스는 뺌
+        if not worker.ready:
+            worker.startup_failures += 1
+            if worker.startup_failures >= self.max_startup_failures:
+                worker.disabled = reason
+                print(f"작업 프로세스 {worker.worker_id}가 시작되지 않아 제외합니다: {reason}")
+                if worker.display is not None:
+                    worker.display.stop()
+                return
+        else:
+            worker.startup_failures = 0
+        print(f"작업 프로세스 {worker.worker_id} 재시작: {reason}")
+        if worker.display is not None and not worker.display.alive():
+            worker.display.stop()
+        self.restarts += 1
+        try:
+            self._spawn(worker)
+        except Exception as e:
+            # Xvfb를 다시 띄우지 못함 (디스플레이 번호 부족 등)
+            worker.disabled = f"재시작 실패: {e}"
+            print(f"작업 프로세스 {worker.worker_id}를 다시 시작할 수 없어 제외합니다: {e}")
+
+    def close(self):
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.inbox.put(None)
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+            if worker.display is not None:
+                worker.display.stop()
+        self._workers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 실행
+    # ------------------------------------------------------------------
+    def health(self) -> List[dict]:
+        """작업 프로세스별 상태"""
+        now = time.time()
+        return [{
+            "worker": worker.worker_id,
+            "display": worker.display.name if worker.display else None,
+            "process_alive": worker.process is not None and worker.process.is_alive(),
+            "display_alive": worker.display.alive() if worker.display else None,
+            "heartbeat_age": now - worker.last_heartbeat,
+            "job": worker.job.scenario if worker.job else None,
+            "disabled": worker.disabled,
+        } for worker in self._workers]
+
+    def run(self, scenarios: Sequence[str]) -> FarmReport:
+        """시나리오 목록을 작업 프로세스들에 나눠 실행하고 결과를 모아 반환"""
+        if not self._workers:
+            raise RuntimeError("팜이 시작되지 않았습니다")
+        pending = [FarmJob(job_id, name) for job_id, name in enumerate(scenarios)]
+        pending.reverse()  # pop()으로 앞에서부터 꺼냄
+        report = FarmReport()
+        restarts_before = self.restarts
+        started = time.perf_counter()
+        remaining = len(pending)
+
+        while remaining:
+            if all(worker.disabled for worker in self._workers):
+                # 실행할 작업 프로세스가 없으면 남은 작업을 실패로 기록하고 끝냄
+                reason = f"사용 가능한 작업 프로세스가 없습니다: {self._workers[-1].disabled}"
+                for job in reversed(pending):
+                    report.results.append(JobResult(job.job_id, job.scenario, -1, None, False, 0.0, reason))
+                remaining -= len(pending)
+                pending.clear()
+                break
+
+            for worker in self._workers:
+                if worker.ready and worker.job is None and pending and not worker.disabled:
+                    worker.job = pending.pop()
+                    worker.job.attempts += 1
+                    worker.inbox.put(worker.job)
+
+            try:
+                kind, worker_id, payload = self._outbox.get(timeout=self.heartbeat_interval)
+            except queue.Empty:
+                kind = None
+            else:
+                worker = self._workers[worker_id]
+                worker.last_heartbeat = time.time()
+                if kind == "ready":
+                    worker.ready = True
+                    worker.last_error = None
+                elif kind == "done":
+                    result = JobResult(**payload)
+                    if worker.job is not None and worker.job.job_id == result.job_id:
+                        worker.job = None
+                        report.results.append(result)
+                        remaining -= 1
+                elif kind == "failed":
+                    # 작업 프로세스는 곧 종료되고, 상태 점검에서 재시작(또는 제외)됨
+                    print(f"작업 프로세스 {worker_id} 초기화 실패: {payload}")
+                    worker.last_error = f"초기화 실패: {payload}"
+
+            remaining -= self._check_health(pending, report)
+
+        report.seconds = time.perf_counter() - started
+        report.restarts = self.restarts - restarts_before
+        report.results.sort(key=lambda result: result.job_id)
+        return report
+
+    def _check_health(self, pending: List[FarmJob], report: FarmReport) -> int:
+        """죽었거나 응답 없는 작업 프로세스를 재시작. 포기한 작업 수를 반환"""
+        abandoned = 0
+        now = time.time()
+        for worker in self._workers:
+            if worker.disabled:
+                continue
+            if not worker.process.is_alive():
+                reason = worker.last_error or "프로세스 종료"
+            elif worker.display is not None and not worker.display.alive():
+                reason = f"디스플레이 {worker.display.name} 종료"
+            elif now - worker.last_heartbeat > self.health_timeout:
+                reason = "응답 없음"
+            else:
+                continue
+
+            job, worker.job = worker.job, None
+            if job is not None:
+                if job.attempts < self.max_attempts:
+                    pending.append(job)
+                else:
+                    report.results.append(JobResult(job.job_id, job.scenario, worker.worker_id,
+                                                    worker.display.name if worker.display else None,
+                                                    False, 0.0, reason))
+                    abandoned += 1
+            worker.last_error = None
+            self._restart(worker, reason)
+        return abandoned
@@ -0,0 +1,202 @@
+"""특징점(ORB) 매칭: 템플릿 매칭이 실패했을 때의 보조 단계
+
+테마 변경, 안티앨리어싱 차이, 확대/축소로 TM_CCOEFF_NORMED 점수가 임계값 아래로
+떨어져도, 특징점 대응과 호모그래피 검증으로 대상을 찾는다.
+
+템플릿의 특징점/기술자는 한 번만 계산해 이미지 옆에 `<이미지>.orb.npz`로 저장하고,
+매 틱에는 캡처한 화면의 기술자 계산과 미리 학습해 둔 매처 조회만 수행한다.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from matching import MatchResult, to_gray
+
+FEATURE_SUFFIX = ".orb.npz"
+FEATURE_VERSION = 1
+# 버튼처럼 작은 템플릿에서도 특징점이 나오도록 기본값(31)보다 작은 패치 사용
+ORB_PARAMS = dict(nfeatures=1000, scaleFactor=1.2, nlevels=6, edgeThreshold=15, patchSize=15, fastThreshold=10)
+
+
+class TemplateFeatures:
+    """템플릿 한 장의 특징점 좌표, 기술자, 학습된 매처"""
+
+    def __init__(self, points: np.ndarray, descriptors: Optional[np.ndarray], shape: Tuple[int, int]):
+        self.points = points  # (N, 2) float32, 템플릿 좌표
+        self.descriptors = descriptors  # (N, 32) uint8
+        self.shape = shape  # 템플릿 (높이, 너비)
+        self._matcher = None
+
+    @property
+    def usable(self) -> bool:
+        return self.descriptors is not None and len(self.descriptors) >= 4
+
+    @property
+    def matcher(self) -> cv2.DescriptorMatcher:
+        """템플릿 기술자를 미리 학습해 둔 매처 (틱마다 다시 만들지 않음)"""
+        if self._matcher is None:
+            matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+            matcher.add([self.descriptors])
+            matcher.train()
+            self._matcher = matcher
+        return self._matcher
+
+
+def compute_features(template: np.ndarray, layout: str = "BGR") -> TemplateFeatures:
+    orb = cv2.ORB_create(**ORB_PARAMS)
+    keypoints, descriptors = orb.detectAndCompute(to_gray(template, layout), None)
+    points = np.array([kp.pt for kp in keypoints], dtype=np.float32).reshape(-1, 2)
+    return TemplateFeatures(points, descriptors, template.shape[:2])
+
+
+def feature_path(image_path: str) -> str:
+    return image_path + FEATURE_SUFFIX
+
+
+class FeatureStore:
+    """템플릿별 특징점 저장소
+
+    `load(path, template)`은 이미지 옆의 저장 파일이 원본과 맞으면 읽고, 아니면
+    계산해 저장한다. 번들 템플릿처럼 실제 파일이 없는 경로는 메모리에만 보관한다.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        # id(템플릿) -> (템플릿, 특징). 같은 배열 객체인지 확인해 id 재사용에 대비
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, TemplateFeatures]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path: str, template: np.ndarray) -> TemplateFeatures:
+        features = self._lookup(template)
+        if features is not None:
+            return features
+
+        features = None
+        try:
+            stat = os.stat(path)
+            source_key = np.array([stat.st_mtime_ns, stat.st_size, FEATURE_VERSION], dtype=np.int64)
+        except OSError:
+            source_key = None
+
+        cache_path = feature_path(path)
+        if source_key is not None and os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as data:
+                    if np.array_equal(data["source_key"], source_key):
+                        descriptors = data["descriptors"]
+                        features = TemplateFeatures(data["points"], descriptors if descriptors.size else None,
+                                                    tuple(data["shape"]))
+            except (OSError, KeyError, ValueError) as e:
+                print(f"특징점 파일을 읽을 수 없습니다 ({cache_path}): {e}")
+
+        if features is None:
+            features = compute_features(template)
+            if source_key is not None:
+                self._save(cache_path, features, source_key)
+
+        self._remember(template, features)
+        return features
+
+    def get(self, template: np.ndarray) -> TemplateFeatures:
+        """경로 없이 템플릿 배열로 조회 (없으면 계산만 하고 저장하지 않음)"""
+        features = self._lookup(template)
+        if features is None:
+            features = compute_features(template)
+            self._remember(template, features)
+        return features
+
+    def _lookup(self, template: np.ndarray) -> Optional[TemplateFeatures]:
+        with self._lock:
+            entry = self._entries.get(id(template))
+            if entry is not None and entry[0] is template:
+                self._entries.move_to_end(id(template))
+                return entry[1]
+        return None
+
+    def _remember(self, template: np.ndarray, features: TemplateFeatures):
+        with self._lock:
+            self._entries[id(template)] = (template, features)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _save(cache_path: str, features: TemplateFeatures, source_key: np.ndarray):
+        descriptors = features.descriptors if features.descriptors is not None else np.zeros((0, 32), np.uint8)
+        try:
+            # np.savez는 확장자가 .npz가 아니면 덧붙이므로 파일 객체로 저장
+            with open(cache_path, "wb") as f:
+                np.savez(f, points=features.points, descriptors=descriptors,
+                         shape=np.array(features.shape), source_key=source_key)
+        except OSError as e:
+            print(f"특징점 파일을 저장할 수 없습니다 ({cache_path}): {e}")
+
+
+class FeatureMatcher:
+    """ORB 특징점 대응 + RANSAC 호모그래피로 템플릿 위치 추정
+
+    `score`는 호모그래피를 만족하는 대응점(inlier) 비율이며, inlier 수와 추정된
+    배율이 기준을 만족할 때만 위치를 반환한다.
+    """
+
+    def __init__(self, ratio: float = 0.75, min_inliers: int = 8, min_inlier_ratio: float = 0.5,
+                 scale_range: Tuple[float, float] = (0.4, 2.5)):
+        self.ratio = ratio  # Lowe 비율 테스트
+        self.min_inliers = min_inliers
+        self.min_inlier_ratio = min_inlier_ratio
+        self.scale_range = scale_range
+        self._orb = cv2.ORB_create(**ORB_PARAMS)
+        self._lock = threading.Lock()  # ORB 객체는 스레드 간 공유하지 않음
+
+    def match(self, screen: np.ndarray, features: TemplateFeatures, layout: str = "BGR") -> MatchResult:
+        timings: Dict[str, float] = {}
+        failed = MatchResult(None, 0.0, "feature", timings, self.min_inlier_ratio)
+        if not features.usable:
+            return failed
+
+        start = time.perf_counter()
+        with self._lock:
+            keypoints, descriptors = self._orb.detectAndCompute(to_gray(screen, layout), None)
+        now = time.perf_counter()
+        timings["describe"] = now - start
+        if descriptors is None or len(descriptors) < 2:
+            return failed
+
+        start = now
+        good = []
+        for pair in features.matcher.knnMatch(descriptors, k=2):
+            if len(pair) == 2 and pair[0].distance < self.ratio * pair[1].distance:
+                good.append(pair[0])
+        now = time.perf_counter()
+        timings["query"] = now - start
+        if len(good) < self.min_inliers:
+            return failed
+
+        start = now
+        src = features.points[[m.trainIdx for m in good]].reshape(-1, 1, 2)
+        dst = np.float32([keypoints[m.queryIdx].pt for m in good]).reshape(-1, 1, 2)
+        homography, mask = cv2.findHomography(src, dst, cv2.RANSAC, 5.0)
+        timings["verify"] = time.perf_counter() - start
+        if homography is None:
+            return failed
+
+        inliers = int(mask.sum())
+        score = inliers / len(good)
+        th, tw = features.shape
+        corners = np.float32([[0, 0], [tw, 0], [tw, th], [0, th]]).reshape(-1, 1, 2)
+        projected = cv2.perspectiveTransform(corners, homography).reshape(-1, 2)
+        scale = float(np.sqrt(abs(cv2.contourArea(projected)) / (tw * th)))
+
+        # 뒤집히거나 찌그러진 사각형, 말이 안 되는 배율은 오검출로 간주
+        if (inliers < self.min_inliers or not cv2.isContourConvex(projected.reshape(-1, 1, 2))
+                or not self.scale_range[0] <= scale <= self.scale_range[1]):
+            return MatchResult(None, score, "feature", timings, self.min_inlier_ratio, scale)
+
+        x, y = projected.min(axis=0)
+        return MatchResult((max(0, int(round(x))), max(0, int(round(y)))), score, "feature",
+                           timings, self.min_inlier_ratio, scale)
@@ -0,0 +1,213 @@
+"""최근 캡처 프레임과 매칭 점수를 보관하는 고정 크기 링 버퍼 (플라이트 레코더)
+
+항상 켜 두는 용도라 실행 루프에서는 메모리 할당이나 디스크 I/O를 하지 않는다.
+프레임 슬롯과 메타데이터 배열은 생성 시 한 번만 할당하고, 매 틱에는 미리 잡아 둔
+슬롯에 픽셀을 복사만 한다. 슬롯보다 큰 프레임은 가로/세로를 같은 간격으로 솎아 저장한다.
+
+시간 초과·오류·명시적 요청이 있을 때만 `dump()`로 파일에 쓰며, 파일은 메모리 매핑으로
+바로 읽을 수 있는 형식이다:
+    [매직 8바이트][버전 u32][헤더 길이 u32][JSON 헤더][64바이트 정렬된 프레임 픽셀...]
+
+    python -m cli flight flight/<기록 파일>.acfr                 # 기록 목록
+    python -m cli flight flight/<기록 파일>.acfr --export out/   # PNG로 내보내기
+"""
+
+import itertools
+import json
+import math
+import os
+import struct
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+FLIGHT_EXT = ".acfr"
+MAGIC = b"ACLKFLT\0"
+VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sII")
+_dump_sequence = itertools.count(1)
+
+LAYOUTS = ("BGR", "RGB", "BGRA", "GRAY")
+RECORD_DTYPE = np.dtype([
+    ("time", "f8"),  # epoch 초
+    ("score", "f4"),  # 매칭 점수 (NaN이면 매칭 없음)
+    ("found", "u1"),
+    ("label", "u2"),  # labels 목록의 인덱스 (액션/단계 이름)
+    ("layout", "u1"),  # LAYOUTS 인덱스
+    ("decimation", "u1"),  # 솎아 낸 간격 (1이면 원본 해상도)
+    ("height", "u4"),
+    ("width", "u4"),
+    ("channels", "u1"),
+    ("area", "i4", (4,)),  # 캡처한 화면 영역
+])
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class FlightRecorder:
+    def __init__(self, capacity: int = 32, slot_bytes: int = 512 * 1024):
+        self.capacity = capacity
+        self.slot_bytes = slot_bytes
+        # 전체 메모리 사용량은 capacity * slot_bytes로 고정
+        self.frames = np.zeros((capacity, slot_bytes), np.uint8)
+        # np.zeros는 실제로 쓸 때 페이지를 확보하므로, 미리 채워 실행 중에 RSS가 늘지 않게 함
+        self.frames.fill(0)
+        self.records = np.zeros(capacity, RECORD_DTYPE)
+        self.count = 0  # 지금까지 기록한 프레임 수 (capacity를 넘으면 오래된 것부터 덮어씀)
+        self.labels: List[str] = []
+        self._label_ids = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self.frames.nbytes + self.records.nbytes
+
+    def _label_id(self, label: str) -> int:
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        return label_id
+
+    def record(self, frame: np.ndarray, label: str, score: Optional[float] = None, found: bool = False,
+               area: Optional[Tuple[int, int, int, int]] = None, layout: str = "BGR"):
+        """프레임을 다음 슬롯에 복사 (슬롯보다 크면 솎아서 복사)"""
+        if frame is None or frame.size == 0:
+            return
+        decimation = 1
+        if frame.nbytes > self.slot_bytes:
+            decimation = math.ceil(math.sqrt(frame.nbytes / self.slot_bytes))
+            while frame[::decimation, ::decimation].nbytes > self.slot_bytes:
+                decimation += 1
+            frame = frame[::decimation, ::decimation]
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+
+        with self._lock:
+            slot = self.count % self.capacity
+            np.copyto(self.frames[slot, :frame.nbytes].reshape(frame.shape), frame)
+            record = self.records[slot]
+            record["time"] = time.time()
+            record["score"] = np.nan if score is None else score
+            record["found"] = found
+            record["label"] = self._label_id(label)
+            record["layout"] = LAYOUTS.index(layout) if frame.ndim == 3 else LAYOUTS.index("GRAY")
+            record["decimation"] = decimation
+            record["height"], record["width"], record["channels"] = height, width, channels
+            record["area"] = area if area is not None else (0, 0, 0, 0)
+            self.count += 1
+
+    def clear(self):
+        with self._lock:
+            self.count = 0
+
+    def snapshot(self) -> Tuple[List[dict], List[np.ndarray]]:
+        """보관 중인 프레임(오래된 순서)의 메타데이터와 픽셀 사본. 잠금은 복사하는 동안만 잡음"""
+        with self._lock:
+            stored = min(self.count, self.capacity)
+            first = self.count - stored
+            entries, frames = [], []
+            for index in range(stored):
+                slot = (first + index) % self.capacity
+                record = self.records[slot]
+                shape = [int(record["height"]), int(record["width"])]
+                if record["channels"] > 1:
+                    shape.append(int(record["channels"]))
+                entries.append({
+                    "label": self.labels[record["label"]],
+                    "time": float(record["time"]),
+                    "score": None if np.isnan(record["score"]) else float(record["score"]),
+                    "found": bool(record["found"]),
+                    "area": [int(value) for value in record["area"]],
+                    "layout": LAYOUTS[record["layout"]],
+                    "decimation": int(record["decimation"]),
+                    "shape": shape,
+                })
+                frames.append(self.frames[slot, :int(np.prod(shape))].copy())
+        return entries, frames
+
+    def dump(self, path: str, reason: str = "") -> Optional[str]:
+        """보관 중인 프레임을 오래된 순서로 파일에 저장. 기록이 없으면 None
+
+        슬롯은 잠금 안에서 복사만 하고 파일 쓰기는 잠금 밖에서 하므로, 저장 중에도 `record()`가 막히지 않는다.
+        """
+        entries, frames = self.snapshot()
+        if not entries:
+            return None
+
+        # 헤더 길이가 offset 값에 따라 달라지므로 길이가 고정될 때까지 반복
+        header_size = 0
+        while True:
+            offset = _align(_PREFIX.size + header_size)
+            for entry in entries:
+                entry["offset"] = offset
+                offset = _align(offset + int(np.prod(entry["shape"])))
+            header = json.dumps({"reason": reason, "created": time.time(), "records": entries},
+                                ensure_ascii=False).encode("utf-8")
+            if len(header) == header_size:
+                break
+            header_size = len(header)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            for frame, entry in zip(frames, entries):
+                f.write(b"\0" * (entry["offset"] - f.tell()))
+                f.write(frame.data)
+        os.replace(temp_path, path)
+        return path
+
+
+def read_flight(path: str) -> Tuple[dict, List[np.ndarray]]:
+    """기록 파일의 헤더와 메모리 매핑된 프레임 배열(읽기 전용) 반환"""
+    with open(path, "rb") as f:
+        magic, version, header_size = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"플라이트 기록 파일이 아닙니다: {path}")
+        if version > VERSION:
+            raise ValueError(f"지원하지 않는 기록 파일 버전입니다: {version}")
+        header = json.loads(f.read(header_size).decode("utf-8"))
+
+    frames = []
+    if header["records"]:
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        for entry in header["records"]:
+            size = int(np.prod(entry["shape"]))
+            frames.append(data[entry["offset"]:entry["offset"] + size].reshape(entry["shape"]))
+    return header, frames
+
+
+def dump_name(reason: str) -> str:
+    """기록 파일 이름 (시각_밀리초_PID_일련번호_사유.acfr). 파일 이름에 쓸 수 없는 문자는 '_'로 바꿈
+
+    같은 초에 같은 사유로 여러 번 저장해도 (반복 실행의 회차별 오류 등) 서로 덮어쓰지 않는다.
+    """
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in reason)[:60]
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{int(now * 1000) % 1000:03d}"
+    return f"{stamp}_{os.getpid()}_{next(_dump_sequence)}_{safe}{FLIGHT_EXT}"
+
+
+def prune_dumps(directory: str, keep: int) -> int:
+    """`directory`의 기록 파일 중 최근 `keep`개만 남기고 삭제. 삭제한 수 반환"""
+    try:
+        with os.scandir(directory) as it:
+            dumps = [(item.stat().st_mtime_ns, item.path) for item in it
+                     if item.name.endswith(FLIGHT_EXT) and item.is_file()]
+    except OSError:
+        return 0
+    removed = 0
+    for _, path in sorted(dumps, reverse=True)[max(keep, 0):]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
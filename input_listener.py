@@ -0,0 +1,331 @@
+"""마우스/키보드 입력 감지 (영역·클릭 위치 지정용)
+
+운영체제 입력 훅이 백그라운드 스레드에서 버튼 누름/뗌과 키 입력을 받아 큐(`events`)에
+넣는다. Tk 스레드는 주기적으로 상태를 읽지 않고, `on_event` 알림을 받았을 때만 큐를 비운다.
+감지는 `start()`부터 `stop()`까지만 동작하므로 영역/클릭 위치를 지정하는 동안에만 켠다.
+그래서 대기 중에는 CPU를 쓰지 않고, 100ms보다 짧은 클릭도 놓치지 않는다.
+
+- hook: pynput 입력 훅 (Windows 저수준 훅, macOS Quartz, Linux X11)
+- poll: pynput이 없을 때의 대체 수단. 백그라운드 스레드에서 버튼 상태를 읽음 (Windows, X11만)
+- fake: 정해진 순서대로 입력을 재생 (디스플레이 없는 환경에서 점검용)
+
+    requests = queue.Queue()  # GUI 스레드가 root.after로 주기적으로 꺼내 실행
+    listener = create_input_listener(on_event=lambda: requests.put(handle_input))
+    listener.start()
+    ...
+    for event in listener.drain():
+        if event.kind == "press" and event.button == "right": ...
+"""
+
+import ctypes
+import ctypes.util
+import os
+import platform
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class InputEvent:
+    kind: str  # "press", "release" (마우스 버튼), "key" (키 누름)
+    button: str = ""  # "left", "right", "middle" 또는 키 이름 ("esc" 등)
+    x: int = 0
+    y: int = 0
+    time: float = field(default_factory=time.perf_counter)
+
+
+class InputListener:
+    """입력 감지 기본 클래스. 하위 클래스는 `_start`/`_stop`에서 훅을 설치/해제한다"""
+
+    name = "base"
+
+    def __init__(self, on_event: Optional[Callable[[], None]] = None):
+        self.events: "queue.Queue[InputEvent]" = queue.Queue()
+        self.on_event = on_event  # 이벤트가 들어올 때 감지 스레드에서 호출 (GUI 깨우기용)
+        self.running = False
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self._start()
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            self._stop()
+        # 중지 후 남은 이벤트는 다음 감지에 섞이지 않도록 버림
+        self.drain()
+
+    def drain(self) -> List[InputEvent]:
+        """큐에 쌓인 이벤트를 모두 꺼냄 (대기하지 않음)"""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def emit(self, kind: str, button: str = "", x: int = 0, y: int = 0):
+        if not self.running:
+            return
+        self.events.put(InputEvent(kind, button, int(x), int(y)))
+        if self.on_event is not None:
+            try:
+                self.on_event()
+            except Exception as e:
+                print(f"입력 이벤트 알림 중 오류 발생: {e}")
+
+    def _start(self):
+        raise NotImplementedError
+
+    def _stop(self):
+        pass
+
+    def close(self):
+        self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HookInputListener(InputListener):
+    """pynput 입력 훅. 콜백은 pynput이 만든 백그라운드 스레드에서 호출된다"""
+
+    name = "hook"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        from pynput import keyboard, mouse
+        self._keyboard_module = keyboard
+        self._mouse_module = mouse
+        self._mouse = None
+        self._keyboard = None
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pynput  # noqa: F401
+        except Exception:
+            return False
+        return True
+
+    def _start(self):
+        def on_click(x, y, button, pressed):
+            self.emit("press" if pressed else "release", button.name, x, y)
+
+        def on_press(key):
+            # 특수 키는 Key.esc처럼 name이 있고, 문자 키는 char가 있음
+            name = getattr(key, "name", None) or getattr(key, "char", None) or str(key)
+            self.emit("key", name)
+
+        self._mouse = self._mouse_module.Listener(on_click=on_click)
+        self._keyboard = self._keyboard_module.Listener(on_press=on_press)
+        self._mouse.start()
+        self._keyboard.start()
+
+    def _stop(self):
+        for listener in (self._mouse, self._keyboard):
+            if listener is not None:
+                listener.stop()
+        self._mouse = self._keyboard = None
+
+
+class _Win32PointerReader:
+    """Windows: GetKeyState로 버튼/ESC 상태, GetCursorPos로 위치"""
+
+    def __init__(self):
+        import win32api
+        import win32con
+        self._api = win32api
+        self._buttons = {"left": win32con.VK_LBUTTON, "right": win32con.VK_RBUTTON,
+                         "middle": win32con.VK_MBUTTON}
+        self._escape = win32con.VK_ESCAPE
+
+    def read(self) -> Tuple[Dict[str, bool], int, int, bool]:
+        buttons = {name: self._api.GetKeyState(vk) < 0 for name, vk in self._buttons.items()}
+        x, y = self._api.GetCursorPos()
+        return buttons, x, y, self._api.GetKeyState(self._escape) < 0
+
+    def close(self):
+        pass
+
+
+class _X11PointerReader:
+    """X11: XQueryPointer로 위치와 버튼 상태, XQueryKeymap으로 ESC 상태 (ctypes, 추가 패키지 없음)"""
+
+    _BUTTON_MASKS = {"left": 1 << 8, "middle": 1 << 9, "right": 1 << 10}  # Button1Mask..Button3Mask
+    _XK_ESCAPE = 0xFF1B
+
+    def __init__(self):
+        library = ctypes.util.find_library("X11")
+        if library is None:
+            raise RuntimeError("libX11을 찾을 수 없습니다")
+        x11 = ctypes.CDLL(library)
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        x11.XQueryPointer.argtypes = [ctypes.c_void_p, ctypes.c_ulong,
+                                      ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong),
+                                      ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+                                      ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+                                      ctypes.POINTER(ctypes.c_uint)]
+        x11.XQueryKeymap.argtypes = [ctypes.c_void_p, ctypes.c_char * 32]
+        x11.XKeysymToKeycode.restype = ctypes.c_ubyte
+        x11.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self._x11 = x11
+        self._display = x11.XOpenDisplay(None)
+        if not self._display:
+            raise RuntimeError("X 디스플레이에 연결할 수 없습니다 (DISPLAY 확인)")
+        self._root = x11.XDefaultRootWindow(self._display)
+        self._escape = x11.XKeysymToKeycode(self._display, self._XK_ESCAPE)
+        self._window = ctypes.c_ulong()
+        self._child = ctypes.c_ulong()
+        self._position = [ctypes.c_int() for _ in range(4)]
+        self._mask = ctypes.c_uint()
+        self._keymap = (ctypes.c_char * 32)()
+
+    def read(self) -> Tuple[Dict[str, bool], int, int, bool]:
+        root_x, root_y, window_x, window_y = self._position
+        self._x11.XQueryPointer(self._display, self._root, ctypes.byref(self._window), ctypes.byref(self._child),
+                                ctypes.byref(root_x), ctypes.byref(root_y),
+                                ctypes.byref(window_x), ctypes.byref(window_y), ctypes.byref(self._mask))
+        buttons = {name: bool(self._mask.value & mask) for name, mask in self._BUTTON_MASKS.items()}
+        esc = False
+        if self._escape:
+            self._x11.XQueryKeymap(self._display, self._keymap)
+            esc = bool(self._keymap.raw[self._escape // 8] & (1 << (self._escape % 8)))
+        return buttons, root_x.value, root_y.value, esc
+
+    def close(self):
+        if self._display:
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+
+
+class PollingInputListener(InputListener):
+    """버튼 상태를 백그라운드 스레드에서 짧은 간격으로 읽는 대체 구현 (Tk 스레드는 막지 않음)
+
+    Windows(pywin32)와 X11(libX11)에서만 동작한다. 그 밖의 환경에서는 생성 시 RuntimeError.
+    읽기 스레드와 디스플레이 연결은 `start()`부터 `stop()`까지만 유지한다.
+    """
+
+    name = "poll"
+
+    def __init__(self, interval: float = 0.01, **kwargs):
+        super().__init__(**kwargs)
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        # 지원 여부만 생성 시 확인 (연결은 바로 닫음)
+        self._open_reader().close()
+
+    @staticmethod
+    def _open_reader():
+        try:
+            if platform.system() == "Windows":
+                return _Win32PointerReader()
+            if platform.system() == "Linux":
+                if not os.environ.get("DISPLAY"):
+                    raise RuntimeError("DISPLAY가 없습니다 (X11만 지원)")
+                return _X11PointerReader()
+            raise RuntimeError(f"{platform.system()}에서는 지원하지 않습니다")
+        except Exception as e:
+            raise RuntimeError(f"입력 감지에 pynput이 필요합니다 (pip install pynput): {e}") from e
+
+    def _start(self):
+        self._stop_event = threading.Event()
+        reader = self._open_reader()
+        self._thread = threading.Thread(target=self._run, args=(reader, self._stop_event),
+                                        name="input-poll", daemon=True)
+        self._thread.start()
+
+    def _stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def _run(self, reader, stop_event: threading.Event):
+        try:
+            self._poll(reader, stop_event)
+        finally:
+            reader.close()  # 읽기 스레드가 끝날 때 연결을 닫음 (다른 스레드와 공유하지 않음)
+
+    def _poll(self, reader, stop_event: threading.Event):
+        state, _, _, esc = reader.read()
+        while not stop_event.wait(self.interval):
+            current, x, y, now_esc = reader.read()
+            for button, pressed in current.items():
+                if pressed != state.get(button, False):
+                    self.emit("press" if pressed else "release", button, x, y)
+            state = current
+            if now_esc and not esc:
+                self.emit("key", "esc")
+            esc = now_esc
+
+
+class FakeInputListener(InputListener):
+    """정해진 입력을 순서대로 재생. `script`는 (지연 초, 종류, 버튼/키, x, y) 목록
+
+        FakeInputListener([(0.1, "press", "right", 10, 20), (0.05, "release", "right", 10, 20)])
+    """
+
+    name = "fake"
+
+    def __init__(self, script: Sequence[Tuple] = (), **kwargs):
+        super().__init__(**kwargs)
+        self.script = list(script)
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def _start(self):
+        self._stop_event.clear()
+        if self.script:
+            self._thread = threading.Thread(target=self._play, name="input-fake", daemon=True)
+            self._thread.start()
+
+    def _stop(self):
+        self._stop_event.set()
+        self._thread = None
+
+    def _play(self):
+        for delay, kind, button, *position in self.script:
+            if self._stop_event.wait(delay):
+                return
+            self.emit(kind, button, *position)
+
+    def inject(self, kind: str, button: str = "", x: int = 0, y: int = 0):
+        """스크립트와 별개로 이벤트를 즉시 넣음"""
+        self.emit(kind, button, x, y)
+
+    def click(self, x: int, y: int, button: str = "right"):
+        self.inject("press", button, x, y)
+        self.inject("release", button, x, y)
+
+
+INPUT_LISTENERS = {
+    HookInputListener.name: HookInputListener,
+    PollingInputListener.name: PollingInputListener,
+    FakeInputListener.name: FakeInputListener,
+}
+
+
+def create_input_listener(name: Optional[str] = None, **kwargs) -> InputListener:
+    """이름으로 입력 감지 백엔드 생성. 이름이 없으면 입력 훅, 안 되면 상태 읽기"""
+    if name is None:
+        if HookInputListener.available():
+            try:
+                return HookInputListener(**kwargs)
+            except Exception as e:
+                print(f"입력 훅을 사용할 수 없어 상태 읽기 방식으로 대체합니다: {e}")
+        return PollingInputListener(**kwargs)
+    return INPUT_LISTENERS[name](**kwargs)
@@ -0,0 +1,378 @@
+"""입력(마우스/키보드) 주입 백엔드
+
+모든 백엔드는 같은 인터페이스를 제공한다:
+    sink.click(x, y)                 # 이동+클릭을 한 번에 전송
+    sink.send([("move", x, y), ("down", "left"), ("up", "left")])
+    sink.chord("ctrl", "c")          # 키 조합
+    sink(x, y)                       # 엔진의 click 콜백으로 바로 사용 가능
+
+이벤트 묶음(batch)은 잠금 아래에서 한 번에 보내고 백엔드별로 한 번만 flush한다.
+`interval`은 이벤트 사이 간격, `click_hold`는 버튼을 누르고 있는 시간(초)이다.
+
+- xtest: libXtst로 X 서버에 직접 가짜 입력 전송 (Linux, 클릭당 약 1ms 미만)
+- pyautogui: 기존 동작(moveTo + click). pyautogui의 호출당 기본 지연(PAUSE)이 포함됨
+- record: 실제로 입력하지 않고 기록만 함 (dry-run, 점검용)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import platform
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# ("move", x, y) / ("down" | "up", 버튼) / ("key_down" | "key_up", 키) / ("pause", 초)
+InputEvent = Tuple
+
+BUTTONS = {"left": 1, "middle": 2, "right": 3}
+
+
+def click_events(x: int, y: int, button: str = "left", clicks: int = 1) -> List[InputEvent]:
+    events: List[InputEvent] = [("move", int(x), int(y))]
+    for _ in range(clicks):
+        events += [("down", button), ("up", button)]
+    return events
+
+
+def chord_events(*keys: str) -> List[InputEvent]:
+    """키를 순서대로 누르고 역순으로 뗌 (예: ctrl+shift+t)"""
+    return [("key_down", key) for key in keys] + [("key_up", key) for key in reversed(keys)]
+
+
+class InputSink:
+    """입력 백엔드 기본 클래스. 전송 횟수와 주입 지연을 함께 기록한다"""
+
+    name = "base"
+
+    def __init__(self, interval: float = 0.0, click_hold: float = 0.0):
+        self.interval = interval
+        self.click_hold = click_hold
+        self.batches = 0
+        self.events = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._worker: Optional[threading.Thread] = None
+
+    def send(self, events: Sequence[InputEvent]) -> float:
+        """이벤트 묶음을 즉시 전송하고 걸린 시간(초)을 반환"""
+        with self._lock:
+            start = time.perf_counter()
+            for index, event in enumerate(events):
+                if event[0] == "pause":
+                    self._flush()
+                    time.sleep(event[1])
+                    continue
+                self._send_event(event)
+                if event[0] == "down" and self.click_hold > 0:
+                    self._flush()
+                    time.sleep(self.click_hold)
+                elif self.interval > 0 and index < len(events) - 1:
+                    self._flush()
+                    time.sleep(self.interval)
+            self._flush()
+            elapsed = time.perf_counter() - start
+            self.batches += 1
+            self.events += len(events)
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+        return elapsed
+
+    def click(self, x: int, y: int, button: str = "left", clicks: int = 1) -> float:
+        return self.send(click_events(x, y, button, clicks))
+
+    def move(self, x: int, y: int) -> float:
+        return self.send([("move", int(x), int(y))])
+
+    def chord(self, *keys: str) -> float:
+        return self.send(chord_events(*keys))
+
+    def __call__(self, x: int, y: int):
+        self.click(x, y)
+
+    def submit(self, events: Sequence[InputEvent]):
+        """이벤트 묶음을 전송 스레드의 큐에 넣고 바로 반환 (순서는 유지됨)"""
+        if self._worker is None:
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._drain, name=f"input-{self.name}", daemon=True)
+            self._worker.start()
+        self._queue.put(list(events))
+
+    def wait(self):
+        """큐에 넣은 묶음이 모두 전송될 때까지 대기"""
+        if self._queue is not None:
+            self._queue.join()
+
+    def _drain(self):
+        while True:
+            events = self._queue.get()
+            try:
+                if events is None:
+                    return
+                self.send(events)
+            except Exception as e:
+                print(f"입력 전송 중 오류 발생: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "batches": self.batches,
+                "events": self.events,
+                "mean_ms": self.total_seconds / self.batches * 1000 if self.batches else 0.0,
+                "max_ms": self.max_seconds * 1000,
+            }
+
+    def _send_event(self, event: InputEvent):
+        raise NotImplementedError
+
+    def _flush(self):
+        pass
+
+    def close(self):
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+            self._worker = None
+            self._queue = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class XTestInputSink(InputSink):
+    """XTest 확장으로 X 서버에 직접 입력 주입 (Linux)
+
+    이벤트는 Xlib 출력 버퍼에 쌓였다가 묶음마다 XFlush 한 번으로 전송된다.
+    `sync=True`이면 X 서버가 처리할 때까지 기다린다(XSync).
+    """
+
+    name = "xtest"
+
+    # pyautogui/keyboard 모듈에서 쓰던 키 이름 -> X keysym 이름
+    KEYSYMS = {
+        "ctrl": "Control_L", "control": "Control_L", "shift": "Shift_L", "alt": "Alt_L",
+        "win": "Super_L", "super": "Super_L", "cmd": "Super_L", "enter": "Return",
+        "return": "Return", "esc": "Escape", "escape": "Escape", "tab": "Tab",
+        "space": "space", "backspace": "BackSpace", "delete": "Delete", "del": "Delete",
+        "up": "Up", "down": "Down", "left": "Left", "right": "Right",
+        "home": "Home", "end": "End", "pageup": "Prior", "pagedown": "Next",
+    }
+
+    def __init__(self, display_name: Optional[str] = None, sync: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self._display_name = display_name
+        self.sync = sync
+        self._display = None
+        self._keycodes: Dict[str, int] = {}
+        self._open()
+
+    @staticmethod
+    def available() -> bool:
+        return (platform.system() == "Linux"
+                and bool(os.environ.get("DISPLAY"))
+                and ctypes.util.find_library("X11") is not None
+                and ctypes.util.find_library("Xtst") is not None)
+
+    def _open(self):
+        x11_name = ctypes.util.find_library("X11")
+        xtst_name = ctypes.util.find_library("Xtst")
+        if x11_name is None or xtst_name is None:
+            raise RuntimeError("libX11/libXtst를 찾을 수 없습니다")
+        x11 = ctypes.CDLL(x11_name)
+        xtst = ctypes.CDLL(xtst_name)
+
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XFlush.argtypes = [ctypes.c_void_p]
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        x11.XStringToKeysym.restype = ctypes.c_ulong
+        x11.XStringToKeysym.argtypes = [ctypes.c_char_p]
+        x11.XKeysymToKeycode.restype = ctypes.c_ubyte
+        x11.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        xtst.XTestQueryExtension.argtypes = [ctypes.c_void_p] + [ctypes.POINTER(ctypes.c_int)] * 4
+        xtst.XTestFakeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                              ctypes.c_int, ctypes.c_ulong]
+        xtst.XTestFakeButtonEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+        xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+        self._x11, self._xtst = x11, xtst
+
+        name = self._display_name.encode() if self._display_name else None
+        self._display = x11.XOpenDisplay(name)
+        if not self._display:
+            raise RuntimeError("X 디스플레이를 열 수 없습니다")
+        values = [ctypes.c_int() for _ in range(4)]
+        if not xtst.XTestQueryExtension(self._display, *[ctypes.byref(v) for v in values]):
+            x11.XCloseDisplay(self._display)
+            self._display = None
+            raise RuntimeError("X 서버가 XTEST 확장을 지원하지 않습니다")
+
+    def _keycode(self, key: str) -> int:
+        keycode = self._keycodes.get(key)
+        if keycode is None:
+            keysym = self._x11.XStringToKeysym(self.KEYSYMS.get(key.lower(), key).encode())
+            keycode = self._x11.XKeysymToKeycode(self._display, keysym) if keysym else 0
+            if not keycode:
+                raise ValueError(f"알 수 없는 키: {key}")
+            self._keycodes[key] = keycode
+        return keycode
+
+    def _send_event(self, event: InputEvent):
+        kind = event[0]
+        if kind == "move":
+            # 화면 번호 -1: 현재 포인터가 있는 화면
+            self._xtst.XTestFakeMotionEvent(self._display, -1, event[1], event[2], 0)
+        elif kind in ("down", "up"):
+            self._xtst.XTestFakeButtonEvent(self._display, BUTTONS[event[1]], kind == "down", 0)
+        elif kind in ("key_down", "key_up"):
+            self._xtst.XTestFakeKeyEvent(self._display, self._keycode(event[1]), kind == "key_down", 0)
+        else:
+            raise ValueError(f"알 수 없는 입력 이벤트: {kind}")
+
+    def _flush(self):
+        if self.sync:
+            self._x11.XSync(self._display, 0)
+        else:
+            self._x11.XFlush(self._display)
+
+    def close(self):
+        super().close()
+        if self._display:
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+
+
+class PyAutoGUIInputSink(InputSink):
+    """기존 pyautogui 동작 (다른 백엔드를 쓸 수 없을 때의 대체 수단)
+
+    `pause`를 지정하면 pyautogui.PAUSE(호출마다 붙는 기본 지연)를 바꾼다.
+    """
+
+    name = "pyautogui"
+
+    def __init__(self, pause: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        import pyautogui
+        self._pyautogui = pyautogui
+        if pause is not None:
+            pyautogui.PAUSE = pause
+
+    def _send_event(self, event: InputEvent):
+        kind = event[0]
+        if kind == "move":
+            self._pyautogui.moveTo(event[1], event[2])
+        elif kind == "down":
+            self._pyautogui.mouseDown(button=event[1])
+        elif kind == "up":
+            self._pyautogui.mouseUp(button=event[1])
+        elif kind == "key_down":
+            self._pyautogui.keyDown(event[1])
+        elif kind == "key_up":
+            self._pyautogui.keyUp(event[1])
+        else:
+            raise ValueError(f"알 수 없는 입력 이벤트: {kind}")
+
+    def click(self, x: int, y: int, button: str = "left", clicks: int = 1) -> float:
+        if self.interval or self.click_hold:
+            return super().click(x, y, button, clicks)
+        # 기존과 같은 호출 경로 (moveTo + click)
+        with self._lock:
+            start = time.perf_counter()
+            self._pyautogui.moveTo(x, y)
+            self._pyautogui.click(button=button, clicks=clicks)
+            elapsed = time.perf_counter() - start
+            self.batches += 1
+            self.events += 1 + 2 * clicks
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+        return elapsed
+
+
+class RecordingInputSink(InputSink):
+    """입력하지 않고 최근 (시각, 이벤트)만 기록. `echo=True`이면 클릭 위치를 출력"""
+
+    name = "record"
+
+    def __init__(self, echo: bool = False, max_events: int = 10000, **kwargs):
+        super().__init__(**kwargs)
+        self.echo = echo
+        self.recorded: "deque[Tuple[float, InputEvent]]" = deque(maxlen=max_events)
+        self._position: Optional[Tuple[int, int]] = None
+
+    def _send_event(self, event: InputEvent):
+        self.recorded.append((time.perf_counter(), event))
+        if event[0] == "move":
+            self._position = (event[1], event[2])
+        elif self.echo and event[0] == "down":
+            button = "" if event[1] == "left" else f" {event[1]}"
+            print(f"클릭 (dry-run): {self._position}{button}")
+        elif self.echo and event[0] == "key_down":
+            print(f"키 입력 (dry-run): {event[1]}")
+
+    def clear(self):
+        with self._lock:
+            self.recorded.clear()
+
+
+INPUT_BACKENDS = {
+    XTestInputSink.name: XTestInputSink,
+    PyAutoGUIInputSink.name: PyAutoGUIInputSink,
+    RecordingInputSink.name: RecordingInputSink,
+}
+
+
+def create_input_sink(name: Optional[str] = None, **kwargs) -> InputSink:
+    """이름으로 입력 백엔드 생성. 이름이 없으면 XTest, 안 되면 pyautogui"""
+    if name is None:
+        if XTestInputSink.available():
+            try:
+                return XTestInputSink(**kwargs)
+            except (OSError, RuntimeError) as e:
+                print(f"XTest 입력을 사용할 수 없어 pyautogui로 대체합니다: {e}")
+        return PyAutoGUIInputSink(**kwargs)
+    return INPUT_BACKENDS[name](**kwargs)
+
+
+def measure_input_sink(sink: InputSink, clicks: int = 100, position: Tuple[int, int] = (1, 1)) -> dict:
+    """백엔드의 클릭당 주입 지연 측정 (이동+클릭 한 묶음 기준)"""
+    sink.click(*position)  # 연결/모듈 초기화 등 첫 호출 비용 제외
+    samples = sorted(sink.click(*position) for _ in range(clicks))
+    return {
+        "backend": sink.name,
+        "clicks": clicks,
+        "mean_ms": sum(samples) / clicks * 1000,
+        "p50_ms": samples[clicks // 2] * 1000,
+        "p95_ms": samples[min(clicks - 1, int(clicks * 0.95))] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="입력 백엔드별 클릭 지연 리포트")
+    parser.add_argument("--clicks", type=int, default=100)
+    parser.add_argument("--position", type=int, nargs=2, default=[1, 1], help="클릭할 좌표")
+    parser.add_argument("--backend", action="append", choices=list(INPUT_BACKENDS),
+                        help="측정할 백엔드 (기본: 전부)")
+    args = parser.parse_args()
+
+    for name in args.backend or list(INPUT_BACKENDS):
+        try:
+            sink = create_input_sink(name)
+        except Exception as e:
+            print(f"{name} 백엔드를 사용할 수 없습니다: {e}")
+            continue
+        with sink:
+            print(json.dumps(measure_input_sink(sink, args.clicks, tuple(args.position))))
@@ -0,0 +1,127 @@
+"""액션별 매칭 위치 기억: 지난 실행에서 찾은 위치 주변의 작은 창부터 검색
+
+대상은 보통 매번 같은 위치에 나타나므로, 마지막으로 찾은 위치 주변(템플릿 크기 +
+여백)만 먼저 캡처/매칭하고, 못 찾았을 때만 전체 검색 영역으로 넓힌다.
+위치는 시나리오별로 `scenarios/locations/<시나리오 이름>.json`에 저장한다.
+"""
+
+import json
+import math
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+LOCATION_VERSION = 1
+
+
+class LocationMemory:
+    def __init__(self, path: Optional[str] = None, margin: int = 16):
+        self.path = path
+        self.margin = margin  # 예측 위치 주변 여백 (픽셀)
+        # 액션 이름 -> {"location": [x, y], "scale": 배율, "hits": n, "misses": n}
+        self.entries: Dict[str, dict] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    @classmethod
+    def for_scenario(cls, scenarios_dir: str, name: str, **kwargs) -> "LocationMemory":
+        return cls(os.path.join(scenarios_dir, "locations", f"{name}.json"), **kwargs)
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == LOCATION_VERSION:
+                self.entries = data["actions"]
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        with self._lock:
+            data = {"version": LOCATION_VERSION, "actions": dict(self.entries)}
+            self.dirty = False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"위치 기록 저장 중 오류 발생: {e}")
+
+    def predict(self, name: str) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            entry = self.entries.get(name)
+        return tuple(entry["location"]) if entry else None
+
+    def window(self, name: str, template_shape, search_area) -> Optional[Tuple[int, int, int, int]]:
+        """예측 위치 주변 검색 창 (검색 영역 안으로 제한). 예측이 없거나 창이 영역보다 작지 않으면 None
+
+        창 크기는 지난번에 찾은 배율(multiscale 매칭)의 템플릿 크기 기준이다.
+        """
+        with self._lock:
+            entry = self.entries.get(name)
+        if entry is None or search_area is None:
+            return None
+        scale = entry.get("scale", 1.0)
+        th, tw = (math.ceil(size * scale) for size in template_shape[:2])
+        x, y = entry["location"]
+        window = (max(search_area[0], x - self.margin), max(search_area[1], y - self.margin),
+                  min(search_area[2], x + tw + self.margin), min(search_area[3], y + th + self.margin))
+        if window[2] - window[0] < tw or window[3] - window[1] < th:
+            return None
+        if window == tuple(search_area):
+            return None
+        return window
+
+    def remember(self, name: str, location: Tuple[int, int], predicted_hit: bool, scale: float = 1.0):
+        with self._lock:
+            entry = self.entries.setdefault(name, {"location": list(location), "hits": 0, "misses": 0})
+            entry["location"] = list(location)
+            entry["scale"] = scale
+            entry["hits" if predicted_hit else "misses"] += 1
+            self.dirty = True
+
+
+class LocationStats:
+    """예측 창 적중률과 매칭에 사용한 바이트 수 (전체 영역만 검색했을 때와 비교)"""
+
+    def __init__(self):
+        self.window_hits = 0
+        self.window_misses = 0
+        self.full_scans = 0
+        self.bytes_scanned = 0
+        self.bytes_full = 0  # 매번 전체 영역을 검색했다면 사용했을 바이트 수
+        self._lock = threading.Lock()
+
+    def record_window(self, scanned: int, full: int, hit: bool):
+        with self._lock:
+            if hit:
+                self.window_hits += 1
+                self.bytes_full += full
+            else:
+                self.window_misses += 1
+            self.bytes_scanned += scanned
+
+    def record_full(self, scanned: int):
+        with self._lock:
+            self.full_scans += 1
+            self.bytes_scanned += scanned
+            self.bytes_full += scanned
+
+    def report(self) -> dict:
+        with self._lock:
+            attempts = self.window_hits + self.window_misses
+            return {
+                "window_hits": self.window_hits,
+                "window_misses": self.window_misses,
+                "full_scans": self.full_scans,
+                "hit_rate": self.window_hits / attempts if attempts else 0.0,
+                "bytes_scanned": self.bytes_scanned,
+                "bytes_full_search": self.bytes_full,
+                "bytes_saved_ratio": 1 - self.bytes_scanned / self.bytes_full if self.bytes_full else 0.0,
+            }
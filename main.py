@@ -5,125 +5,27 @@ from tkinter import messagebox
 import pyautogui
 import cv2
 import numpy as np
-from PIL import ImageGrab
 import time
-import keyboard
-import win32api
-import win32con
 import os
 from tkinter import ttk
-import json
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
 from tkinter import simpledialog
 import platform
-
-@dataclass
-class Action:
-    name: str
-    target_image_path: str
-    click_position: Tuple[int, int]
-    order: int  # 액션 실행 순서
-    wait_time: float = 1.0  # 액션 실행 후 대기 시간 (초)
-    search_area: Optional[Tuple[int, int, int, int]] = None
-
-class ScenarioManager:
-    def __init__(self):
-        self.scenarios = {}
-        self.scenarios_dir = "scenarios"
-        self.current_scenario = None  # 현재 작업 중인 시나리오
-        self.current_actions = []     # 현재 시나리오의 액션들
-        self.create_scenarios_directory()
-    
-    def create_scenarios_directory(self):
-        if not os.path.exists(self.scenarios_dir):
-            os.makedirs(self.scenarios_dir)
-            os.makedirs(os.path.join(self.scenarios_dir, "images"))
-    
-    def create_scenario(self, name: str, actions: List[Action]) -> bool:
-        try:
-            scenario_data = {
-                "name": name,
-                "actions": [
-                    {
-                        "name": action.name,
-                        "target_image": action.target_image_path,
-                        "click_position": action.click_position,
-                        "search_area": action.search_area,
-                        "order": action.order,
-                        "wait_time": action.wait_time
-                    }
-                    for action in actions
-                ]
-            }
-            
-            file_path = os.path.join(self.scenarios_dir, f"{name}.json")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(scenario_data, f, ensure_ascii=False, indent=4)
-            
-            self.scenarios[name] = actions
-            return True
-        except Exception as e:
-            print(f"시나리오 생성 중 오류 발생: {e}")
-            return False
-    
-    def load_scenario(self, name: str) -> Optional[List[Action]]:
-        try:
-            file_path = os.path.join(self.scenarios_dir, f"{name}.json")
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            actions = [
-                Action(
-                    name=action["name"],
-                    target_image_path=action["target_image"],
-                    click_position=tuple(action["click_position"]),
-                    search_area=tuple(action["search_area"]) if action["search_area"] else None,
-                    order=action.get("order", i+1),
-                    wait_time=action.get("wait_time", 1.0)
-                )
-                for i, action in enumerate(data["actions"])
-            ]
-            
-            self.scenarios[name] = actions
-            return actions
-        except Exception as e:
-            print(f"시나리오 로드 중 오류 발생: {e}")
-            return None
-    
-    def list_scenarios(self) -> List[str]:
-        return [f.replace('.json', '') for f in os.listdir(self.scenarios_dir) 
-                if f.endswith('.json')]
-    
-    def start_new_scenario(self, name: str):
-        """새 시나리오 작업 시작"""
-        self.current_scenario = name
-        self.current_actions = []
-    
-    def add_action(self, action: Action):
-        """현재 시나리오에 액션 추가"""
-        self.current_actions.append(action)
-        # 순서대로 정렬
-        self.current_actions.sort(key=lambda x: x.order)
-    
-    def save_current_scenario(self) -> bool:
-        """현재 작업 중인 시나리오 저장"""
-        if not self.current_scenario or not self.current_actions:
-            return False
-        return self.create_scenario(self.current_scenario, self.current_actions)
+import queue
+import threading
+from scenario import Action, ScenarioManager, safe_file_name
+from capture import create_capture_source, to_bgr
+from matching import TemplateMatcher, MATCH_MODES
+from engine import ScenarioEngine
+from soak import MemoryMonitor, SoakRunner
+from input_sink import create_input_sink
+from input_listener import create_input_listener
+from watch import WatchRule, rules_from_actions
+from widgets import VirtualListbox
 
 class ScreenClickSystem:
     def __init__(self):
         self.os_type = platform.system()  # 'Windows', 'Darwin' (Mac), 'Linux'
         
-        # Windows 전용 import를 조건부로 변경
-        if self.os_type == 'Windows':
-            import win32api
-            import win32con
-            self.win32api = win32api
-            self.win32con = win32con
-        
-        self.running = False
         self.search_area = None
         self.temp_coords = None
         self.target_image = None
@@ -132,6 +34,36 @@ class ScreenClickSystem:
         self.current_action = None
         self.current_action_order = 1  # 현재 액션 순서
         
+        # 화면 캡처 백엔드 (프레임은 백엔드 고유 채널 순서로 반환됨)
+        self.capture_source = create_capture_source()
+        # 대상 이미지 저장은 GUI 스레드 전용 백엔드로 캡처. 엔진이 매칭 중인 프레임은 백엔드의
+        # 재사용 버퍼(XShm 공유 메모리) 위의 뷰이므로 같은 백엔드로 캡처하면 덮어쓰게 됨
+        self.target_capture_source = create_capture_source()
+        # 클릭 입력 백엔드 (가능하면 XTest로 직접 주입, 아니면 pyautogui)
+        self.input_sink = create_input_sink()
+        
+        # 캡처 → 매칭 → 클릭은 작업 스레드의 엔진이 수행하고, GUI는 이벤트 큐로만 통신
+        screen_width, screen_height = pyautogui.size()
+        self.engine_events = queue.Queue()
+        # 백그라운드 스레드(입력 감지, 카탈로그 갱신, 기록 저장)가 GUI 스레드에 맡기는 작업.
+        # Tk는 다른 스레드에서 호출하면 안 되므로 큐에 넣고 GUI 스레드가 after로 꺼내 실행
+        self.gui_requests = queue.Queue()
+        self.engine = ScenarioEngine(
+            self.capture_source,
+            TemplateMatcher(),
+            click=self.input_sink,
+            events=self.engine_events,
+            display=f"{platform.node()}:{screen_width}x{screen_height}",  # 배율 기억용 식별자
+        )
+        self.running_scenario = None  # (이름, 시작 시각) — 카탈로그 실행 통계 기록용
+        self.scenario_token = None  # 실행 중인 시나리오의 중지 토큰
+        self.active_run = None      # 이벤트를 받아들일 실행 번호 (CancellationToken.run_id)
+        self.soak = None  # 반복 실행 중이면 SoakRunner
+        self.tk_after_count = 0  # 예약된 Tk after 콜백 수 (반복 실행 메모리 표본용)
+        self.watch_token = None     # 실행 중인 감지 모드의 중지 토큰
+        # 영역/클릭 위치 지정용 입력 감지 (지정 중일 때만 켜고, 이벤트가 오면 GUI 스레드에서 처리)
+        self.input_listener = create_input_listener(on_event=self.notify_input)
+        
         # GUI 설정
         self.root = tk.Tk()
         self.root.title("화면 인식 클릭 도구")
@@ -175,9 +107,6 @@ class ScreenClickSystem:
         self.listening_for_clicks = False
         self.listening_for_click_pos = False
         
-        self.scenario_running = False  # 시나리오 실행 상태
-        self.current_running_action = None  # 현재 실행 중인 액션
-        
         # 시나리오 제어 버튼 추가
         self.scenario_control_frame = tk.Frame(self.root)
         self.scenario_control_frame.pack(pady=5)
@@ -200,6 +129,30 @@ class ScreenClickSystem:
         self.wait_time_var = tk.StringVar(value="1.0")
         self.wait_time_entry = tk.Entry(wait_frame, textvariable=self.wait_time_var, width=5)
         self.wait_time_entry.pack(side="left", padx=2)
+        
+        # 반복 실행 (1이면 한 번, 0이면 중지할 때까지). 반복 중에는 대화 상자를 띄우지 않음
+        tk.Label(wait_frame, text="반복:").pack(side="left")
+        self.repeat_var = tk.StringVar(value="1")
+        tk.Entry(wait_frame, textvariable=self.repeat_var, width=4).pack(side="left", padx=2)
+        
+        # 매칭 방식 설정
+        tk.Label(wait_frame, text="매칭 방식:").pack(side="left")
+        self.match_mode_var = tk.StringVar(value="default")
+        tk.OptionMenu(wait_frame, self.match_mode_var, *MATCH_MODES).pack(side="left", padx=2)
+        
+        # 파이프라인 실행: 대기 시간 중에도 다음 액션 대상을 찾아 보이는 즉시 실행
+        self.pipelined_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.root, text="빠른 연속 실행 (대기 중 다음 액션 미리 탐색)",
+                       variable=self.pipelined_var).pack(pady=2)
+        
+        # 템플릿 매칭 실패 시 특징점 매칭으로 재시도 (테마/확대 변화 대응)
+        self.feature_fallback_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.root, text="특징점 보조 매칭 (테마/배율이 달라져도 인식)",
+                       variable=self.feature_fallback_var).pack(pady=2)
+        
+        # 엔진 이벤트와 백그라운드 스레드 요청 처리 (약 60fps)
+        self.root.after(16, self.poll_engine_events)
+        self.root.after(16, self.poll_gui_requests)
     
     def create_scenario_frame(self):
         scenario_frame = tk.LabelFrame(self.root, text="시나리오 관리")
@@ -210,8 +163,17 @@ class ScreenClickSystem:
         scenario_list_frame.pack(fill="x", padx=5, pady=5)
         
         tk.Label(scenario_list_frame, text="시나리오 목록:").pack(side="left")
-        self.scenario_listbox = tk.Listbox(scenario_frame, height=8)
-        self.scenario_listbox.pack(fill="x", padx=5, pady=5)
+        
+        # 이름 검색 (접두사 일치 우선, 부분 문자열 일치)
+        tk.Label(scenario_list_frame, text="검색:").pack(side="left", padx=(10, 0))
+        self.scenario_search_var = tk.StringVar()
+        self.scenario_search_var.trace_add("write", lambda *args: self.schedule_scenario_search())
+        self.search_after_id = None
+        tk.Entry(scenario_list_frame, textvariable=self.scenario_search_var).pack(side="left", fill="x", expand=True, padx=2)
+        
+        # 보이는 줄만 그리는 목록 (시나리오가 수천 개여도 빠르게 표시)
+        self.scenario_list = VirtualListbox(scenario_frame, height=8, on_select=self.on_scenario_select)
+        self.scenario_list.pack(fill="x", padx=5, pady=5)
         
         # 액션 목록
         action_frame = tk.LabelFrame(scenario_frame, text="액션 목록")
@@ -237,22 +199,57 @@ class ScreenClickSystem:
         tk.Button(btn_frame, text="액션 추가", command=self.start_area_selection).pack(side="left", padx=2)
         tk.Button(btn_frame, text="시나리오 실행", command=self.run_scenario).pack(side="left", padx=2)
         tk.Button(btn_frame, text="시나리오 삭제", command=self.delete_scenario).pack(side="left", padx=2)
+        tk.Button(btn_frame, text="시나리오 감시", command=self.watch_scenario).pack(side="left", padx=2)
+        tk.Button(btn_frame, text="최근 화면 저장", command=self.dump_flight).pack(side="left", padx=2)
         
         # 시나리오 목록 업데이트
         self.update_scenario_list()
         
-        # 시나리오 선택 이벤트 바인딩
-        self.scenario_listbox.bind('<<ListboxSelect>>', self.on_scenario_select)
+        # 다른 곳에서 추가/수정된 시나리오 파일을 백그라운드 스레드에서 주기적으로 반영
+        self.catalog_wake = threading.Event()
+        self.catalog_stop = threading.Event()
+        threading.Thread(target=self.poll_catalog, name="catalog-poll", daemon=True).start()
     
     def update_scenario_list(self):
-        self.scenario_listbox.delete(0, tk.END)
-        for scenario in self.scenario_manager.list_scenarios():
-            self.scenario_listbox.insert(tk.END, scenario)
+        """메모리의 카탈로그에서 검색해 목록 표시 (디렉토리는 읽지 않음)"""
+        self.search_after_id = None
+        self.scenario_list.set_items(
+            self.scenario_manager.search_scenarios(self.scenario_search_var.get()))
+    
+    def schedule_scenario_search(self):
+        """검색어 입력이 잠시 멈춘 뒤에만 목록 갱신"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(150, self.update_scenario_list)
+    
+    def refresh_scenario_list(self):
+        """시나리오 파일을 저장한 뒤 호출. 카탈로그 갱신을 바로 요청"""
+        self.catalog_wake.set()
+    
+    def poll_catalog(self):
+        """카탈로그 갱신 스레드 (바뀐 파일만 다시 읽음). 바뀌면 GUI 스레드에 목록 갱신 요청"""
+        while not self.catalog_stop.is_set():
+            try:
+                # 반복 실행 회차별 통계는 GUI 스레드에서 메모리에만 기록하고 여기서 모아 저장
+                self.scenario_manager.catalog.flush()
+                changed = self.scenario_manager.catalog.refresh()
+            except Exception as e:
+                print(f"카탈로그 갱신 중 오류 발생: {e}")
+                changed = False
+            if changed and not self.catalog_stop.is_set():
+                self.gui_requests.put(self.update_scenario_list)
+            self.catalog_wake.wait(2.0)
+            self.catalog_wake.clear()
     
     def new_scenario(self):
         name = simpledialog.askstring("시나리오 생성", "시나리오 이름을 입력하세요:")
         if not name:
             return
+        try:
+            name = safe_file_name(name)  # 이미지/위치 파일 이름에도 쓰이므로 경로가 될 수 없는 이름만 허용
+        except ValueError as e:
+            messagebox.showerror("오류", str(e))
+            return
             
         # 새 시나리오 시작
         self.scenario_manager.start_new_scenario(name)
@@ -272,95 +269,144 @@ class ScreenClickSystem:
         self.start_area_selection()
     
     def run_scenario(self):
-        selection = self.scenario_listbox.curselection()
-        if not selection:
+        scenario_name = self.scenario_list.selected
+        if not scenario_name:
             messagebox.showwarning("경고", "실행할 시나리오를 선택해주세요!")
             return
             
-        scenario_name = self.scenario_listbox.get(selection[0])
         actions = self.scenario_manager.load_scenario(scenario_name)
         if not actions:
             return
         
+        # 감지 모드와 동시에 실행하지 않음
+        self.stop_watch()
+        
         # 시나리오 실행 상태 업데이트
-        self.scenario_running = True
         self.scenario_start_button.config(state="disabled")
         self.scenario_stop_button.config(state="normal")
         self.status_label.config(text="시나리오 실행 중...")
         
-        # 정렬된 액션 리스트로 실행
-        sorted_actions = sorted(actions, key=lambda x: x.order)
-        self.execute_scenario_actions(sorted_actions)
+        self.engine.pipelined = self.pipelined_var.get()
+        self.engine.feature_fallback = self.feature_fallback_var.get()
+        self.engine.location_memory = self.scenario_manager.location_memory(scenario_name)
+        graph = self.scenario_manager.load_graph(scenario_name)
+        try:
+            repeat = int(self.repeat_var.get())
+        except ValueError:
+            repeat = 1
+        if repeat != 1:
+            # 반복 실행: 회차별 결과는 상태 표시줄과 카탈로그에만 기록
+            self.soak = SoakRunner(repeat if repeat > 0 else None,
+                                   monitor=MemoryMonitor(probes={"tk_after": lambda: self.tk_after_count}))
+            self.scenario_token = self.engine.start_soak(actions, graph, self.soak)
+        elif graph is not None:
+            # 그래프 시나리오: 단계마다 먼저 보이는 후보의 분기로 이동
+            self.scenario_token = self.engine.start_graph(actions, graph)
+        else:
+            # 정렬된 액션 리스트로 작업 스레드에서 실행
+            sorted_actions = sorted(actions, key=lambda x: x.order)
+            self.scenario_token = self.engine.start_scenario(sorted_actions)
+        self.active_run = self.scenario_token.run_id
+        self.running_scenario = (scenario_name, time.perf_counter())
+    
+    def dump_flight(self):
+        """엔진이 최근 캡처한 검색 영역 화면과 매칭 점수를 파일로 저장 (파일 쓰기는 백그라운드 스레드)"""
+        def dump():
+            path = self.engine.dump_flight("manual")
+            self.gui_requests.put(lambda: self.show_flight_dump(path))
+        threading.Thread(target=dump, name="flight-dump", daemon=True).start()
+    
+    def show_flight_dump(self, path):
+        if path is None:
+            messagebox.showinfo("알림", "저장할 화면 기록이 없습니다.")
+        else:
+            messagebox.showinfo("성공", f"최근 화면 기록을 저장했습니다:\n{path}\n(python -m cli flight {path} --export 폴더)")
+    
+    def record_scenario_run(self, result: str):
+        """실행 결과를 카탈로그에 기록"""
+        if self.running_scenario is not None:
+            name, started = self.running_scenario
+            self.running_scenario = None
+            self.scenario_manager.catalog.record_run(name, result, time.perf_counter() - started)
     
     def stop_scenario(self):
-        self.scenario_running = False
+        if self.scenario_token is not None:
+            self.scenario_token.cancel()
+            if self.active_run == self.scenario_token.run_id:
+                self.active_run = None
+            self.scenario_token = None
+        if self.soak is not None:
+            # 반복 실행은 회차마다 기록했으므로 전체 실행은 기록하지 않음
+            print(f"반복 실행 요약: {SoakRunner.describe_summary(self.soak.summary())}")
+            self.running_scenario = None
+            self.soak = None
+        self.record_scenario_run("stopped")
         self.scenario_start_button.config(state="normal")
         self.scenario_stop_button.config(state="disabled")
         self.status_label.config(text="시나리오 실행 중지됨")
     
-    def execute_scenario_actions(self, actions):
-        if not self.scenario_running:
-            return
-        
-        # 모든 액션이 완료되었는지 확인
-        if not actions:
-            self.stop_scenario()
-            messagebox.showinfo("완료", "시나리오 실행이 완료되었습니다.")
-            return
-        
-        current_action = actions[0]
-        self.current_running_action = current_action
-        
+    def poll_engine_events(self):
+        """엔진이 보낸 이벤트를 GUI 스레드에서 처리"""
         try:
-            # 현재 액션 설정
-            self.search_area = current_action.search_area
-            self.target_image = cv2.imread(current_action.target_image_path)
-            if self.target_image is None:
-                raise Exception(f"이미지를 불러올 수 없습니다: {current_action.target_image_path}")
-            
-            # 상태 업데이트
-            self.status_label.config(text=f"액션 실행 중: {current_action.name}")
-            
-            # 이미지 감지 및 클릭
-            screen = self.capture_screen()
-            if screen is None:
-                raise Exception("화면을 캡처할 수 없습니다.")
-                
-            location = self.find_target(screen)
-            
-            if location is not None:
-                # 클릭 위치로 이동 및 클릭
-                pyautogui.moveTo(current_action.click_position[0], current_action.click_position[1])
-                pyautogui.click()
-                print(f"액션 실행 완료: {current_action.name}")
-                
-                # 대기 시간 후 다음 액션 실행
-                self.root.after(int(current_action.wait_time * 1000), 
-                              lambda: self.execute_scenario_actions(actions[1:]))
-            else:
-                print(f"이미지를 찾을 수 없습니다: {current_action.name}")
-                # 이미지를 찾지 못한 경우 재시도
-                self.root.after(500, lambda: self.execute_scenario_actions(actions))
-                
-        except Exception as e:
-            print(f"액션 실행 중 오류 발생: {e}")
-            messagebox.showerror("오류", f"액션 실행 중 오류가 발생했습니다: {e}")
-            self.stop_scenario()
+            while True:
+                event = self.engine_events.get_nowait()
+                if event.run != self.active_run:
+                    continue  # 이미 중지했거나 다른 실행이 보낸 이벤트
+                if event.kind in ("status", "action_done", "click"):
+                    self.status_label.config(text=event.message)
+                elif event.kind == "iteration":
+                    self.status_label.config(text=event.message)
+                    if self.running_scenario is not None:
+                        self.scenario_manager.catalog.record_run(self.running_scenario[0], event.data["result"],
+                                                                 event.data["seconds"], save=False)
+                elif self.soak is not None and event.kind in ("finished", "stopped", "error"):
+                    print(event.message)
+                    self.stop_scenario()
+                    self.status_label.config(text=event.message)
+                elif event.kind == "finished":
+                    self.record_scenario_run("finished")
+                    self.stop_scenario()
+                    messagebox.showinfo("완료", event.message)
+                elif event.kind == "error" and self.watch_token is not None:
+                    # 감지 모드가 오류로 끝남
+                    self.stop_watch()
+                    messagebox.showerror("오류", event.message)
+                elif event.kind == "error":
+                    self.record_scenario_run("error")
+                    self.stop_scenario()
+                    messagebox.showerror("오류", event.message)
+        except queue.Empty:
+            pass
+        if self.soak is not None:
+            self.tk_after_count = len(self.root.tk.splitlist(self.root.tk.call("after", "info")))
+        self.root.after(16, self.poll_engine_events)
+    
+    def poll_gui_requests(self):
+        """백그라운드 스레드가 큐에 넣은 작업을 GUI 스레드에서 실행"""
+        try:
+            while True:
+                request = self.gui_requests.get_nowait()
+                try:
+                    request()
+                except Exception as e:
+                    print(f"GUI 작업 처리 중 오류 발생: {e}")
+        except queue.Empty:
+            pass
+        self.root.after(16, self.poll_gui_requests)
     
     def delete_scenario(self):
-        selection = self.scenario_listbox.curselection()
-        if not selection:
+        scenario_name = self.scenario_list.selected
+        if not scenario_name:
             messagebox.showwarning("경고", "삭제할 시나리오를 선택해주세요!")
             return
             
-        scenario_name = self.scenario_listbox.get(selection[0])
         if messagebox.askyesno("확인", f"시나리오 '{scenario_name}'을 삭제하시겠습니까?"):
-            try:
-                os.remove(os.path.join(self.scenario_manager.scenarios_dir, f"{scenario_name}.json"))
+            # JSON, 번들, 위치 기록을 함께 삭제
+            if self.scenario_manager.delete_scenario(scenario_name):
                 self.update_scenario_list()
                 messagebox.showinfo("성공", "시나리오가 삭제되었습니다!")
-            except Exception as e:
-                messagebox.showerror("오류", f"시나리오 삭제 중 오류가 발생했습니다: {e}")
+            else:
+                messagebox.showerror("오류", "시나리오 삭제 중 오류가 발생했습니다.")
     
     def start_area_selection(self):
         if not self.listening_for_clicks:
@@ -368,10 +414,9 @@ class ScreenClickSystem:
             self.temp_coords = None
             self.area_button.config(text="영역 설정 중... (우클릭으로 좌표 지정)")
             self.area_label.config(text="왼쪽 상단 좌표를 우클릭하세요")
-            keyboard.on_press(self.check_escape)
-            self.root.after(100, self.check_mouse_click)
+            self.input_listener.start()
     
-    def save_target_image(self):
+    def save_target_image(self, on_saved=None):
         if self.search_area is None:
             messagebox.showwarning("경고", "먼저 영역을 설정해주세요!")
             return
@@ -381,15 +426,16 @@ class ScreenClickSystem:
         screen_width, screen_height = pyautogui.size()
         pyautogui.moveTo(screen_width - 1, screen_height - 1)
         
-        time.sleep(0.2)  # 마우스가 이동할 시간을 줌
-        
+        # 마우스가 이동할 시간을 준 뒤 캡처 (GUI 스레드를 막지 않도록 after 사용)
+        self.root.after(200, lambda: self.grab_target_image(original_pos, on_saved))
+    
+    def grab_target_image(self, original_pos, on_saved=None):
         try:
-            # 스크린샷 캡처
-            screenshot = ImageGrab.grab(bbox=self.search_area)
-            # PIL Image를 numpy 배열로 변환
-            screenshot_np = np.array(screenshot)
-            # BGR 형식으로 변환 (OpenCV 사용을 위해)
-            self.target_image = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
+            # 스크린샷 캡처 후 BGR 사본으로 변환 (OpenCV 저장을 위해)
+            screenshot = self.target_capture_source.grab(self.search_area)
+            if screenshot is None:
+                raise Exception("화면을 캡처할 수 없습니다.")
+            self.target_image = to_bgr(screenshot, self.target_capture_source.layout)
             
             # 이미지 저장
             cv2.imwrite('target.png', self.target_image)
@@ -398,46 +444,51 @@ class ScreenClickSystem:
             print(f"저장된 이미지 크기: {self.target_image.shape}")
             print(f"이미지 타입: {self.target_image.dtype}")
             
-            messagebox.showinfo("알림", "대상 이미지가 저장되었습니다!")
-            self.status_label.config(text="클릭 위치를 설정해주세요.")
-            
         except Exception as e:
             print(f"이미지 저장 중 오류 발생: {e}")
             messagebox.showerror("오류", f"이미지 저장 중 오류가 발생했습니다: {e}")
+            return
         finally:
             # 마우스 원위치
             pyautogui.moveTo(original_pos)
+        
+        messagebox.showinfo("알림", "대상 이미지가 저장되었습니다!")
+        self.status_label.config(text="클릭 위치를 설정해주세요.")
+        if on_saved is not None:
+            on_saved()
+    
+    def notify_input(self):
+        """입력 감지 스레드에서 호출됨. Tk는 건드리지 않고 GUI 스레드에 처리 요청만 보냄"""
+        self.gui_requests.put(self.handle_input_events)
     
-    def check_escape(self, event):
-        if event.name == 'esc' and self.listening_for_clicks:
+    def handle_input_events(self):
+        for input_event in self.input_listener.drain():
+            if not (self.listening_for_clicks or self.listening_for_click_pos):
+                break
+            if input_event.kind == "key" and input_event.button == "esc":
+                self.cancel_selection()
+            elif input_event.kind == "press" and input_event.button == "right":
+                if self.listening_for_clicks:
+                    self.handle_mouse_click(input_event.x, input_event.y)
+                else:
+                    self.handle_click_position(input_event.x, input_event.y)
+    
+    def cancel_selection(self):
+        """ESC: 진행 중인 영역/클릭 위치 지정 취소"""
+        if self.listening_for_clicks:
             self.listening_for_clicks = False
             self.temp_coords = None
             self.area_button.config(text="영역 설정 시작")
             self.area_label.config(text="영역 설정이 취소되었습니다")
-            keyboard.unhook_all()
-    
-    def check_mouse_click(self):
-        if not self.listening_for_clicks:
-            return
-            
-        if self.os_type == 'Windows':
-            # Windows용 마우스 체크
-            if self.win32api.GetKeyState(self.win32con.VK_RBUTTON) < 0:
-                self.handle_mouse_click()
-        else:
-            # Mac용 마우스 체크
-            # PyAutoGUI의 mouseDown() 사용
-            if pyautogui.mouseInfo()[2]:  # 우클릭 확인
-                self.handle_mouse_click()
-                
-        self.root.after(100, self.check_mouse_click)
+        elif self.listening_for_click_pos:
+            self.listening_for_click_pos = False
+            self.status_label.config(text="클릭 위치 설정이 취소되었습니다")
+        self.input_listener.stop()
     
-    def handle_mouse_click(self):
-        x, y = pyautogui.position()
+    def handle_mouse_click(self, x, y):
         if self.temp_coords is None:
             self.temp_coords = (x, y)
             self.area_label.config(text=f"왼쪽 상단 좌표 ({x}, {y})\n오른쪽 하단 좌표를 우클릭하세요")
-            time.sleep(0.1)
         else:
             x1, y1 = self.temp_coords
             x2, y2 = x, y
@@ -451,16 +502,17 @@ class ScreenClickSystem:
             self.area_button.config(text="영역 재설정")
             self.area_label.config(text=f"설정된 영역: ({self.search_area[0]}, {self.search_area[1]}) - "
                                       f"({self.search_area[2]}, {self.search_area[3]})")
-            keyboard.unhook_all()
+            self.input_listener.stop()
             
             self.auto_save_and_setup()
             return
     
     def auto_save_and_setup(self):
         """영역 설정 후 자동으로 이미지 저장 및 시나리오 설정"""
-        # 이미지 자동 저장
-        self.save_target_image()
-        
+        # 이미지 자동 저장 (저장이 끝나면 클릭 위치 설정으로 진행)
+        self.save_target_image(on_saved=self.setup_next_action)
+    
+    def setup_next_action(self):
         # 첫 액션인 경우 새 시나리오 시작
         if self.current_action_order == 1:
             scenario_name = f"Scenario_{time.strftime('%Y%m%d_%H%M%S')}"
@@ -494,7 +546,8 @@ class ScreenClickSystem:
             click_position=self.click_position,
             order=self.current_action_order,
             wait_time=float(self.wait_time_var.get()),  # 설정된 대기 시간 사용
-            search_area=self.search_area
+            search_area=self.search_area,
+            match_mode=self.match_mode_var.get()
         )
         self.scenario_manager.add_action(action)
         
@@ -515,78 +568,22 @@ class ScreenClickSystem:
         else:
             # 시나리오 저장 및 완료
             if self.scenario_manager.save_current_scenario():
-                self.update_scenario_list()
+                self.refresh_scenario_list()
                 messagebox.showinfo("완료", "시나리오가 저장되었습니다!")
                 self.current_action_order = 1
     
     def start_click_selection(self):
         if not self.listening_for_click_pos:
             self.listening_for_click_pos = True
-            keyboard.on_press(self.check_click_escape)
-            self.root.after(100, self.check_click_position)
-    
-    def check_click_position(self):
-        if not self.listening_for_click_pos:
-            return
-            
-        if win32api.GetKeyState(win32con.VK_RBUTTON) < 0:
-            x, y = pyautogui.position()
-            self.click_position = (x, y)
-            self.listening_for_click_pos = False
-            keyboard.unhook_all()
-            
-            # 클릭 위치 설정 완료 후 자동으로 액션 저장
-            self.save_action()
-            return
-                
-        self.root.after(100, self.check_click_position)
+            self.input_listener.start()
     
-    def capture_screen(self):
-        if self.search_area is None:
-            return None
-        
-        try:
-            # 지정된 영역의 스크린샷 캡처
-            screenshot = ImageGrab.grab(bbox=self.search_area)
-            # PIL Image를 numpy 배열로 변환
-            screenshot_np = np.array(screenshot)
-            # BGR 형식으로 변환
-            return cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-        except Exception as e:
-            print(f"화면 캡처 중 오류 발생: {e}")
-            return None
-        
-    def find_target(self, screen):
-        if self.target_image is None or screen is None:
-            return None
-        
-        try:
-            # 템플릿 매칭 수행
-            result = cv2.matchTemplate(screen, self.target_image, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-            
-            # 디버깅을 위한 출력
-            print(f"매칭 신뢰도: {max_val}")
-            
-            # 임계값 이상일 때만 위치 반환
-            if max_val >= 0.8:  # 80% 이상 일치
-                return (
-                    max_loc[0] + self.search_area[0],  # 전체 화면 좌표로 변환
-                    max_loc[1] + self.search_area[1]
-                )
-        except Exception as e:
-            print(f"이미지 매칭 중 오류 발생: {e}")
-            print(f"Target shape: {self.target_image.shape}")
-            print(f"Screen shape: {screen.shape}")
-        return None
+    def handle_click_position(self, x, y):
+        self.click_position = (x, y)
+        self.listening_for_click_pos = False
+        self.input_listener.stop()
         
-    def click_target(self, location):
-        if self.target_image is None or self.click_position is None:
-            return
-            
-        # 설정된 클릭 위치로 이동하여 클릭
-        pyautogui.moveTo(self.click_position[0], self.click_position[1])
-        pyautogui.click()
+        # 클릭 위치 설정 완료 후 자동으로 액션 저장
+        self.save_action()
     
     def toggle_running(self):
         if self.target_image is None:
@@ -596,38 +593,74 @@ class ScreenClickSystem:
             messagebox.showwarning("경고", "먼저 클릭 위치를 설정해주세요!")
             return
             
-        self.running = not self.running
-        self.toggle_button.config(text="감지 중지" if self.running else "감지 시작")
-        self.status_label.config(text="감지 중..." if self.running else "대기 중...")
+        if self.watch_token is not None:
+            self.stop_watch()
+            return
         
-        if self.running:
-            self.run()
+        rule = WatchRule(
+            name="감지",
+            template=self.target_image,
+            search_area=self.search_area,
+            click_position=self.click_position,
+            match_mode=self.match_mode_var.get(),
+            repeat=True,  # 대상이 보이는 동안 틱마다 클릭
+        )
+        self.start_watch([rule])
     
-    def quit_program(self):
-        self.running = False
-        keyboard.unhook_all()
-        self.root.quit()
-        
-    def run(self):
-        if not self.running:
+    def watch_scenario(self):
+        """선택된 시나리오의 모든 액션을 규칙으로 동시에 감시"""
+        if self.watch_token is not None:
+            self.stop_watch()
             return
-            
-        screen = self.capture_screen()
-        location = self.find_target(screen)
         
-        if location is not None:
-            self.click_target(location)
-            self.status_label.config(text=f"클릭 수행: {location}")
+        scenario_name = self.scenario_list.selected
+        if not scenario_name:
+            messagebox.showwarning("경고", "감시할 시나리오를 선택해주세요!")
+            return
         
-        self.root.after(500, self.run)
+        actions = self.scenario_manager.load_scenario(scenario_name)
+        if not actions:
+            return
+        try:
+            rules = rules_from_actions(actions)
+        except Exception as e:
+            messagebox.showerror("오류", f"감시 규칙을 만들 수 없습니다: {e}")
+            return
+        self.start_watch(rules)
     
-    def check_click_escape(self, event):
-        if event.name == 'esc' and self.listening_for_click_pos:
-            self.listening_for_click_pos = False
-            self.click_button.config(text="클릭 위치 설정")
-            self.click_label.config(text="클릭 위치 설정이 취소되었습니다")
-            keyboard.unhook_all()
-
+    def start_watch(self, rules):
+        self.stop_scenario()
+        self.engine.feature_fallback = self.feature_fallback_var.get()
+        self.watch_token = self.engine.start_watch(rules)
+        self.active_run = self.watch_token.run_id
+        self.toggle_button.config(text="감지 중지")
+        self.status_label.config(text=f"감지 중... (규칙 {len(rules)}개)")
+    
+    def stop_watch(self):
+        if self.watch_token is None:
+            return
+        self.watch_token.cancel()
+        if self.active_run == self.watch_token.run_id:
+            self.active_run = None
+        self.watch_token = None
+        report = self.engine.watch_stats.report()
+        self.toggle_button.config(text="감지 시작")
+        self.status_label.config(text=f"대기 중... (틱 {report['ticks']}회, "
+                                      f"틱당 {report['capture_ms_per_tick'] + report['match_ms_per_tick']:.1f}ms)")
+    
+    def quit_program(self):
+        self.catalog_stop.set()
+        self.catalog_wake.set()
+        self.scenario_manager.catalog.flush()
+        self.engine.cancel()
+        # 작업 스레드가 캡처 프레임을 다 쓸 때까지 기다린 뒤 백엔드를 닫음
+        self.engine.join(timeout=5)
+        self.input_listener.close()
+        self.capture_source.close()
+        self.target_capture_source.close()
+        self.input_sink.close()
+        self.root.quit()
+        
     def move_action_up(self):
         selection = self.action_listbox.curselection()
         if not selection or selection[0] == 0:  # 첫 번째 항목은 위로 이동 불가
@@ -670,12 +703,8 @@ class ScreenClickSystem:
             for action in sorted(self.scenario_manager.current_actions, key=lambda x: x.order):
                 self.action_listbox.insert(tk.END, f"{action.order}. {action.name}")
 
-    def on_scenario_select(self, event):
-        selection = self.scenario_listbox.curselection()
-        if not selection:
-            return
-            
-        scenario_name = self.scenario_listbox.get(selection[0])
+    def on_scenario_select(self, scenario_name):
+        # 파일이 바뀌지 않았으면 다시 읽지 않고 캐시된 액션을 사용
         actions = self.scenario_manager.load_scenario(scenario_name)
         if actions:
             self.scenario_manager.current_scenario = scenario_name
@@ -684,12 +713,11 @@ class ScreenClickSystem:
 
     # 시나리오 이름 수정 메서드 추가
     def rename_scenario(self):
-        selection = self.scenario_listbox.curselection()
-        if not selection:
+        old_name = self.scenario_list.selected
+        if not old_name:
             messagebox.showwarning("경고", "수정할 시나리오를 선택해주세요!")
             return
             
-        old_name = self.scenario_listbox.get(selection[0])
         new_name = simpledialog.askstring("시나리오 이름 수정", 
                                         "새로운 이름을 입력하세요:",
                                         initialvalue=old_name)
@@ -698,58 +726,20 @@ class ScreenClickSystem:
             return
             
         try:
-            # 파일 이름 변경
-            old_path = os.path.join(self.scenario_manager.scenarios_dir, f"{old_name}.json")
-            new_path = os.path.join(self.scenario_manager.scenarios_dir, f"{new_name}.json")
-            
-            if os.path.exists(new_path):
-                messagebox.showerror("오류", "같은 이름의 시나리오가 이미 존재합니다!")
-                return
-            
-            # 이미지 파일들의 이름 변경
-            images_dir = os.path.join(self.scenario_manager.scenarios_dir, "images")
-            old_to_new_paths = {}  # 이미지 경로 매핑 저장
-            
-            for filename in os.listdir(images_dir):
-                if filename.startswith(f"{old_name}_action_"):
-                    old_image_path = os.path.join(images_dir, filename)
-                    new_filename = filename.replace(f"{old_name}_action_", f"{new_name}_action_")
-                    new_image_path = os.path.join(images_dir, new_filename)
-                    os.rename(old_image_path, new_image_path)
-                    # 상대 경로로 매핑 저장
-                    old_rel_path = os.path.join("images", filename)
-                    new_rel_path = os.path.join("images", new_filename)
-                    old_to_new_paths[old_rel_path] = new_rel_path
-            
-            # 시나리오 데이터 업데이트
-            with open(old_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            data["name"] = new_name
-            # 이미지 경로 업데이트
-            for action in data["actions"]:
-                old_image_path = action["target_image"]
-                # scenarios 디렉토리 기준 상대 경로로 변환
-                rel_path = os.path.relpath(old_image_path, self.scenario_manager.scenarios_dir)
-                if rel_path in old_to_new_paths:
-                    # 새로운 경로로 업데이트
-                    action["target_image"] = os.path.join(self.scenario_manager.scenarios_dir, 
-                                                        old_to_new_paths[rel_path])
-            
-            # 새 파일로 저장
-            with open(new_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            
-            # 기존 파일 삭제
-            os.remove(old_path)
-            
-            # UI 업데이트
+            exists = self.scenario_manager.scenario_path(new_name) is not None
+        except ValueError as e:
+            messagebox.showerror("오류", str(e))
+            return
+        if exists:
+            messagebox.showerror("오류", "같은 이름의 시나리오가 이미 존재합니다!")
+            return
+        
+        # JSON, 번들, 위치 기록, 액션 이미지를 함께 옮김
+        if self.scenario_manager.rename_scenario(old_name, new_name):
             self.update_scenario_list()
             messagebox.showinfo("성공", "시나리오 이름이 변경되었습니다!")
-            
-        except Exception as e:
-            messagebox.showerror("오류", f"이름 변경 중 오류가 발생했습니다: {e}")
-            print(f"Error details: {e}")  # 디버깅을 위한 상세 오류 출력
+        else:
+            messagebox.showerror("오류", "이름 변경 중 오류가 발생했습니다.")
 
     def delete_action(self):
         """선택된 액션 삭제"""
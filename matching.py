@@ -0,0 +1,460 @@
+"""템플릿 매칭 엔진
+
+`default`  : 기존과 동일한 전체 해상도 3채널 TM_CCOEFF_NORMED 매칭
+`pyramid`  : 축소된 흑백 피라미드에서 후보를 찾은 뒤, 후보 주변의 작은 창만
+             전체 해상도 컬러로 다시 매칭 (최종 신뢰도 기준은 default와 동일)
+`multiscale`: 미리 만들어 둔 배율별 템플릿 중 디스플레이에서 마지막으로 성공한
+             배율부터 시도하고, 실패했을 때만 나머지 배율을 시도
+`exact`    : 픽셀이 완전히 같은 위치를 찾음 (화면에서 그대로 캡처한 UI 요소용).
+             지난번 위치를 먼저 확인하고, 템플릿에서 드문 색의 기준 픽셀이 같은 위치만
+             후보로 골라 전체 픽셀을 비교한다. 없으면 default 매칭으로 대체
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from capture import convert_layout
+
+MATCH_THRESHOLD = 0.8  # 80% 이상 일치
+MATCH_MODES = ("default", "pyramid", "multiscale", "exact")
+EXACT_ANCHORS = 2  # 정확 일치 후보를 거르는 기준 픽셀 수
+# 100/125/150% 디스플레이 사이의 배율 비율
+DEFAULT_SCALES = (1.0, 1.25, 1.5, 0.8, 1.2, 0.8333, 0.6667)
+
+_GRAY_CONVERSIONS = {
+    "BGR": cv2.COLOR_BGR2GRAY,
+    "RGB": cv2.COLOR_RGB2GRAY,
+    "BGRA": cv2.COLOR_BGRA2GRAY,
+}
+
+
+@dataclass
+class MatchResult:
+    location: Optional[Tuple[int, int]]  # 검색 영역 기준 좌상단 좌표
+    score: float
+    mode: str
+    timings: Dict[str, float] = field(default_factory=dict)  # 단계별 소요 시간 (초)
+    threshold: float = MATCH_THRESHOLD
+    scale: float = 1.0  # 매칭된 템플릿 배율
+
+    @property
+    def found(self) -> bool:
+        return self.location is not None and self.score >= self.threshold
+
+
+def to_gray(image: np.ndarray, layout: str) -> np.ndarray:
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, _GRAY_CONVERSIONS[layout])
+
+
+def downsample(image: np.ndarray, level: int) -> np.ndarray:
+    """1/2^level 축소. 블록 평균(INTER_AREA)이라 템플릿 경계가 배경과 섞이지 않는다"""
+    if level == 0:
+        return image
+    factor = 1.0 / (1 << level)
+    return cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+
+
+class PreparedTemplate:
+    """매칭 모드별로 필요한 템플릿 파생 데이터를 한 번만 계산해 보관
+
+    `source`는 BGR 원본이고, `template`은 캡처 프레임과 같은 채널 순서로
+    변환된 사본이다.
+    """
+
+    def __init__(self, source: np.ndarray, layout: str):
+        self.source = source
+        self.template = convert_layout(source, "BGR", layout)
+        self.layout = layout
+        self.artifact = None  # 사전 컴파일 산출물 (template_artifacts.TemplateArtifact)
+        self._gray_pyramid: List[np.ndarray] = []
+        self._scaled: Dict[float, np.ndarray] = {}
+        self._anchors: Optional[List[Tuple[int, int, Tuple[int, ...]]]] = None
+        self.last_exact: Dict[Tuple[int, int], Tuple[int, int]] = {}  # 검색 영역 크기별 마지막 정확 일치 위치
+
+    def seed(self, artifact):
+        """저장된 산출물의 흑백 피라미드를 그대로 사용 (흑백 변환은 채널 순서와 무관)"""
+        self.artifact = artifact
+        if not self._gray_pyramid:
+            self._gray_pyramid = list(artifact.pyramid)
+
+    def gray_pyramid(self, levels: int) -> List[np.ndarray]:
+        """[원본 흑백, 1/2, 1/4, ...] 순서의 흑백 피라미드"""
+        if not self._gray_pyramid:
+            self._gray_pyramid.append(to_gray(self.template, self.layout))
+        while len(self._gray_pyramid) <= levels:
+            self._gray_pyramid.append(downsample(self._gray_pyramid[0], len(self._gray_pyramid)))
+        return self._gray_pyramid[:levels + 1]
+
+    def anchors(self) -> List[Tuple[int, int, Tuple[int, ...]]]:
+        """정확 일치 후보를 거를 기준 픽셀 [(y, x, 색)]. 템플릿 안에서 드문 색부터 (알파 채널 제외)"""
+        if self._anchors is None:
+            tw = self.template.shape[1]
+            pixels = self.template[..., :3].reshape(-1, 3)
+            _, first, counts = np.unique(pixels, axis=0, return_index=True, return_counts=True)
+            anchors = []
+            for index in np.argsort(counts, kind="stable")[:EXACT_ANCHORS]:
+                y, x = divmod(int(first[index]), tw)
+                anchors.append((y, x, tuple(int(value) for value in pixels[first[index]])))
+            self._anchors = anchors
+        return self._anchors
+
+    def scaled(self, scale: float) -> np.ndarray:
+        """배율이 적용된 템플릿 (배율별로 한 번만 생성)"""
+        variant = self._scaled.get(scale)
+        if variant is None:
+            if scale == 1.0:
+                variant = self.template
+            else:
+                th, tw = self.template.shape[:2]
+                size = (max(1, round(tw * scale)), max(1, round(th * scale)))
+                interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+                variant = cv2.resize(self.template, size, interpolation=interpolation)
+            self._scaled[scale] = variant
+        return variant
+
+
+class TemplateMatcher:
+    def __init__(self, threshold: float = MATCH_THRESHOLD, pyramid_levels: int = 2,
+                 pyramid_candidates: int = 3, coarse_floor: float = 0.4,
+                 scales: Tuple[float, ...] = DEFAULT_SCALES, max_prepared: int = 64,
+                 max_exact_candidates: int = 256):
+        self.threshold = threshold
+        self.scales = scales
+        self.last_scale: Dict[str, float] = {}  # 디스플레이별 마지막 성공 배율
+        self.pyramid_levels = pyramid_levels
+        self.pyramid_candidates = pyramid_candidates
+        self.coarse_floor = coarse_floor  # 이보다 낮은 축소 단계 후보는 정밀 매칭 생략
+        self.max_prepared = max_prepared
+        # 기준 픽셀이 같은 위치가 이보다 많으면 (단색 템플릿 등) 정확 비교 대신 default 매칭
+        self.max_exact_candidates = max_exact_candidates
+        self._prepared: "OrderedDict[Tuple[int, str], PreparedTemplate]" = OrderedDict()
+
+    def prepare(self, template: np.ndarray, layout: str = "BGR") -> PreparedTemplate:
+        """BGR 템플릿의 준비 데이터 반환 (같은 배열 객체에 대해서는 재사용)"""
+        key = (id(template), layout)
+        prepared = self._prepared.get(key)
+        # id 재사용에 대비해 같은 객체인지 확인
+        if prepared is None or prepared.source is not template:
+            prepared = PreparedTemplate(template, layout)
+            self._prepared[key] = prepared
+            while len(self._prepared) > self.max_prepared:
+                self._prepared.popitem(last=False)
+        else:
+            self._prepared.move_to_end(key)
+        return prepared
+
+    def warm(self, template: np.ndarray, mode: str, layout: str = "BGR", artifact=None):
+        """시나리오 로드 시 모드에 필요한 파생 템플릿을 미리 생성 (`artifact`가 있으면 재사용)"""
+        prepared = self.prepare(template, layout)
+        if artifact is not None:
+            prepared.seed(artifact)
+        if mode == "pyramid":
+            prepared.gray_pyramid(self.pyramid_levels)
+        elif mode == "multiscale":
+            for scale in self.scales:
+                prepared.scaled(scale)
+        elif mode == "exact":
+            prepared.anchors()
+
+    def match(self, screen: np.ndarray, template: np.ndarray,
+              mode: str = "default", layout: str = "BGR",
+              display: str = "") -> MatchResult:
+        """`template`은 BGR, `screen`은 `layout` 채널 순서"""
+        prepared = self.prepare(template, layout)
+        if mode == "pyramid":
+            return self.match_pyramid(screen, prepared)
+        if mode == "multiscale":
+            return self.match_multiscale(screen, prepared, display)
+        if mode == "exact":
+            return self.match_exact(screen, prepared)
+        return self.match_default(screen, prepared.template)
+
+    def match_default(self, screen: np.ndarray, template: np.ndarray) -> MatchResult:
+        start = time.perf_counter()
+        result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        return MatchResult(max_loc, max_val, "default",
+                           {"full": time.perf_counter() - start}, self.threshold)
+
+    def match_exact(self, screen: np.ndarray, prepared: PreparedTemplate) -> MatchResult:
+        """픽셀이 완전히 같은 위치 (점수 1.0). 없으면 default 매칭 결과 (mode로 구분)"""
+        start = time.perf_counter()
+        location = self._find_exact(screen, prepared)
+        elapsed = time.perf_counter() - start
+        if location is not None:
+            return MatchResult(location, 1.0, "exact", {"exact": elapsed}, self.threshold)
+        result = self.match_default(screen, prepared.template)
+        result.timings = {"exact": elapsed, **result.timings}
+        return result
+
+    def _find_exact(self, screen: np.ndarray, prepared: PreparedTemplate) -> Optional[Tuple[int, int]]:
+        template = prepared.template
+        th, tw = template.shape[:2]
+        sh, sw = screen.shape[:2]
+        if screen.ndim != 3 or sh < th or sw < tw:
+            return None
+
+        # 정적인 UI는 대부분 지난번 위치에 그대로 있음
+        last = prepared.last_exact.get((sh, sw))
+        if last is not None and _same_pixels(screen, template, last):
+            return last
+
+        # 기준 픽셀 색이 같은 좌상단 위치만 후보로 (각 기준 픽셀만큼 밀린 창에서 색 비교)
+        rows, cols = sh - th + 1, sw - tw + 1
+        mask = None
+        for y, x, color in prepared.anchors():
+            lower, upper = _color_bounds(color, screen.shape[2])
+            hits = cv2.inRange(screen[y:y + rows, x:x + cols], lower, upper)
+            mask = hits if mask is None else cv2.bitwise_and(mask, hits, dst=mask)
+        candidates = cv2.findNonZero(mask)
+        if candidates is None or len(candidates) > self.max_exact_candidates:
+            return None
+
+        # 후보마다 전체 픽셀 비교 (행 우선 순서로 첫 일치, default의 minMaxLoc과 같은 순서)
+        for x, y in candidates.reshape(-1, 2):
+            location = (int(x), int(y))
+            if _same_pixels(screen, template, location):
+                prepared.last_exact[(sh, sw)] = location
+                return location
+        return None
+
+    def match_pyramid(self, screen: np.ndarray, prepared: PreparedTemplate) -> MatchResult:
+        template = prepared.template
+        th, tw = template.shape[:2]
+        sh, sw = screen.shape[:2]
+
+        # 템플릿이 너무 작아지지 않는 범위에서 피라미드 단계 결정
+        levels = self.pyramid_levels
+        while levels > 0 and (min(th, tw) >> levels) < 8:
+            levels -= 1
+        if levels == 0 or th > sh or tw > sw:
+            return self.match_default(screen, template)
+
+        timings = {}
+        start = time.perf_counter()
+        coarse_screen = downsample(to_gray(screen, prepared.layout), levels)
+        coarse_template = prepared.gray_pyramid(levels)[levels]
+        now = time.perf_counter()
+        timings["downsample"] = now - start
+
+        start = now
+        coarse = cv2.matchTemplate(coarse_screen, coarse_template, cv2.TM_CCOEFF_NORMED)
+        candidates = self._top_candidates(coarse, coarse_template.shape[:2])
+        now = time.perf_counter()
+        timings[f"level_{levels}"] = now - start
+
+        # 후보 주변 창만 전체 해상도 컬러로 정밀 매칭
+        start = now
+        scale = 1 << levels
+        pad = scale * 2
+        best_loc, best_val = None, -1.0
+        for (cx, cy), _ in candidates:
+            x1 = max(0, cx * scale - pad)
+            y1 = max(0, cy * scale - pad)
+            x2 = min(sw, cx * scale + tw + pad)
+            y2 = min(sh, cy * scale + th + pad)
+            if x2 - x1 < tw or y2 - y1 < th:
+                continue
+            window = screen[y1:y2, x1:x2]
+            result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            if max_val > best_val:
+                best_val = max_val
+                best_loc = (x1 + max_loc[0], y1 + max_loc[1])
+        timings["level_0"] = time.perf_counter() - start
+
+        return MatchResult(best_loc, best_val, "pyramid", timings, self.threshold)
+
+    def match_multiscale(self, screen: np.ndarray, prepared: PreparedTemplate,
+                         display: str = "") -> MatchResult:
+        # 마지막 성공 배율을 먼저, 나머지는 설정된 순서대로 시도
+        first = self.last_scale.get(display, self.scales[0])
+        order = [first] + [scale for scale in self.scales if scale != first]
+
+        sh, sw = screen.shape[:2]
+        timings = {}
+        best = MatchResult(None, -1.0, "multiscale", timings, self.threshold)
+        for scale in order:
+            template = prepared.scaled(scale)
+            th, tw = template.shape[:2]
+            if th > sh or tw > sw:
+                continue
+            start = time.perf_counter()
+            result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            timings[f"scale_{scale:g}"] = time.perf_counter() - start
+            if max_val > best.score:
+                best.location, best.score, best.scale = max_loc, max_val, scale
+            if max_val >= self.threshold:
+                self.last_scale[display] = scale
+                break
+        return best
+
+    def _top_candidates(self, result: np.ndarray, template_shape: Tuple[int, int]):
+        """겹치지 않는 상위 후보 위치들 (비최대 억제)"""
+        th, tw = template_shape
+        candidates = []
+        for _ in range(self.pyramid_candidates):
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            if max_val < self.coarse_floor:
+                break
+            candidates.append((max_loc, max_val))
+            x, y = max_loc
+            result[max(0, y - th // 2):y + th // 2 + 1, max(0, x - tw // 2):x + tw // 2 + 1] = -1.0
+        return candidates
+
+
+def _color_bounds(color: Tuple[int, ...], channels: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """cv2.inRange용 하한/상한. 알파 채널은 값과 무관하게 통과"""
+    if channels == 4:
+        return color + (0,), color + (255,)
+    return color, color
+
+
+def _same_pixels(screen: np.ndarray, template: np.ndarray, location: Tuple[int, int]) -> bool:
+    x, y = location
+    th, tw = template.shape[:2]
+    window = screen[y:y + th, x:x + tw, :3]
+    return window.shape[:2] == (th, tw) and np.array_equal(window, template[..., :3])
+
+
+class BatchMatcher:
+    """하나의 프레임에 여러 템플릿을 한 번에 매칭 (FFT 기반 TM_CCOEFF_NORMED)
+
+    프레임은 채널별로 한 번만 DFT하고, 템플릿마다 (미리 계산해 둔) 템플릿 스펙트럼과
+    곱한 뒤 역변환 한 번으로 상관값을 구한다. 분모(창별 분산)는 프레임의 적분 영상으로
+    계산하며, 정규화와 평탄한 창 처리는 OpenCV의 TM_CCOEFF_NORMED와 같다.
+    템플릿 스펙트럼은 패딩된 프레임 크기별로 캐시한다.
+    """
+
+    def __init__(self, threshold: float = MATCH_THRESHOLD, max_spectra: int = 256):
+        self.threshold = threshold
+        self.max_spectra = max_spectra
+        # (id(템플릿), 채널 순서, 패딩 높이, 패딩 너비) -> (템플릿, 채널별 스펙트럼, 템플릿 노름)
+        self._spectra: "OrderedDict[Tuple[int, str, int, int], Tuple[np.ndarray, List[np.ndarray], float]]" = OrderedDict()
+
+    def match_many(self, screen: np.ndarray, templates: List[np.ndarray],
+                   layout: str = "BGR") -> List[MatchResult]:
+        """`templates`는 BGR, `screen`은 `layout` 채널 순서. 템플릿 순서대로 결과 반환"""
+        start = time.perf_counter()
+        sh, sw = screen.shape[:2]
+        fitting = [template for template in templates if template.shape[0] <= sh and template.shape[1] <= sw]
+        if not fitting:
+            return [MatchResult(None, -1.0, "batch", {}, self.threshold) for _ in templates]
+
+        # 상관값이 한 바퀴 돌아 겹치지 않도록 (프레임 + 가장 큰 템플릿) 크기로 패딩
+        max_th = max(template.shape[0] for template in fitting)
+        max_tw = max(template.shape[1] for template in fitting)
+        ph = cv2.getOptimalDFTSize(sh + max_th - 1)
+        pw = cv2.getOptimalDFTSize(sw + max_tw - 1)
+
+        # 프레임 채널별 DFT (채널 평균을 빼서 float32 정밀도 확보. 템플릿이 평균 0이므로 결과는 같음)
+        frame = np.asarray(screen, dtype=np.float32)
+        if frame.ndim == 2:
+            frame = frame[:, :, None]
+        channels = 3 if layout in ("BGR", "RGB") else frame.shape[2]
+        frame = frame[:, :, :channels]
+        frame_spectra = []
+        for c in range(channels):
+            channel = frame[:, :, c] - frame[:, :, c].mean()
+            padded = np.zeros((ph, pw), np.float32)
+            padded[:sh, :sw] = channel
+            frame_spectra.append(cv2.dft(padded, nonzeroRows=sh))
+        # 창별 합(채널별)과 제곱합(채널 합산)용 적분 영상
+        frame64 = frame.astype(np.float64)
+        sum_tables = [cv2.integral(frame64[:, :, c]) for c in range(channels)]
+        sq_table = cv2.integral(np.square(frame64[:, :, :channels]).sum(axis=2))
+        frame_time = time.perf_counter() - start
+
+        results = []
+        denominators: Dict[Tuple[int, int], np.ndarray] = {}
+        for template in templates:
+            th, tw = template.shape[:2]
+            if th > sh or tw > sw:
+                results.append(MatchResult(None, -1.0, "batch", {}, self.threshold))
+                continue
+            start = time.perf_counter()
+            spectra, template_norm = self._template_spectra(template, layout, channels, ph, pw)
+
+            accumulated = cv2.mulSpectrums(frame_spectra[0], spectra[0], 0, conjB=True)
+            for c in range(1, channels):
+                accumulated += cv2.mulSpectrums(frame_spectra[c], spectra[c], 0, conjB=True)
+            correlation = cv2.idft(accumulated, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
+            numerator = correlation[:sh - th + 1, :sw - tw + 1].astype(np.float64)
+
+            # 분모는 템플릿 크기에만 의존하므로 같은 크기의 템플릿끼리 공유
+            rows, cols = numerator.shape
+            denominator = denominators.get((th, tw))
+            if denominator is None:
+                denominator = denominators[(th, tw)] = self._denominator(sum_tables, sq_table, th, tw, rows, cols)
+            scores = self._normalize(numerator, denominator, template_norm)
+            _, max_val, _, max_loc = cv2.minMaxLoc(scores)
+            results.append(MatchResult(max_loc, max_val, "batch",
+                                       {"frame": frame_time, "template": time.perf_counter() - start},
+                                       self.threshold))
+        return results
+
+    def _template_spectra(self, template: np.ndarray, layout: str, channels: int,
+                          ph: int, pw: int) -> Tuple[List[np.ndarray], float]:
+        key = (id(template), layout, ph, pw)
+        entry = self._spectra.get(key)
+        # id 재사용에 대비해 같은 객체인지 확인
+        if entry is not None and entry[0] is template:
+            self._spectra.move_to_end(key)
+            return entry[1], entry[2]
+
+        converted = convert_layout(template, "BGR", layout).astype(np.float32)
+        if converted.ndim == 2:
+            converted = converted[:, :, None]
+        th, tw = converted.shape[:2]
+        spectra = []
+        norm = 0.0
+        for c in range(channels):
+            channel = converted[:, :, c] - converted[:, :, c].mean()
+            norm += float(np.square(channel, dtype=np.float64).sum())
+            padded = np.zeros((ph, pw), np.float32)
+            padded[:th, :tw] = channel
+            spectra.append(cv2.dft(padded, nonzeroRows=th))
+
+        entry = (template, spectra, np.sqrt(norm))
+        self._spectra[key] = entry
+        while len(self._spectra) > self.max_spectra:
+            self._spectra.popitem(last=False)
+        return entry[1], entry[2]
+
+    @staticmethod
+    def _denominator(sum_tables: List[np.ndarray], sq_table: np.ndarray, th: int, tw: int,
+                     rows: int, cols: int) -> np.ndarray:
+        """창별 표준편차 항 sqrt(Σ(I - 창 평균)^2). 평탄한 창(반올림 오차 수준의 분산)은 inf"""
+        def box(table):
+            return (table[th:th + rows, tw:tw + cols] - table[:rows, tw:tw + cols]
+                    - table[th:th + rows, :cols] + table[:rows, :cols])
+
+        window_sq = box(sq_table)
+        variance = window_sq - sum(np.square(box(table)) for table in sum_tables) / (th * tw)
+        flat = variance <= np.minimum(0.5, 10 * np.finfo(np.float32).eps * window_sq)
+        np.sqrt(np.maximum(variance, 0, out=variance), out=variance)
+        variance[flat] = np.inf
+        return variance
+
+    @staticmethod
+    def _normalize(numerator: np.ndarray, denominator: np.ndarray, template_norm: float) -> np.ndarray:
+        """OpenCV TM_CCOEFF_NORMED와 같은 정규화"""
+        if template_norm < np.finfo(np.float64).eps:
+            return np.ones(numerator.shape, np.float32)
+
+        scores = numerator / denominator
+        scores /= template_norm
+        # 반올림 오차로 |점수| >= 1이 된 드문 위치만 OpenCV와 같이 보정
+        over = np.nonzero(np.abs(scores) >= 1)
+        if over[0].size:
+            values = scores[over]
+            scores[over] = np.where(np.abs(values) < 1.125, np.sign(values), 0)
+        return scores.astype(np.float32)
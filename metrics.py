@@ -0,0 +1,219 @@
+"""시나리오 실행 계측: 지연시간 히스토그램, 매칭 신뢰도 분포, 재시도/탐색 시간
+
+내보내기 형식
+- Prometheus 텍스트 파일 (`write_prometheus`)
+- JSONL 이벤트 로그 (`write_jsonl`)
+- Chrome trace / Perfetto 파일 (`write_chrome_trace`)
+
+기록은 메모리에서만 이루어지고(파일 I/O 없음), 내보내기를 호출할 때만 디스크에 쓴다.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.99, 1.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막은 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Instrumentation:
+    """엔진 계측 기록기
+
+    `trace`가 켜져 있으면 구간(span)마다 Chrome trace 이벤트도 함께 보관한다.
+    이벤트와 trace는 최근 `max_events`개만 유지한다.
+    """
+
+    def __init__(self, enabled: bool = True, trace: bool = False, max_events: int = 100_000):
+        self.enabled = enabled
+        self.trace = trace
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._events: deque = deque(maxlen=max_events)
+        self._trace_events: deque = deque(maxlen=max_events)
+        self._origin = time.perf_counter()
+        self._wall_origin = time.time()
+
+    # ------------------------------------------------------------------
+    # 기록
+    # ------------------------------------------------------------------
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1.0, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def event(self, kind: str, **fields):
+        """JSONL 이벤트 로그에 한 줄 추가"""
+        if not self.enabled:
+            return
+        record = {"ts": self._wall_origin + (time.perf_counter() - self._origin), "event": kind}
+        record.update(fields)
+        with self._lock:
+            self._events.append(record)
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """구간 소요 시간을 `<name>_seconds` 히스토그램(과 trace)에 기록"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.observe(f"{name}_seconds", end - start, **labels)
+            if self.trace:
+                with self._lock:
+                    self._trace_events.append({
+                        "name": name,
+                        "cat": name,
+                        "ph": "X",
+                        "ts": (start - self._origin) * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": labels,
+                    })
+
+    def observe_confidence(self, score: float, **labels):
+        self.observe("match_confidence", score, CONFIDENCE_BUCKETS, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._events.clear()
+            self._trace_events.clear()
+
+    # ------------------------------------------------------------------
+    # 조회 / 내보내기
+    # ------------------------------------------------------------------
+    def total(self, name: str) -> float:
+        """라벨과 무관하게 합산한 값. 카운터는 값의 합, 히스토그램은 관측 횟수의 합"""
+        with self._lock:
+            counters = sum(value for (key, _), value in self._counters.items() if key == name)
+            histograms = sum(histogram.count for (key, _), histogram in self._histograms.items() if key == name)
+        return counters + histograms
+
+    def summary(self) -> dict:
+        """히스토그램별 횟수/평균, 카운터 값"""
+        with self._lock:
+            return {
+                "histograms": {
+                    _metric_name(name, labels): {
+                        "count": histogram.count,
+                        "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                    }
+                    for (name, labels), histogram in self._histograms.items()
+                },
+                "counters": {
+                    _metric_name(name, labels): value
+                    for (name, labels), value in self._counters.items()
+                },
+            }
+
+    def prometheus_text(self, prefix: str = "autoclicker_") -> str:
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        declared = set()
+        for (name, labels), histogram in histograms:
+            metric = prefix + name
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_format_labels(labels, le=repr(bound))} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, le='+Inf')} {histogram.count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+
+        for (name, labels), value in counters:
+            metric = prefix + name
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        # node_exporter textfile 수집기가 쓰다 만 파일을 읽지 않도록 임시 파일 후 교체
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+
+    def write_jsonl(self, path: str):
+        with self._lock:
+            events = list(self._events)
+        with open(path, "w", encoding="utf-8") as f:
+            for record in events:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_chrome_trace(self, path: str):
+        with self._lock:
+            events = list(self._trace_events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+    def export(self, directory: str):
+        """디렉토리에 세 가지 형식을 모두 저장"""
+        os.makedirs(directory, exist_ok=True)
+        self.write_prometheus(os.path.join(directory, "metrics.prom"))
+        self.write_jsonl(os.path.join(directory, "events.jsonl"))
+        if self.trace:
+            self.write_chrome_trace(os.path.join(directory, "trace.json"))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, **extra) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+def _metric_name(name: str, labels: Labels) -> str:
+    return name + _format_labels(labels)
+
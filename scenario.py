@@ -0,0 +1,584 @@
+"""시나리오/액션 데이터와 저장소 (GUI 없이도 사용 가능)"""
+
+import os
+import copy
+import json
+import cv2
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Optional
+from template_cache import template_cache
+from bundle import BUNDLE_EXT, is_template_key, read_bundle, template_key, write_bundle
+from catalog import ScenarioCatalog, scenario_source
+from location_memory import LocationMemory
+from template_artifacts import artifact_path, artifact_store
+
+@dataclass
+class Action:
+    name: str
+    target_image_path: str
+    click_position: Optional[Tuple[int, int]]  # None이면 클릭 없이 분기 조건으로만 사용 (그래프 시나리오)
+    order: int  # 액션 실행 순서
+    wait_time: float = 1.0  # 액션 실행 후 대기 시간 (초)
+    search_area: Optional[Tuple[int, int, int, int]] = None
+    match_mode: str = "default"  # 매칭 방식 ("default", "pyramid", "multiscale", "exact")
+
+@dataclass
+class Branch:
+    action: str  # 후보 액션 이름
+    next: Optional[str] = None  # 이 대상이 먼저 보이면 이동할 단계 (None이면 시나리오 종료)
+
+@dataclass
+class Step:
+    """한 단계: 후보 대상들을 동시에 기다렸다가 먼저 보이는 대상의 분기로 이동"""
+    name: str
+    branches: List[Branch]
+    timeout: Optional[float] = None  # 제한 시간 (초, None이면 무제한)
+    on_timeout: Optional[str] = None  # 제한 시간 초과 시 이동할 단계 (None이면 실패)
+
+@dataclass
+class ScenarioGraph:
+    """그래프 시나리오. 시나리오 JSON의 "graph" 항목에 저장된다
+
+        "graph": {"start": "로그인", "steps": [
+            {"name": "로그인", "timeout": 30, "on_timeout": "재시도",
+             "branches": [{"action": "Action_1", "next": "메인"},
+                          {"action": "오류 팝업", "next": "로그인"}]},
+            ...]}
+
+    분기의 "action"은 같은 파일 "actions"에 있는 액션 이름이다.
+    """
+    start: str
+    steps: Dict[str, Step] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict, action_names) -> "ScenarioGraph":
+        steps = {}
+        for item in data["steps"]:
+            if item["name"] in steps:
+                raise ValueError(f"단계 이름이 중복되었습니다: {item['name']}")
+            steps[item["name"]] = Step(
+                name=item["name"],
+                branches=[Branch(branch["action"], branch.get("next")) for branch in item["branches"]],
+                timeout=item.get("timeout"),
+                on_timeout=item.get("on_timeout"),
+            )
+        graph = cls(data["start"], steps)
+        graph.validate(action_names)
+        return graph
+
+    def to_dict(self) -> dict:
+        return {
+            "start": self.start,
+            "steps": [
+                {
+                    "name": step.name,
+                    "timeout": step.timeout,
+                    "on_timeout": step.on_timeout,
+                    "branches": [{"action": branch.action, "next": branch.next} for branch in step.branches]
+                }
+                for step in self.steps.values()
+            ]
+        }
+
+    def validate(self, action_names):
+        """시작 단계, 분기 대상, 후보 액션 이름이 모두 존재하는지 확인"""
+        action_names = set(action_names)
+        if self.start not in self.steps:
+            raise ValueError(f"시작 단계가 없습니다: {self.start}")
+        for step in self.steps.values():
+            if not step.branches:
+                raise ValueError(f"후보 대상이 없는 단계입니다: {step.name}")
+            for branch in step.branches:
+                if branch.action not in action_names:
+                    raise ValueError(f"{step.name}: 액션이 없습니다: {branch.action}")
+                if branch.next is not None and branch.next not in self.steps:
+                    raise ValueError(f"{step.name}: 다음 단계가 없습니다: {branch.next}")
+            if step.on_timeout is not None and step.on_timeout not in self.steps:
+                raise ValueError(f"{step.name}: 시간 초과 시 이동할 단계가 없습니다: {step.on_timeout}")
+
+def safe_file_name(name: str) -> str:
+    """시나리오/이미지 이름을 디렉토리 밖을 가리킬 수 없는 파일 이름으로 확인
+
+    경로 구분자나 `..`이 들어 있으면 ValueError.
+    """
+    name = str(name).strip()
+    if (name in ("", ".", "..") or any(char in name for char in "/\\:\0")
+            or os.path.basename(name) != name):
+        raise ValueError(f"사용할 수 없는 이름입니다: {name!r}")
+    return name
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ScenarioManager:
+    def __init__(self, scenarios_dir: str = "scenarios"):
+        self.scenarios = {}
+        self.scenarios_dir = scenarios_dir
+        self.current_scenario = None  # 현재 작업 중인 시나리오
+        self.current_actions = []     # 현재 시나리오의 액션들
+        self.create_scenarios_directory()
+        self.catalog = ScenarioCatalog(scenarios_dir)
+        self.graphs: Dict[str, ScenarioGraph] = {}  # 그래프 시나리오의 단계 정의 (선형 시나리오는 없음)
+        # 이름 -> ((파일 경로, mtime_ns, 크기), 액션들, 그래프). 파일이 바뀌지 않았으면 다시 읽지 않음
+        self._loaded = {}
+    
+    def create_scenarios_directory(self):
+        if not os.path.exists(self.scenarios_dir):
+            os.makedirs(self.scenarios_dir)
+            os.makedirs(os.path.join(self.scenarios_dir, "images"))
+    
+    def create_scenario(self, name: str, actions: List[Action], graph: Optional[ScenarioGraph] = None) -> bool:
+        try:
+            name = safe_file_name(name)
+            # 번들에서 불러온 액션은 가상 경로를 쓰므로 JSON에 적기 전에 이미지로 풀어 둠
+            self._unpack_bundle_templates(name, actions)
+            scenario_data = {
+                "name": name,
+                "actions": [
+                    {
+                        "name": action.name,
+                        "target_image": action.target_image_path,
+                        "click_position": action.click_position,
+                        "search_area": action.search_area,
+                        "order": action.order,
+                        "wait_time": action.wait_time,
+                        "match_mode": action.match_mode
+                    }
+                    for action in actions
+                ]
+            }
+            if graph is not None:
+                graph.validate(action.name for action in actions)
+                scenario_data["graph"] = graph.to_dict()
+            
+            file_path = os.path.join(self.scenarios_dir, f"{name}.json")
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(scenario_data, f, ensure_ascii=False, indent=4)
+            
+            self.scenarios[name] = actions
+            if graph is not None:
+                self.graphs[name] = graph
+            else:
+                self.graphs.pop(name, None)
+            # 실행 시 다시 계산하지 않도록 템플릿 산출물을 저장 시점에 만들어 둠
+            self.compile_actions(actions)
+            return True
+        except Exception as e:
+            print(f"시나리오 생성 중 오류 발생: {e}")
+            return False
+    
+    def _unpack_bundle_templates(self, name: str, actions: List[Action]):
+        """번들 템플릿(`<번들>.acb#<번호>`)을 쓰는 액션의 템플릿을 images/에 PNG로 저장하고 경로를 바꿈
+
+        JSON이 번들보다 새로우면 JSON을 불러오므로, 가상 경로가 JSON에 남으면 템플릿을 찾을 수 없다.
+        """
+        images_dir = os.path.join(self.scenarios_dir, "images")
+        unpacked, reserved = {}, set()
+        for action in actions:
+            key = action.target_image_path
+            if not is_template_key(key) or os.path.exists(key):
+                continue
+            if key not in unpacked:
+                template = template_cache.get(key)
+                if template is None:
+                    raise Exception(f"이미지를 불러올 수 없습니다: {key}")
+                os.makedirs(images_dir, exist_ok=True)
+                image_path, exists = self._import_image_path(images_dir, f"{name}_action_{action.order}.png",
+                                                             1, template, reserved)
+                reserved.add(image_path)
+                if not exists:
+                    temp_path = f"{os.path.splitext(image_path)[0]}.{os.getpid()}.tmp.png"
+                    if not cv2.imwrite(temp_path, np.ascontiguousarray(template)):
+                        _remove_quietly(temp_path)
+                        raise Exception(f"이미지를 저장할 수 없습니다: {image_path}")
+                    os.replace(temp_path, image_path)
+                unpacked[key] = image_path
+            action.target_image_path = unpacked[key]
+    
+    def scenario_path(self, name: str) -> Optional[str]:
+        """불러올 시나리오 파일 경로 (JSON보다 오래되지 않은 번들이 있으면 번들)
+
+        이름이 시나리오 디렉토리 밖을 가리키면 ValueError.
+        """
+        name = safe_file_name(name)
+        json_path = os.path.join(self.scenarios_dir, f"{name}.json")
+        bundle_path = self.bundle_path(name)
+        return scenario_source(json_path if os.path.exists(json_path) else None,
+                               bundle_path if os.path.exists(bundle_path) else None)
+    
+    def load_scenario(self, name: str) -> Optional[List[Action]]:
+        try:
+            path = self.scenario_path(name)
+        except ValueError as e:
+            print(e)
+            return None
+        if path is None:
+            print(f"시나리오 파일이 없습니다: {name}")
+            return None
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        
+        cached = self._loaded.get(name)
+        if cached is None or cached[0] != key:
+            actions, graph = self.load_bundle(path) if path.endswith(BUNDLE_EXT) else self.load_json(name, path)
+            if not actions:
+                return actions
+            cached = self._loaded[name] = (key, actions, graph)
+        
+        # 호출한 쪽에서 순서 등을 바꿔도 캐시가 오염되지 않도록 복사본 반환
+        actions = [copy.copy(action) for action in cached[1]]
+        self.scenarios[name] = actions
+        if cached[2] is not None:
+            self.graphs[name] = cached[2]
+        else:
+            self.graphs.pop(name, None)
+        return actions
+    
+    def load_graph(self, name: str) -> Optional[ScenarioGraph]:
+        """그래프 시나리오의 단계 정의. 선형 시나리오이거나 불러올 수 없으면 None"""
+        if self.load_scenario(name) is None:
+            return None
+        return self.graphs.get(name)
+    
+    def _parse_graph(self, data: dict, actions: List[Action]) -> Optional[ScenarioGraph]:
+        graph = data.get("graph")
+        if not graph:
+            return None
+        names = [action.name for action in actions]
+        if len(set(names)) != len(names):
+            raise ValueError("그래프 시나리오의 액션 이름은 서로 달라야 합니다")
+        return ScenarioGraph.from_dict(graph, names)
+    
+    def load_json(self, name: str, file_path: str) -> Tuple[Optional[List[Action]], Optional[ScenarioGraph]]:
+        """JSON 시나리오 파일에서 액션과 그래프(있으면) 로드"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            actions = [
+                Action(
+                    name=action["name"],
+                    target_image_path=self.resolve_image_path(action["target_image"]),
+                    click_position=tuple(action["click_position"]) if action["click_position"] else None,
+                    search_area=tuple(action["search_area"]) if action["search_area"] else None,
+                    order=action.get("order", i+1),
+                    wait_time=action.get("wait_time", 1.0),
+                    match_mode=action.get("match_mode", "default")
+                )
+                for i, action in enumerate(data["actions"])
+            ]
+            
+            # 실행 중 디스크 I/O가 없도록 모든 액션의 템플릿을 미리 디코딩
+            template_cache.warm(action.target_image_path for action in actions)
+            return actions, self._parse_graph(data, actions)
+        except Exception as e:
+            print(f"시나리오 로드 중 오류 발생: {e}")
+            return None, None
+    
+    def compile_actions(self, actions: List[Action], force: bool = False) -> int:
+        """액션 템플릿마다 산출물(`<이미지>.tpl`)을 생성/갱신. 처리한 템플릿 수 반환"""
+        count = 0
+        for path in dict.fromkeys(action.target_image_path for action in actions):
+            template = template_cache.get(path)
+            if template is None:
+                print(f"이미지를 불러올 수 없습니다: {path}")
+                continue
+            artifact_store.compile(path, template, force=force)
+            count += 1
+        return count
+    
+    def compile_scenario(self, name: str, force: bool = False) -> Optional[int]:
+        actions = self.load_scenario(name)
+        if not actions:
+            return None
+        return self.compile_actions(actions, force)
+    
+    def location_memory(self, name: str) -> LocationMemory:
+        """시나리오의 액션별 마지막 매칭 위치 기록. 이름이 디렉토리 밖을 가리키면 ValueError"""
+        return LocationMemory.for_scenario(self.scenarios_dir, safe_file_name(name))
+    
+    def bundle_path(self, name: str) -> str:
+        return os.path.join(self.scenarios_dir, f"{name}{BUNDLE_EXT}")
+    
+    def load_bundle(self, path: str) -> Tuple[Optional[List[Action]], Optional[ScenarioGraph]]:
+        """번들 파일에서 시나리오 로드 (템플릿은 메모리 매핑, 디코딩 없음)"""
+        try:
+            header, templates = read_bundle(path)
+            # 같은 번들을 다시 불러오면 이전 매핑은 해제
+            template_cache.unregister(os.path.abspath(path) + "#")
+            for index, template in enumerate(templates):
+                template_cache.register(template_key(path, index), template)
+            
+            actions = [
+                Action(
+                    name=action["name"],
+                    target_image_path=template_key(path, action["template"]),
+                    click_position=tuple(action["click_position"]) if action["click_position"] else None,
+                    search_area=tuple(action["search_area"]) if action["search_area"] else None,
+                    order=action.get("order", i+1),
+                    wait_time=action.get("wait_time", 1.0),
+                    match_mode=action.get("match_mode", "default")
+                )
+                for i, action in enumerate(header["actions"])
+            ]
+            return actions, self._parse_graph(header, actions)
+        except Exception as e:
+            print(f"번들 로드 중 오류 발생: {e}")
+            return None, None
+    
+    def export_bundle(self, name: str, path: Optional[str] = None) -> Optional[str]:
+        """JSON+PNG 시나리오를 번들 파일로 저장. 저장한 경로를 반환"""
+        actions = self.load_scenario(name)
+        if not actions:
+            return None
+        path = path or self.bundle_path(name)
+        try:
+            # 같은 이미지를 쓰는 액션은 템플릿 하나를 공유
+            indices, templates, sources, rows = {}, [], [], []
+            for action in actions:
+                if action.target_image_path not in indices:
+                    template = template_cache.get(action.target_image_path)
+                    if template is None:
+                        raise Exception(f"이미지를 불러올 수 없습니다: {action.target_image_path}")
+                    indices[action.target_image_path] = len(templates)
+                    templates.append(template)
+                    # 번들에서 불러온 액션은 원본 파일이 없으므로 이름을 새로 지음
+                    sources.append(os.path.basename(action.target_image_path)
+                                   if os.path.exists(action.target_image_path)
+                                   else f"{name}_action_{action.order}.png")
+                rows.append({
+                    "name": action.name,
+                    "template": indices[action.target_image_path],
+                    "click_position": list(action.click_position) if action.click_position else None,
+                    "search_area": list(action.search_area) if action.search_area else None,
+                    "order": action.order,
+                    "wait_time": action.wait_time,
+                    "match_mode": action.match_mode
+                })
+            graph = self.graphs.get(name)
+            write_bundle(path, name, rows, templates, sources, graph.to_dict() if graph else None)
+            return path
+        except Exception as e:
+            print(f"번들 저장 중 오류 발생: {e}")
+            return None
+    
+    def import_bundle(self, path: str, name: Optional[str] = None) -> Optional[str]:
+        """번들 파일을 기존 JSON+PNG 형식으로 풀어 저장. 시나리오 이름을 반환
+
+        이미지는 모두 임시 파일에 먼저 쓰고, 전부 성공한 뒤에만 제자리로 옮긴다.
+        같은 이름의 파일이 있으면 픽셀이 같을 때만 그대로 쓰고, 다르면 새 이름으로 저장한다.
+        """
+        temp_paths = []  # (임시 파일, 최종 경로)
+        created = []  # 이번에 새로 만든 이미지 (시나리오 저장 실패 시 제거)
+        try:
+            header, templates = read_bundle(path)
+            name = safe_file_name(name or header["name"])
+            images_dir = os.path.join(self.scenarios_dir, "images")
+            os.makedirs(images_dir, exist_ok=True)
+            
+            image_paths, reserved = [], set()
+            for index, (entry, template) in enumerate(zip(header["templates"], templates)):
+                image_path, exists = self._import_image_path(images_dir, entry["source"], index,
+                                                             template, reserved)
+                reserved.add(image_path)
+                image_paths.append(image_path)
+                if exists:
+                    continue
+                stem = os.path.splitext(image_path)[0]
+                temp_path = f"{stem}.{os.getpid()}.tmp.png"
+                temp_paths.append((temp_path, image_path))
+                if not cv2.imwrite(temp_path, template):
+                    raise Exception(f"이미지를 저장할 수 없습니다: {image_path}")
+            
+            actions = [
+                Action(
+                    name=action["name"],
+                    target_image_path=image_paths[action["template"]],
+                    click_position=tuple(action["click_position"]) if action["click_position"] else None,
+                    search_area=tuple(action["search_area"]) if action["search_area"] else None,
+                    order=action.get("order", i+1),
+                    wait_time=action.get("wait_time", 1.0),
+                    match_mode=action.get("match_mode", "default")
+                )
+                for i, action in enumerate(header["actions"])
+            ]
+            graph = self._parse_graph(header, actions)
+            
+            # 모든 이미지를 쓴 뒤에만 제자리로 옮김
+            for temp_path, image_path in temp_paths:
+                os.replace(temp_path, image_path)
+                created.append(image_path)
+            temp_paths = []
+            if not self.create_scenario(name, actions, graph):
+                raise Exception(f"시나리오를 저장할 수 없습니다: {name}")
+            return name
+        except Exception as e:
+            print(f"번들 가져오기 중 오류 발생: {e}")
+            for temp_path, _ in temp_paths:
+                _remove_quietly(temp_path)
+            for image_path in created:
+                _remove_quietly(image_path)
+            return None
+    
+    @staticmethod
+    def _import_image_path(images_dir: str, source: str, index: int, template, reserved) -> Tuple[str, bool]:
+        """번들 템플릿을 저장할 경로와 (픽셀이 같은) 파일이 이미 있는지 여부
+
+        다른 픽셀의 파일은 덮어쓰지 않고 `<이름>_<번호>.png`처럼 비어 있는 이름을 고른다.
+        """
+        stem = os.path.splitext(safe_file_name(source))[0]
+        candidate = os.path.join(images_dir, f"{stem}.png")
+        number = index
+        while True:
+            if candidate not in reserved:
+                if not os.path.exists(candidate):
+                    return candidate, False
+                existing = cv2.imread(candidate)
+                if existing is not None and existing.shape == template.shape and np.array_equal(existing, template):
+                    return candidate, True
+            candidate = os.path.join(images_dir, f"{stem}_{number}.png")
+            number += 1
+    
+    def delete_scenario(self, name: str) -> bool:
+        """시나리오 파일(JSON, 번들)과 위치 기록을 함께 삭제. 이미지는 남겨 둔다"""
+        try:
+            name = safe_file_name(name)
+            paths = [os.path.join(self.scenarios_dir, f"{name}.json"), self.bundle_path(name),
+                     self.location_memory(name).path]
+            if not any(os.path.exists(path) for path in paths[:2]):
+                print(f"시나리오 파일이 없습니다: {name}")
+                return False
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            self._forget(name)
+            self.catalog.refresh()
+            return True
+        except Exception as e:
+            print(f"시나리오 삭제 중 오류 발생: {e}")
+            return False
+    
+    def rename_scenario(self, old_name: str, new_name: str) -> bool:
+        """시나리오 이름 변경. JSON, 번들, 위치 기록, `<이름>_action_*` 이미지를 함께 옮긴다
+
+        파일 수정 시각은 그대로 유지해 JSON과 번들 중 어느 쪽을 불러올지가 바뀌지 않게 한다.
+        """
+        try:
+            old_name, new_name = safe_file_name(old_name), safe_file_name(new_name)
+            old_json = os.path.join(self.scenarios_dir, f"{old_name}.json")
+            new_json = os.path.join(self.scenarios_dir, f"{new_name}.json")
+            old_bundle, new_bundle = self.bundle_path(old_name), self.bundle_path(new_name)
+            if not os.path.exists(old_json) and not os.path.exists(old_bundle):
+                print(f"시나리오 파일이 없습니다: {old_name}")
+                return False
+            if os.path.exists(new_json) or os.path.exists(new_bundle):
+                print(f"같은 이름의 시나리오가 이미 존재합니다: {new_name}")
+                return False
+            
+            if os.path.exists(old_json):
+                stat = os.stat(old_json)
+                with open(old_json, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                data["name"] = new_name
+                prefix = f"{old_name}_action_"
+                for action in data["actions"]:
+                    stored = action["target_image"]
+                    image_path = self.resolve_image_path(stored)
+                    base = os.path.basename(image_path)
+                    if not base.startswith(prefix) or not os.path.exists(image_path):
+                        continue
+                    new_base = f"{new_name}_action_{base[len(prefix):]}"
+                    new_image_path = os.path.join(os.path.dirname(image_path), new_base)
+                    os.rename(image_path, new_image_path)
+                    if os.path.exists(artifact_path(image_path)):
+                        os.rename(artifact_path(image_path), artifact_path(new_image_path))
+                    # 저장된 경로 형식(상대/절대, 구분자)은 유지하고 파일 이름만 바꿈
+                    action["target_image"] = stored[:len(stored) - len(base)] + new_base
+                with open(new_json, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=4)
+                os.utime(new_json, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                os.remove(old_json)
+            
+            if os.path.exists(old_bundle):
+                # 번들 헤더에도 이름이 있으므로 다시 씀 (템플릿은 그대로 복사)
+                stat = os.stat(old_bundle)
+                header, templates = read_bundle(old_bundle)
+                write_bundle(new_bundle, new_name, header["actions"], templates,
+                             [entry["source"] for entry in header["templates"]], header.get("graph"))
+                del templates
+                os.utime(new_bundle, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                template_cache.unregister(os.path.abspath(old_bundle) + "#")
+                os.remove(old_bundle)
+            
+            old_locations = self.location_memory(old_name).path
+            if os.path.exists(old_locations):
+                os.replace(old_locations, self.location_memory(new_name).path)
+            
+            self._forget(old_name)
+            self.catalog.rename(old_name, new_name)
+            self.catalog.refresh()
+            return True
+        except Exception as e:
+            print(f"이름 변경 중 오류 발생: {e}")
+            return False
+    
+    def _forget(self, name: str):
+        """삭제/이름 변경한 시나리오의 메모리 상태 정리"""
+        self.scenarios.pop(name, None)
+        self.graphs.pop(name, None)
+        self._loaded.pop(name, None)
+        template_cache.unregister(os.path.abspath(self.bundle_path(name)) + "#")
+        if self.current_scenario == name:
+            self.current_scenario = None
+            self.current_actions = []
+    
+    def resolve_image_path(self, path: str) -> str:
+        """저장된 이미지 경로를 현재 OS에서 열 수 있는 경로로 변환
+
+        Windows에서 저장한 역슬래시 경로를 변환하고, 상대 경로가 현재 작업
+        디렉토리에 없으면 시나리오 디렉토리의 상위 디렉토리를 기준으로 찾는다.
+        """
+        path = path.replace("\\", os.sep).replace("/", os.sep)
+        if os.path.isabs(path) or os.path.exists(path):
+            return path
+        base_dir = os.path.dirname(os.path.abspath(self.scenarios_dir))
+        candidate = os.path.join(base_dir, path)
+        return candidate if os.path.exists(candidate) else path
+    
+    def list_scenarios(self) -> List[str]:
+        self.catalog.refresh()
+        return self.catalog.names()
+    
+    def search_scenarios(self, query: str, refresh: bool = False) -> List[str]:
+        """카탈로그에서 이름으로 검색 (접두사 일치 우선)
+
+        기본은 메모리의 색인만 검색한다. 디렉토리 반영은 주기적인 `catalog.refresh()`가 맡는다.
+        """
+        if refresh:
+            self.catalog.refresh()
+        return self.catalog.search(query)
+    
+    def start_new_scenario(self, name: str):
+        """새 시나리오 작업 시작"""
+        self.current_scenario = name
+        self.current_actions = []
+    
+    def add_action(self, action: Action):
+        """현재 시나리오에 액션 추가"""
+        self.current_actions.append(action)
+        # 순서대로 정렬
+        self.current_actions.sort(key=lambda x: x.order)
+    
+    def save_current_scenario(self) -> bool:
+        """현재 작업 중인 시나리오 저장"""
+        if not self.current_scenario or not self.current_actions:
+            return False
+        # 그래프 시나리오는 단계 정의도 함께 저장 (삭제된 액션을 가리키면 저장 실패)
+        return self.create_scenario(self.current_scenario, self.current_actions,
+                                    self.graphs.get(self.current_scenario))
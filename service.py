@@ -0,0 +1,619 @@
+"""시나리오 실행 서비스: 로컬 HTTP(또는 Unix 소켓) API로 실행 요청을 받아 우선순위 순서로 실행
+
+프로세스 하나가 계속 떠 있으면서 캡처/입력 백엔드, 엔진, 불러온 시나리오와 템플릿을
+작업 사이에 그대로 유지하므로, 새 작업은 프로세스·GUI 시작 비용 없이 바로 시작된다.
+화면과 입력 장치는 하나뿐이라 작업은 한 번에 하나씩 실행하고 나머지는 큐에서 기다린다.
+
+    python -m cli serve --port 8765 [--warm]
+    python -m cli serve --socket /tmp/autoclicker.sock --capture replay --replay recordings/ --dry-run
+    python -m cli submit Scenario_A --priority 10 --wait
+
+API (요청/응답 모두 JSON)
+    POST /jobs                 {"scenario": 이름, "priority": 0, "timeout": null} -> 202 {"job": {...}}
+    GET  /jobs                 -> {"jobs": [...]}
+    GET  /jobs/<id>            -> {"job": {...}}
+    POST /jobs/<id>/cancel     -> {"job": {...}}  (DELETE /jobs/<id>도 같음)
+    GET  /jobs/<id>/events     -> 작업이 끝날 때까지 이벤트를 한 줄에 하나씩 JSON으로 전송 (NDJSON)
+    GET  /health               -> 큐 길이, 실행 중인 작업, 템플릿 캐시 상태
+
+모든 요청은 `Authorization: Bearer <토큰>` 헤더가 있어야 한다. 토큰은 사용자만 읽을 수 있는
+파일(기본 `~/.autoclicker/service.token`, 권한 0600)에 있으며 서비스가 처음 시작할 때 만든다.
+Host 헤더가 127.0.0.1/localhost가 아니거나, POST 본문이 `application/json`이 아니거나 4KB를 넘으면 거부한다.
+(다른 웹 페이지가 브라우저를 통해 로컬 서비스로 요청을 보내는 것을 막기 위함)
+"""
+
+import hmac
+import http.client
+import itertools
+import json
+import os
+import queue
+import secrets
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+from engine import CancellationToken
+from scenario import safe_file_name
+from template_cache import template_cache
+
+TERMINAL_STATES = ("finished", "error", "stopped", "cancelled")
+DEFAULT_TOKEN_PATH = os.path.join(os.path.expanduser("~"), ".autoclicker", "service.token")
+ALLOWED_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+MAX_BODY_BYTES = 4096  # {"scenario", "priority", "timeout"} 요청 본문 상한
+
+
+def load_or_create_token(path: str = DEFAULT_TOKEN_PATH) -> str:
+    """토큰 파일을 읽고, 없으면 사용자만 읽을 수 있는 파일(0600)로 새로 만듦"""
+    token = read_token(path)
+    if token:
+        if os.name == "posix" and os.stat(path).st_mode & 0o077:
+            os.chmod(path, 0o600)  # 다른 사용자가 읽을 수 있게 되어 있으면 권한을 좁힘
+        return token
+    os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+    token = secrets.token_hex(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    return token
+
+
+def read_token(path: str = DEFAULT_TOKEN_PATH) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+@dataclass
+class ServiceJob:
+    job_id: int
+    scenario: str
+    priority: int = 0  # 클수록 먼저 실행
+    timeout: Optional[float] = None  # 실행 제한 시간 (초)
+    state: str = "queued"  # "queued", "running", "finished", "error", "stopped", "cancelled"
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    ended: Optional[float] = None
+    seconds: Optional[float] = None  # 실행 소요 시간
+    error: Optional[str] = None
+    events: List[dict] = field(default_factory=list)
+    token: Optional[CancellationToken] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    def to_dict(self, position: Optional[int] = None) -> dict:
+        data = {
+            "id": self.job_id,
+            "scenario": self.scenario,
+            "priority": self.priority,
+            "timeout": self.timeout,
+            "state": self.state,
+            "submitted": self.submitted,
+            "started": self.started,
+            "ended": self.ended,
+            "seconds": self.seconds,
+            "error": self.error,
+            "events": len(self.events),
+        }
+        if position is not None:
+            data["position"] = position  # 대기 순번 (0이면 다음 차례)
+        return data
+
+
+class ScenarioService:
+    """우선순위 작업 큐와 실행 스레드
+
+    실행 스레드 하나가 엔진을 독점해 작업을 순서대로 실행하고, 엔진 이벤트를 작업별로
+    모아 둔다. 끝난 작업은 최근 `max_jobs`개만 보관한다.
+    """
+
+    def __init__(self, engine, manager, seek_replay: bool = False, location_memory: bool = True,
+                 max_jobs: int = 1000, max_events: int = 1000):
+        self.engine = engine
+        self.manager = manager
+        self.seek_replay = seek_replay  # replay 캡처는 작업마다 처음 프레임부터 재생
+        self.location_memory = location_memory
+        self.max_jobs = max_jobs
+        self.max_events = max_events  # 작업당 보관할 이벤트 수
+        self.jobs: "OrderedDict[int, ServiceJob]" = OrderedDict()
+        self.current: Optional[ServiceJob] = None
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._changed = threading.Condition()  # 작업 상태/이벤트가 바뀌면 알림
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # 작업 관리 (HTTP 스레드에서 호출)
+    # ------------------------------------------------------------------
+    def submit(self, scenario: str, priority: int = 0, timeout: Optional[float] = None) -> ServiceJob:
+        """작업 등록. 이름이 시나리오 디렉토리 밖을 가리키면 ValueError, 시나리오가 없으면 KeyError"""
+        scenario = safe_file_name(scenario)
+        if self.manager.scenario_path(scenario) is None:
+            raise KeyError(f"시나리오가 없습니다: {scenario}")
+        with self._changed:
+            job = ServiceJob(next(self._ids), scenario, priority, timeout)
+            self.jobs[job.job_id] = job
+            self._forget_old_jobs()
+        self._queue.put((-priority, next(self._sequence), job.job_id))
+        return job
+
+    def get(self, job_id: int) -> Optional[ServiceJob]:
+        with self._changed:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: int) -> Optional[ServiceJob]:
+        with self._changed:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state == "queued":
+                # 큐에서 꺼낼 때 건너뜀
+                job.state = "cancelled"
+                job.ended = time.time()
+                self._changed.notify_all()
+            elif job.state == "running" and job.token is not None:
+                job.token.cancel()
+            return job
+
+    def describe(self, job: ServiceJob) -> dict:
+        return job.to_dict(self._positions().get(job.job_id))
+
+    def list_jobs(self) -> List[dict]:
+        positions = self._positions()
+        with self._changed:
+            jobs = list(self.jobs.values())
+        return [job.to_dict(positions.get(job.job_id)) for job in jobs]
+
+    def _positions(self) -> Dict[int, int]:
+        with self._changed:
+            queued = [job for job in self.jobs.values() if job.state == "queued"]
+        # 같은 우선순위는 먼저 들어온 작업부터 (작업 번호는 들어온 순서)
+        queued.sort(key=lambda job: (-job.priority, job.job_id))
+        return {job.job_id: index for index, job in enumerate(queued)}
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_jobs)]:
+            del self.jobs[job_id]
+
+    def stream_events(self, job: ServiceJob, timeout: Optional[float] = None) -> Iterator[dict]:
+        """작업 이벤트를 처음부터 차례로 반환하고, 작업이 끝나면 종료. `timeout`초 동안 새 이벤트가 없으면 중단"""
+        index = 0
+        while True:
+            with self._changed:
+                while index >= len(job.events) and not job.done:
+                    if not self._changed.wait(timeout):
+                        return
+                pending = job.events[index:]
+                done = job.done
+            for event in pending:
+                yield event
+            index += len(pending)
+            if done and index >= len(job.events):
+                return
+
+    def health(self) -> dict:
+        with self._changed:
+            states: Dict[str, int] = {}
+            for job in self.jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            current = self.current.job_id if self.current is not None else None
+        return {
+            "status": "ok" if self.running else "stopped",
+            "jobs": states,
+            "current": current,
+            "template_cache": template_cache.stats(),
+        }
+
+    # ------------------------------------------------------------------
+    # 실행 스레드
+    # ------------------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="service-runner", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 10.0):
+        self._closed = True
+        with self._changed:
+            if self.current is not None and self.current.token is not None:
+                self.current.token.cancel()
+        # 다른 작업보다 먼저 꺼내지도록 가장 작은 키로 넣음
+        self._queue.put((float("-inf"), -1, None))
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def warm(self, names: Optional[List[str]] = None) -> int:
+        """시나리오를 미리 불러와 템플릿을 준비. 준비한 시나리오 수 반환"""
+        count = 0
+        for name in names if names is not None else self.manager.list_scenarios():
+            actions = self.manager.load_scenario(name)
+            if actions:
+                self.engine.prepare_actions(actions)
+                count += 1
+        return count
+
+    def _run(self):
+        while not self._closed:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                break
+            with self._changed:
+                job = self.jobs.get(job_id)
+                if job is None or job.state != "queued":
+                    continue
+                job.state = "running"
+                job.started = time.time()
+                job.token = CancellationToken()
+                self.current = job
+                self._changed.notify_all()
+            try:
+                self._execute(job)
+            except Exception as e:
+                print(f"작업 실행 중 오류 발생 ({job.scenario}): {e}")
+                self._finish(job, "error", str(e))
+
+    def _execute(self, job: ServiceJob):
+        started = time.perf_counter()
+        actions = self.manager.load_scenario(job.scenario)
+        if not actions:
+            raise Exception(f"시나리오를 불러올 수 없습니다: {job.scenario}")
+        graph = self.manager.load_graph(job.scenario)
+        if self.seek_replay:
+            self.engine.capture_source.seek(0)
+        self.engine.location_memory = (self.manager.location_memory(job.scenario)
+                                       if self.location_memory else None)
+
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            job.token.cancel()
+
+        timer = threading.Timer(job.timeout, expire) if job.timeout else None
+        if timer is not None:
+            timer.start()
+        state, error = "error", None
+        try:
+            # 엔진 작업 스레드에서 이 작업의 토큰으로 실행하고, 여기서는 이벤트를 모아 작업에 기록
+            if graph is not None:
+                self.engine.start(self.engine.execute_graph, actions, graph, token=job.token)
+            else:
+                self.engine.start(self.engine.execute_scenario_actions, sorted(actions, key=lambda x: x.order),
+                                  token=job.token)
+            while self.engine.running or not self.engine.events.empty():
+                try:
+                    event = self.engine.events.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if event.run != job.token.run_id:
+                    continue  # 이전 작업이 늦게 보낸 이벤트
+                self._record_event(job, {"kind": event.kind, "message": event.message, **event.data})
+                if event.kind in ("finished", "stopped", "error"):
+                    state = event.kind
+                    if event.kind == "error":
+                        error = event.message
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if state == "stopped" and timed_out.is_set():
+            error = "시간 초과"
+        seconds = time.perf_counter() - started
+        self._finish(job, state, error, seconds)
+        self.manager.catalog.record_run(job.scenario, state, seconds)
+
+    def _record_event(self, job: ServiceJob, event: dict):
+        event["ts"] = time.time()
+        with self._changed:
+            if len(job.events) < self.max_events:
+                job.events.append(event)
+            self._changed.notify_all()
+
+    def _finish(self, job: ServiceJob, state: str, error: Optional[str] = None,
+                seconds: Optional[float] = None):
+        with self._changed:
+            job.state = state
+            job.error = error
+            job.ended = time.time()
+            job.seconds = seconds
+            job.token = None
+            if self.current is job:
+                self.current = None
+            self._changed.notify_all()
+
+
+# ----------------------------------------------------------------------
+# HTTP
+# ----------------------------------------------------------------------
+class _BodyTooLarge(Exception):
+    pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "AutoClickService/1"
+
+    @property
+    def service(self) -> ScenarioService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def address_string(self):
+        # Unix 소켓 연결은 주소가 없음
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _send_json(self, status: int, data: dict):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        """요청 본문을 JSON 객체로 읽음. 길이가 잘못되었으면 ValueError, 상한을 넘으면 _BodyTooLarge"""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ValueError("Content-Length가 올바르지 않습니다") from None
+        if length < 0:
+            raise ValueError("Content-Length가 올바르지 않습니다")
+        if length > MAX_BODY_BYTES:
+            raise _BodyTooLarge(f"요청 본문이 너무 큽니다 (최대 {MAX_BODY_BYTES}바이트)")
+        if not length:
+            return {}
+        data = json.loads(self.rfile.read(length).decode("utf-8"))
+        if not isinstance(data, dict):
+            raise ValueError("요청 본문은 JSON 객체여야 합니다")
+        return data
+
+    def _allowed(self) -> bool:
+        """Host, 토큰, (POST) Content-Type 확인. 거부하면 오류 응답을 보내고 False"""
+        host = (self.headers.get("Host") or "").strip().lower()
+        if host.startswith("["):
+            host = host[:host.find("]") + 1]
+        else:
+            host = host.rsplit(":", 1)[0]
+        if host not in ALLOWED_HOSTS:
+            self._send_json(403, {"error": "허용되지 않은 Host입니다"})
+            return False
+        token = self.server.token
+        if token is not None:
+            scheme, _, value = (self.headers.get("Authorization") or "").partition(" ")
+            if scheme.lower() != "bearer" or not hmac.compare_digest(value.strip().encode(), token.encode()):
+                self._send_json(401, {"error": "인증 토큰이 없거나 올바르지 않습니다"})
+                return False
+        if self.command == "POST":
+            content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+            if content_type != "application/json":
+                self._send_json(415, {"error": "Content-Type은 application/json이어야 합니다"})
+                return False
+        return True
+
+    def _route(self):
+        """경로를 (작업, 하위 경로)로 분리. 작업 경로가 아니면 (None, None)"""
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if len(parts) < 2 or parts[0] != "jobs":
+            return None, None
+        try:
+            job = self.service.get(int(parts[1]))
+        except ValueError:
+            job = None
+        return job, "/".join(parts[2:])
+
+    def _job_not_found(self):
+        self._send_json(404, {"error": "작업이 없습니다"})
+
+    def do_GET(self):
+        if not self._allowed():
+            return
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/health":
+            self._send_json(200, self.service.health())
+            return
+        if path == "/jobs":
+            self._send_json(200, {"jobs": self.service.list_jobs()})
+            return
+        job, rest = self._route()
+        if job is None:
+            self._job_not_found()
+        elif rest == "":
+            self._send_json(200, {"job": self.service.describe(job)})
+        elif rest == "events":
+            self._stream(job)
+        else:
+            self._job_not_found()
+
+    def _stream(self, job: ServiceJob):
+        # HTTP/1.0 응답이므로 연결을 닫으면 스트림이 끝남
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.end_headers()
+        try:
+            for event in self.service.stream_events(job):
+                self.wfile.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            final = {"kind": "job", **self.service.describe(job)}
+            self.wfile.write((json.dumps(final, ensure_ascii=False) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        if not self._allowed():
+            return
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/jobs":
+            try:
+                request = self._read_json()
+            except _BodyTooLarge as e:
+                self.close_connection = True  # 읽지 않은 본문이 남아 있으므로 연결을 재사용하지 않음
+                self._send_json(413, {"error": str(e)})
+                return
+            except ValueError as e:
+                self.close_connection = True
+                self._send_json(400, {"error": f"잘못된 요청입니다: {e}"})
+                return
+            try:
+                scenario = request["scenario"]
+                priority = int(request.get("priority", 0))
+                timeout = request.get("timeout")
+                timeout = float(timeout) if timeout is not None else None
+            except (KeyError, TypeError, ValueError) as e:
+                self._send_json(400, {"error": f"잘못된 요청입니다: {e}"})
+                return
+            try:
+                job = self.service.submit(scenario, priority, timeout)
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except KeyError as e:
+                self._send_json(404, {"error": e.args[0]})
+                return
+            self._send_json(202, {"job": self.service.describe(job)})
+            return
+        job, rest = self._route()
+        if job is None or rest != "cancel":
+            self._job_not_found()
+            return
+        self.service.cancel(job.job_id)
+        self._send_json(200, {"job": self.service.describe(job)})
+
+    def do_DELETE(self):
+        if not self._allowed():
+            return
+        job, rest = self._route()
+        if job is None or rest:
+            self._job_not_found()
+            return
+        self.service.cancel(job.job_id)
+        self._send_json(200, {"job": self.service.describe(job)})
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(service: ScenarioService, host: str = "127.0.0.1", port: int = 8765,
+                  socket_path: Optional[str] = None, verbose: bool = False, token: Optional[str] = None):
+    """HTTP 서버 생성. `socket_path`가 있으면 TCP 대신 Unix 소켓에서 받음
+
+    `token`이 있으면 모든 요청에 `Authorization: Bearer <token>`을 요구한다.
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _UnixHTTPServer(socket_path, _Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+        server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    server.token = token
+    return server
+
+
+# ----------------------------------------------------------------------
+# 클라이언트
+# ----------------------------------------------------------------------
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServiceClient:
+    """서비스 API 클라이언트 (표준 라이브러리만 사용)
+
+        client = ServiceClient(port=8765, token=read_token())  # 또는 socket_path="/tmp/autoclicker.sock"
+        job = client.submit("Scenario_A", priority=10)
+        for event in client.events(job["id"]):
+            print(event)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[str] = None,
+                 timeout: Optional[float] = 30.0, token: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.token = token
+
+    def _headers(self, json_body: bool = False) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"} if json_body else {}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def _connect(self, timeout: Optional[float]) -> http.client.HTTPConnection:
+        if self.socket_path:
+            return _UnixHTTPConnection(self.socket_path, timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> dict:
+        connection = self._connect(self.timeout)
+        try:
+            # POST는 본문이 없어도 JSON으로 보냄 (서버가 Content-Type을 확인)
+            if body is None and method == "POST":
+                body = {}
+            payload = json.dumps(body).encode("utf-8") if body is not None else None
+            connection.request(method, path, payload, self._headers(payload is not None))
+            response = connection.getresponse()
+            data = json.loads(response.read().decode("utf-8"))
+            if response.status >= 400:
+                raise RuntimeError(f"{response.status}: {data.get('error')}")
+            return data
+        finally:
+            connection.close()
+
+    def submit(self, scenario: str, priority: int = 0, timeout: Optional[float] = None) -> dict:
+        return self.request("POST", "/jobs", {"scenario": scenario, "priority": priority,
+                                              "timeout": timeout})["job"]
+
+    def status(self, job_id: int) -> dict:
+        return self.request("GET", f"/jobs/{job_id}")["job"]
+
+    def cancel(self, job_id: int) -> dict:
+        return self.request("POST", f"/jobs/{job_id}/cancel")["job"]
+
+    def jobs(self) -> List[dict]:
+        return self.request("GET", "/jobs")["jobs"]
+
+    def health(self) -> dict:
+        return self.request("GET", "/health")
+
+    def events(self, job_id: int) -> Iterator[dict]:
+        """작업이 끝날 때까지 이벤트를 차례로 반환. 마지막은 작업 상태 {"kind": "job", ...}"""
+        connection = self._connect(None)  # 작업이 끝날 때까지 기다리므로 제한 시간 없음
+        try:
+            connection.request("GET", f"/jobs/{job_id}/events", headers=self._headers())
+            response = connection.getresponse()
+            if response.status >= 400:
+                raise RuntimeError(f"{response.status}: {json.loads(response.read()).get('error')}")
+            for line in response:
+                if line.strip():
+                    yield json.loads(line.decode("utf-8"))
+        finally:
+            connection.close()
@@ -0,0 +1,291 @@
+"""반복(소크) 실행: 같은 시나리오를 N회 / 일정 시간 / 무기한 반복
+
+회차마다 소요 시간, 재시도 수, 매칭 수를 기록하고, 주기적으로 프로세스 메모리(RSS)와
+선택적으로 Python 할당량(tracemalloc), 템플릿 캐시/객체 수 등을 표본으로 남겨
+회차가 늘어날수록 꾸준히 증가하는 값이 있으면 누수 의심으로 표시한다.
+대화 상자 없이 돌아가므로 밤새 실행해 시간당 회차 수와 메모리 안정성을 확인할 수 있다.
+
+    python -m cli run <시나리오 이름> --repeat 1000 --jitter 0.5 --soak-report soak.json
+    python -m cli run <시나리오 이름> --duration 28800 --trace-allocations
+"""
+
+import json
+import os
+import random
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from template_cache import template_cache
+
+
+def current_rss() -> Optional[int]:
+    """현재 프로세스의 상주 메모리 (바이트). 알 수 없으면 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import win32api
+        import win32process
+        return int(win32process.GetProcessMemoryInfo(win32api.GetCurrentProcess())["WorkingSetSize"])
+    except Exception:
+        pass
+    try:
+        import resource
+        # 현재 값이 아닌 최대값이지만, 증가 여부를 보기에는 충분함 (macOS는 바이트, 그 외는 KB)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+@dataclass
+class IterationResult:
+    index: int
+    result: str  # "finished", "error", "stopped"
+    seconds: float
+    retries: int
+    matches: int
+    error: str = ""
+
+
+@dataclass
+class MemorySample:
+    iteration: int
+    time: float
+    rss: Optional[int]
+    traced: Optional[int]  # tracemalloc으로 추적 중인 Python 할당량 (바이트)
+    probes: Dict[str, float] = field(default_factory=dict)
+
+
+class MemoryMonitor:
+    """회차별 메모리 표본 기록과 증가 추세 판정
+
+    준비 회차(`warmup`) 이후 표본을 네 구간으로 나눠, 마지막 구간의 최솟값이 첫 구간의
+    최댓값보다 크면 (바이트 값은 `min_growth` 이상 차이 날 때) 계속 증가하는 것으로 본다.
+    표본은 최대 `max_samples`개만 보관하고, 넘치면 하나 건너 하나씩 버려 전체 구간을 유지한다.
+    """
+
+    BYTE_SERIES = ("rss", "traced")
+
+    def __init__(self, trace_allocations: bool = False, warmup: int = 3,
+                 min_growth: int = 1024 * 1024, max_samples: int = 2048,
+                 probes: Optional[Dict[str, Callable[[], float]]] = None):
+        self.trace_allocations = trace_allocations
+        self.warmup = warmup
+        self.min_growth = min_growth
+        self.max_samples = max_samples
+        self.probes = dict(probes or {})
+        self.samples: List[MemorySample] = []
+        self._started_tracing = False
+
+    def start(self):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def sample(self, iteration: int) -> MemorySample:
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        probes = {}
+        for name, probe in self.probes.items():
+            try:
+                probes[name] = float(probe())
+            except Exception as e:
+                print(f"메모리 표본 수집 중 오류 발생 ({name}): {e}")
+        sample = MemorySample(iteration, time.time(), current_rss(), traced, probes)
+        self.samples.append(sample)
+        if len(self.samples) > self.max_samples:
+            # 첫 표본(기준)은 남기고 하나 건너 하나씩 버림
+            self.samples = self.samples[:1] + self.samples[2::2]
+        return sample
+
+    def series(self) -> Dict[str, List[float]]:
+        steady = [sample for sample in self.samples if sample.iteration > self.warmup]
+        values: Dict[str, List[float]] = {}
+        for sample in steady:
+            for name in self.BYTE_SERIES:
+                value = getattr(sample, name)
+                if value is not None:
+                    values.setdefault(name, []).append(value)
+            for name, value in sample.probes.items():
+                values.setdefault(name, []).append(value)
+        return values
+
+    def growth(self) -> Dict[str, dict]:
+        """값별 {first, last, change, per_iteration, growing}. 표본이 8개 미만이면 growing은 None"""
+        report = {}
+        steady_iterations = [sample.iteration for sample in self.samples if sample.iteration > self.warmup]
+        for name, values in self.series().items():
+            change = values[-1] - values[0]
+            span = steady_iterations[-1] - steady_iterations[0] if len(steady_iterations) > 1 else 0
+            growing = None
+            if len(values) >= 8:
+                quarter = len(values) // 4
+                growing = min(values[-quarter:]) > max(values[:quarter])
+                if name in self.BYTE_SERIES:
+                    growing = growing and change >= self.min_growth
+            report[name] = {
+                "first": values[0],
+                "last": values[-1],
+                "change": change,
+                "per_iteration": change / span if span else 0.0,
+                "growing": growing,
+            }
+        return report
+
+    def leaks(self) -> List[str]:
+        return [name for name, item in self.growth().items() if item["growing"]]
+
+
+class SoakRunner:
+    """시나리오 반복 실행기. `engine.start_soak(actions, graph, runner)`로 작업 스레드에서 실행
+
+    `iterations`와 `duration`(초)이 모두 None이면 중지할 때까지 반복한다.
+    회차 사이에는 0~`jitter`초 사이의 임의 시간만큼 쉰다.
+    회차가 끝날 때마다 엔진 이벤트 "iteration"을 보내고, 전체가 끝나면 "finished"(요약 포함)를 보낸다.
+    """
+
+    def __init__(self, iterations: Optional[int] = None, duration: Optional[float] = None,
+                 jitter: float = 0.0, sample_every: int = 1, monitor: Optional[MemoryMonitor] = None,
+                 keep_results: int = 1000):
+        self.iterations = iterations
+        self.duration = duration
+        self.jitter = jitter
+        self.sample_every = max(1, sample_every)
+        self.monitor = monitor if monitor is not None else MemoryMonitor()
+        self.results: deque = deque(maxlen=keep_results)  # 최근 회차 결과만 보관
+        self.completed = 0
+        self.finished = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.total_retries = 0
+        self.total_matches = 0
+        self.started: Optional[float] = None
+        self.elapsed = 0.0
+
+    def _done(self, index: int) -> bool:
+        if self.iterations is not None and index >= self.iterations:
+            return True
+        return self.duration is not None and time.perf_counter() - self.started >= self.duration
+
+    def run(self, engine, actions, graph, token) -> bool:
+        """반복 실행 본체 (작업 스레드). 모든 회차가 완료되면 True"""
+        self.monitor.probes.setdefault("template_cache", lambda: template_cache.stats()["entries"])
+        self.monitor.probes.setdefault("event_queue", engine.events.qsize)
+        if graph is None:
+            actions = sorted(actions, key=lambda x: x.order)
+        self.monitor.start()
+        self.started = time.perf_counter()
+        self.monitor.sample(0)
+        index = 0
+        try:
+            while not self._done(index) and not token.cancelled:
+                index += 1
+                retries = engine.metrics.total("retries_total")
+                matches = engine.metrics.total("time_to_find_seconds")
+                started = time.perf_counter()
+                if graph is not None:
+                    ok = engine.execute_graph(actions, graph, token, report=False)
+                else:
+                    ok = engine.execute_scenario_actions(actions, token, report=False)
+                if not ok and token.cancelled:
+                    break
+                result = IterationResult(
+                    index, "finished" if ok else "error", time.perf_counter() - started,
+                    int(engine.metrics.total("retries_total") - retries),
+                    int(engine.metrics.total("time_to_find_seconds") - matches),
+                    "" if ok else (engine.last_error or ""))
+                self._record(result)
+                if index % self.sample_every == 0:
+                    self.monitor.sample(index)
+                engine.metrics.event("iteration", **asdict(result))
+                engine.emit("iteration", self.describe(result), **asdict(result))
+                if self.jitter > 0 and not self._done(index) and token.wait(random.uniform(0, self.jitter)):
+                    break
+            if self.completed and self.completed % self.sample_every:
+                self.monitor.sample(self.completed)
+        except Exception as e:
+            print(f"반복 실행 중 오류 발생: {e}")
+            engine.emit("error", f"반복 실행 중 오류가 발생했습니다: {e}", **self.summary())
+            return False
+        finally:
+            self.elapsed = time.perf_counter() - self.started
+            self.monitor.stop()
+
+        summary = self.summary()
+        if token.cancelled:
+            engine.emit("stopped", f"반복 실행 중지됨 ({self.completed}회 완료)", **summary)
+            return False
+        engine.emit("finished", f"반복 실행 완료: {self.describe_summary(summary)}", **summary)
+        return self.errors == 0
+
+    def _record(self, result: IterationResult):
+        self.results.append(result)
+        self.completed += 1
+        if result.result == "finished":
+            self.finished += 1
+        else:
+            self.errors += 1
+        self.total_seconds += result.seconds
+        self.max_seconds = max(self.max_seconds, result.seconds)
+        self.total_retries += result.retries
+        self.total_matches += result.matches
+
+    def summary(self) -> dict:
+        elapsed = self.elapsed or (time.perf_counter() - self.started if self.started else 0.0)
+        recent = sorted(result.seconds for result in self.results)
+        return {
+            "iterations": self.completed,
+            "finished": self.finished,
+            "errors": self.errors,
+            "elapsed_seconds": elapsed,
+            "iterations_per_hour": self.completed / elapsed * 3600 if elapsed > 0 else 0.0,
+            "mean_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+            "p50_seconds": recent[len(recent) // 2] if recent else 0.0,  # 최근 회차 기준
+            "max_seconds": self.max_seconds,
+            "retries": self.total_retries,
+            "matches": self.total_matches,
+            "memory": self.monitor.growth(),
+            "suspected_leaks": self.monitor.leaks(),
+        }
+
+    @staticmethod
+    def describe(result: IterationResult) -> str:
+        line = (f"[{result.index}회] {result.result} {result.seconds:.2f}초, "
+                f"재시도 {result.retries}회, 매칭 {result.matches}회")
+        return f"{line} ({result.error})" if result.error else line
+
+    @staticmethod
+    def describe_summary(summary: dict) -> str:
+        text = (f"{summary['iterations']}회 (오류 {summary['errors']}회), "
+                f"시간당 {summary['iterations_per_hour']:.0f}회, 평균 {summary['mean_seconds']:.2f}초")
+        rss = summary["memory"].get("rss")
+        if rss is not None:
+            text += f", RSS 변화 {rss['change'] / 1024 / 1024:+.1f}MB"
+        if summary["suspected_leaks"]:
+            text += f", 증가 의심: {', '.join(summary['suspected_leaks'])}"
+        return text
+
+    def write_report(self, path: str):
+        """요약, 최근 회차 결과, 메모리 표본을 JSON으로 저장"""
+        data = {
+            "summary": self.summary(),
+            "results": [asdict(result) for result in self.results],
+            "samples": [asdict(sample) for sample in self.monitor.samples],
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
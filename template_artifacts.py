@@ -0,0 +1,219 @@
+"""템플릿별 사전 컴파일 산출물: 디코딩된 컬러 템플릿, 흑백 피라미드, 단색 여부, 내용 해시
+
+시나리오를 저장할 때(또는 `python -m cli compile`로) 액션마다 템플릿 이미지 옆에
+`<이미지>.tpl`을 만들어 두면, 실행기는 PNG를 디코딩하지 않고 컬러 템플릿을 그대로 읽고
+피라미드도 다시 계산하지 않는다. 실행 중에는 산출물을 읽기만 하고 쓰지 않는다.
+원본 PNG의 수정 시각/크기가 저장 당시와 다르면 실행 시에는 산출물을 무시하고 PNG를 쓰며,
+다음 저장/컴파일 때 다시 만든다. 시각만 바뀌고 픽셀이 같으면(체크아웃 등) 내용 해시로 확인해 재사용한다.
+
+파일 형식: [매직 8바이트][버전 u32][헤더 길이 u32][JSON 헤더][컬러 템플릿 픽셀][피라미드 단계별 흑백 픽셀]
+(npz는 항목마다 zip 멤버를 여는 비용이 계산 비용보다 커서, 한 번의 read로 읽는 형식을 사용)
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from matching import downsample, to_gray
+
+ARTIFACT_SUFFIX = ".tpl"
+ARTIFACT_VERSION = 2
+MAGIC = b"ACLKTPL\0"
+_PREFIX = struct.Struct("<8sII")
+ARTIFACT_LEVELS = 3  # 피라미드 단계 수 (1/2, 1/4, 1/8)
+
+
+class TemplateArtifact:
+    """BGR 템플릿 한 장에서 미리 계산한 파생 데이터"""
+
+    def __init__(self, template: np.ndarray, pyramid: List[np.ndarray], flat: bool, content_hash: str):
+        self.template = template  # 디코딩된 BGR 템플릿 (읽기 전용)
+        self.pyramid = pyramid  # [원본 흑백, 1/2, 1/4, ...]
+        self.flat = flat  # 모든 채널이 단색인 템플릿 (TM_CCOEFF_NORMED 점수가 의미 없음)
+        self.content_hash = content_hash
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.pyramid[0]
+
+
+def content_hash(template: np.ndarray) -> str:
+    """픽셀과 shape로 계산한 해시 (파일 시각과 무관)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((template.shape, str(template.dtype))).encode())
+    digest.update(np.ascontiguousarray(template).data)
+    return digest.hexdigest()
+
+
+def compile_artifact(template: np.ndarray, levels: int = ARTIFACT_LEVELS,
+                     digest: Optional[str] = None) -> TemplateArtifact:
+    gray = to_gray(template, "BGR")
+    pyramid = [gray]
+    # 템플릿이 너무 작아지지 않는 범위까지만 축소 단계 생성
+    while len(pyramid) <= levels and (min(gray.shape[:2]) >> len(pyramid)) >= 4:
+        pyramid.append(downsample(gray, len(pyramid)))
+    _, std = cv2.meanStdDev(template)
+    return TemplateArtifact(template, pyramid, bool(np.all(std < 1e-6)),
+                            digest or content_hash(template))
+
+
+def artifact_path(image_path: str) -> str:
+    return image_path + ARTIFACT_SUFFIX
+
+
+class ArtifactStore:
+    """템플릿별 산출물 저장소
+
+    `compile(path, template)`은 시나리오 저장/컴파일 때 호출해 이미지 옆에 산출물을 만든다.
+    `read(path)`와 `load(path, template)`는 실행 중에 호출하며 파일을 쓰지 않는다.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.compiled = 0  # 새로 컴파일한 수
+        self.loaded = 0  # 저장 파일에서 읽은 수
+        # id(템플릿) -> (템플릿, 산출물). 같은 배열 객체인지 확인해 id 재사용에 대비
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, TemplateArtifact]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, path: str) -> Optional[TemplateArtifact]:
+        """원본 파일과 맞는 저장 산출물. 없거나 원본이 바뀌었으면 None (디코딩/해시 계산 없음)"""
+        try:
+            source_key = _source_key(path)
+        except OSError:
+            return None
+        cache_path = artifact_path(path)
+        if not os.path.exists(cache_path):
+            return None
+        artifact, stored_key = self._read(cache_path)
+        if artifact is None or stored_key != source_key:
+            return None
+        with self._lock:
+            self.loaded += 1
+        self._remember(artifact.template, artifact)
+        return artifact
+
+    def load(self, path: str, template: np.ndarray) -> TemplateArtifact:
+        """실행 시 사용할 산출물. 메모리 → 저장 파일 → (없으면) 메모리에서만 컴파일"""
+        artifact = self._lookup(template)
+        if artifact is not None:
+            return artifact
+        artifact = self.read(path)
+        if artifact is None or artifact.template.shape != template.shape:
+            artifact = compile_artifact(template)
+            with self._lock:
+                self.compiled += 1
+        self._remember(template, artifact)
+        return artifact
+
+    def compile(self, path: str, template: np.ndarray, force: bool = False) -> TemplateArtifact:
+        """저장 파일이 원본과 맞으면 재사용하고, 아니면 컴파일해 이미지 옆에 저장
+
+        실제 파일이 없는 경로(번들 템플릿)는 메모리에만 보관한다.
+        """
+        try:
+            source_key = _source_key(path)
+        except OSError:
+            source_key = None
+
+        cache_path = artifact_path(path)
+        artifact, save = None, source_key is not None
+        if source_key is not None and not force and os.path.exists(cache_path):
+            artifact, stored_key = self._read(cache_path)
+            if artifact is not None and stored_key != source_key:
+                # 파일 시각/크기만 바뀐 경우 픽셀이 같으면 재사용하고 기준 값만 갱신
+                if artifact.content_hash != content_hash(template):
+                    artifact = None
+            else:
+                save = artifact is None
+
+        if artifact is None:
+            artifact = compile_artifact(template)
+            with self._lock:
+                self.compiled += 1
+        else:
+            with self._lock:
+                self.loaded += 1
+        if save:
+            self._save(cache_path, artifact, source_key)
+
+        self._remember(template, artifact)
+        return artifact
+
+    def _lookup(self, template: np.ndarray) -> Optional[TemplateArtifact]:
+        with self._lock:
+            entry = self._entries.get(id(template))
+            if entry is not None and entry[0] is template:
+                self._entries.move_to_end(id(template))
+                return entry[1]
+        return None
+
+    def _remember(self, template: np.ndarray, artifact: TemplateArtifact):
+        with self._lock:
+            self._entries[id(template)] = (template, artifact)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _read(cache_path: str):
+        """저장 파일에서 (산출물, 원본 기준 값) 읽기. 형식이 맞지 않으면 (None, None)"""
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+            magic, version, header_size = _PREFIX.unpack_from(data)
+            if magic != MAGIC or version != ARTIFACT_VERSION:
+                return None, None
+            offset = _PREFIX.size
+            header = json.loads(data[offset:offset + header_size].decode("utf-8"))
+            offset += header_size
+            shape = tuple(header["shape"])
+            size = int(np.prod(shape))
+            template = np.frombuffer(data, np.uint8, size, offset).reshape(shape)
+            offset += size
+            pyramid = []
+            for height, width in header["levels"]:
+                level = np.frombuffer(data, np.uint8, height * width, offset).reshape(height, width)
+                pyramid.append(level)
+                offset += height * width
+            artifact = TemplateArtifact(template, pyramid, header["flat"], header["content_hash"])
+            return artifact, header["source_key"]
+        except (OSError, struct.error, KeyError, TypeError, ValueError) as e:
+            print(f"템플릿 산출물을 읽을 수 없습니다 ({cache_path}): {e}")
+            return None, None
+
+    @staticmethod
+    def _save(cache_path: str, artifact: TemplateArtifact, source_key: List[int]):
+        header = json.dumps({
+            "source_key": source_key,
+            "content_hash": artifact.content_hash,
+            "shape": list(artifact.template.shape),
+            "flat": artifact.flat,
+            "levels": [list(level.shape[:2]) for level in artifact.pyramid],
+        }).encode("utf-8")
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(_PREFIX.pack(MAGIC, ARTIFACT_VERSION, len(header)))
+                f.write(header)
+                f.write(np.ascontiguousarray(artifact.template).tobytes())
+                for level in artifact.pyramid:
+                    f.write(np.ascontiguousarray(level).tobytes())
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            print(f"템플릿 산출물을 저장할 수 없습니다 ({cache_path}): {e}")
+
+
+def _source_key(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+# 프로세스 전체에서 공유하는 저장소
+artifact_store = ArtifactStore()
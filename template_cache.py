@@ -0,0 +1,143 @@
+"""디코딩된 템플릿 이미지를 프로세스 전체에서 공유하는 LRU 캐시"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from template_artifacts import artifact_store
+
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024  # 기본 메모리 예산: 256MB
+
+
+class TemplateCache:
+    """경로 + 수정 시각(mtime) + 파일 크기로 식별되는 템플릿 캐시
+
+    같은 파일이 바뀌지 않았다면 PNG를 다시 디코딩하지 않는다. 이미지 옆의 `.tpl` 산출물이
+    원본과 맞으면 처음 읽을 때도 디코딩 없이 산출물의 픽셀을 쓴다.
+    메모리 예산을 넘으면 가장 오래 사용되지 않은 항목부터 제거한다.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # path -> ((mtime_ns, size), image)
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], np.ndarray]]" = OrderedDict()
+        # 번들에서 메모리 매핑한 템플릿 (디코딩/예산/제거 대상 아님)
+        self._pinned: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_key(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, path: str) -> Optional[np.ndarray]:
+        """캐시된 템플릿 반환 (없거나 파일이 바뀌었으면 디코딩 후 저장)"""
+        with self._lock:
+            pinned = self._pinned.get(path)
+            if pinned is not None:
+                self.hits += 1
+                return pinned
+
+        try:
+            key = self.file_key(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+
+        # 디코딩은 락 밖에서 수행. 원본과 맞는 사전 컴파일 산출물이 있으면 PNG 대신 그 픽셀을 사용
+        artifact = artifact_store.read(path)
+        image = artifact.template if artifact is not None else cv2.imread(path)
+        if image is None:
+            return None
+        # 여러 곳에서 공유하므로 실수로 수정되지 않도록 읽기 전용으로 설정
+        if image.flags.writeable:
+            image.setflags(write=False)
+
+        with self._lock:
+            self.misses += 1
+            self._store(path, key, image)
+        return image
+
+    def register(self, path: str, image: np.ndarray):
+        """이미 픽셀이 준비된 템플릿(번들의 메모리 매핑 배열 등)을 경로 이름으로 등록"""
+        if image.flags.writeable:
+            image.setflags(write=False)
+        with self._lock:
+            self._pinned[path] = image
+
+    def unregister(self, prefix: str) -> int:
+        """`prefix`로 시작하는 등록 항목 제거. 제거한 개수를 반환"""
+        with self._lock:
+            paths = [path for path in self._pinned if path.startswith(prefix)]
+            for path in paths:
+                del self._pinned[path]
+        return len(paths)
+
+    def warm(self, paths: Iterable[str]) -> int:
+        """주어진 경로들을 미리 디코딩해 둔다. 로드에 성공한 개수를 반환"""
+        return sum(1 for path in paths if self.get(path) is not None)
+
+    def set_budget(self, budget_bytes: int):
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict(0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "pinned": len(self._pinned),
+                "bytes": self.current_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _store(self, path: str, key: Tuple[int, int], image: np.ndarray):
+        old = self._entries.pop(path, None)
+        if old is not None:
+            self.current_bytes -= old[1].nbytes
+
+        # 예산보다 큰 이미지는 캐시하지 않음
+        if image.nbytes > self.budget_bytes:
+            return
+
+        self._evict(image.nbytes)
+        self._entries[path] = (key, image)
+        self.current_bytes += image.nbytes
+
+    def _evict(self, incoming_bytes: int):
+        while self._entries and self.current_bytes + incoming_bytes > self.budget_bytes:
+            _, (_, image) = self._entries.popitem(last=False)
+            self.current_bytes -= image.nbytes
+            self.evictions += 1
+
+
+# 프로세스 전체에서 공유하는 캐시 인스턴스
+template_cache = TemplateCache()
+
+
+def configure_template_cache(budget_bytes: int):
+    """공유 캐시의 메모리 예산 변경"""
+    template_cache.set_budget(budget_bytes)
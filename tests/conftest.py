@@ -0,0 +1,81 @@
+"""공용 픽스처: 저장소 루트의 모듈을 불러오고, 합성 화면과 시나리오 디렉토리를 만든다"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCREEN_SIZE = (240, 320)  # (높이, 너비)
+FULL_AREA = (0, 0, SCREEN_SIZE[1], SCREEN_SIZE[0])
+# 액션 이름 -> (템플릿 좌상단 (x, y), 템플릿 크기 (너비, 높이), 클릭 위치)
+TARGETS = {
+    "Action_1": ((40, 30), (32, 24), (56, 42)),
+    "Action_2": ((200, 150), (40, 28), (220, 164)),
+}
+
+
+@pytest.fixture
+def screen() -> np.ndarray:
+    """매칭 위치가 하나뿐인 무작위 BGR 화면"""
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (*SCREEN_SIZE, 3), dtype=np.uint8)
+
+
+def crop(screen: np.ndarray, name: str) -> np.ndarray:
+    (x, y), (w, h), _ = TARGETS[name]
+    return screen[y:y + h, x:x + w].copy()
+
+
+@pytest.fixture
+def scenarios(tmp_path, screen):
+    """화면에 보이는 대상 두 개로 된 "Visible"과, 보이지 않는 대상의 "Missing" 시나리오"""
+    from scenario import Action, ScenarioManager
+
+    manager = ScenarioManager(str(tmp_path / "scenarios"))
+    images_dir = tmp_path / "scenarios" / "images"
+
+    actions = []
+    for order, (name, (_, _, click)) in enumerate(TARGETS.items(), start=1):
+        path = str(images_dir / f"Visible_action_{order}.png")
+        cv2.imwrite(path, crop(screen, name))
+        actions.append(Action(name, path, click, order, wait_time=0.0, search_area=FULL_AREA))
+    assert manager.create_scenario("Visible", actions)
+
+    other = np.random.default_rng(1).integers(0, 256, (24, 32, 3), dtype=np.uint8)
+    path = str(images_dir / "Missing_action_1.png")
+    cv2.imwrite(path, other)
+    assert manager.create_scenario("Missing", [Action("Never", path, (1, 1), 1, 0.0, FULL_AREA)])
+    manager.catalog.refresh()
+    return manager
+
+
+@pytest.fixture
+def sink():
+    from input_sink import RecordingInputSink
+
+    sink = RecordingInputSink()
+    yield sink
+    sink.close()
+
+
+def clicked_positions(sink):
+    return [event[1:] for _, event in sink.recorded if event[0] == "move"]
+
+
+@pytest.fixture
+def engine(screen, sink):
+    """합성 화면을 재생하고 클릭은 기록만 하는 엔진 (플라이트 기록 파일은 저장하지 않음)"""
+    from capture import ReplayCaptureSource
+    from engine import ScenarioEngine
+
+    capture_source = ReplayCaptureSource([screen])
+    engine = ScenarioEngine(capture_source, click=sink, tick_interval=0.01, verbose=False)
+    engine.flight_dir = None
+    yield engine
+    engine.cancel()
+    engine.join(timeout=5)
+    capture_source.close()
@@ -0,0 +1,63 @@
+"""템플릿 산출물 (.tpl): 저장 시점에만 생성, 실행 시에는 PNG 대신 읽기만 함"""
+
+import os
+
+import cv2
+import numpy as np
+
+from template_artifacts import ArtifactStore, artifact_path
+from template_cache import TemplateCache
+
+
+def template_paths(scenarios):
+    return [action.target_image_path for action in scenarios.load_scenario("Visible")]
+
+
+def test_create_scenario_compiles_artifacts(scenarios):
+    for path in template_paths(scenarios):
+        assert os.path.exists(artifact_path(path))
+        artifact = ArtifactStore().read(path)
+        assert artifact is not None
+        assert np.array_equal(artifact.template, cv2.imread(path))
+        assert np.array_equal(artifact.gray, cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2GRAY))
+        assert not artifact.flat
+
+
+def test_cache_reads_artifact_instead_of_decoding_png(scenarios, monkeypatch):
+    import template_cache as template_cache_module
+
+    def no_decode(path, *args):
+        raise AssertionError(f"PNG를 디코딩함: {path}")
+
+    monkeypatch.setattr(template_cache_module.cv2, "imread", no_decode)
+    cache = TemplateCache()
+    for path in template_paths(scenarios):
+        image = cache.get(path)
+        assert image is not None
+        assert not image.flags.writeable
+
+
+def test_stale_artifact_falls_back_to_png_without_writing(scenarios, screen):
+    path = template_paths(scenarios)[0]
+    tpl = artifact_path(path)
+    before = os.stat(tpl).st_mtime_ns
+    changed = np.ascontiguousarray(screen[100:120, 100:140])
+    cv2.imwrite(path, changed)
+
+    assert ArtifactStore().read(path) is None
+    image = TemplateCache().get(path)
+    assert np.array_equal(image, changed)
+    assert ArtifactStore().load(path, image).template is image
+    assert os.stat(tpl).st_mtime_ns == before
+
+    # 다음 컴파일 때 갱신
+    scenarios.compile_scenario("Visible")
+    assert np.array_equal(ArtifactStore().read(path).template, changed)
+
+
+def test_run_path_never_writes_artifacts(scenarios, engine):
+    paths = template_paths(scenarios)
+    for path in paths:
+        os.remove(artifact_path(path))
+    engine.prepare_actions(scenarios.load_scenario("Visible"))
+    assert not any(os.path.exists(artifact_path(path)) for path in paths)
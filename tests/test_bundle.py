@@ -0,0 +1,140 @@
+"""시나리오 번들 (.acb) 저장/불러오기/풀기와 시나리오 삭제·이름 변경"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from bundle import read_bundle, write_bundle
+from scenario import ScenarioManager, safe_file_name
+
+
+def action_fields(actions):
+    return [(action.name, action.click_position, action.search_area, action.order, action.wait_time,
+             action.match_mode) for action in actions]
+
+
+def test_export_and_load_bundle(scenarios, tmp_path):
+    original = scenarios.load_scenario("Visible")
+    path = scenarios.export_bundle("Visible", str(tmp_path / "Visible.acb"))
+
+    actions, graph = scenarios.load_bundle(path)
+    assert graph is None
+    assert action_fields(actions) == action_fields(original)
+    header, templates = read_bundle(path)
+    assert header["name"] == "Visible"
+    for action, template in zip(original, templates):
+        assert np.array_equal(cv2.imread(action.target_image_path), template)
+
+
+def test_import_bundle_round_trip(scenarios, tmp_path):
+    path = scenarios.export_bundle("Visible", str(tmp_path / "Visible.acb"))
+    other = ScenarioManager(str(tmp_path / "other"))
+
+    assert other.import_bundle(path) == "Visible"
+    imported = other.load_scenario("Visible")
+    assert action_fields(imported) == action_fields(scenarios.load_scenario("Visible"))
+    _, templates = read_bundle(path)
+    for action, template in zip(imported, templates):
+        assert os.path.dirname(action.target_image_path) == os.path.join(other.scenarios_dir, "images")
+        assert np.array_equal(cv2.imread(action.target_image_path), template)
+
+
+def test_import_never_overwrites_different_pixels(scenarios, tmp_path):
+    path = scenarios.export_bundle("Visible", str(tmp_path / "Visible.acb"))
+    existing = scenarios.load_scenario("Visible")[0].target_image_path
+    before = cv2.imread(existing)
+
+    # 같은 픽셀이면 기존 파일을 그대로 사용
+    assert scenarios.import_bundle(path, "Same") == "Same"
+    assert scenarios.load_scenario("Same")[0].target_image_path == existing
+
+    # 같은 이름이지만 픽셀이 다르면 새 이름으로 저장
+    header, templates = read_bundle(path)
+    changed = [255 - np.asarray(template) for template in templates]
+    write_bundle(str(tmp_path / "changed.acb"), "Changed", header["actions"], changed,
+                 [entry["source"] for entry in header["templates"]])
+    assert scenarios.import_bundle(str(tmp_path / "changed.acb")) == "Changed"
+    imported = scenarios.load_scenario("Changed")
+    assert imported[0].target_image_path != existing
+    assert np.array_equal(cv2.imread(imported[0].target_image_path), changed[0])
+    assert np.array_equal(cv2.imread(existing), before)
+
+
+@pytest.mark.parametrize("source, name", [
+    ("../../escape.png", "Bad"),
+    ("..", "Bad"),
+    ("sub\\escape.png", "Bad"),
+    ("ok.png", "../Bad"),
+])
+def test_import_rejects_paths_outside_scenario_directory(scenarios, tmp_path, screen, source, name):
+    write_bundle(str(tmp_path / "bad.acb"), name, [{"name": "A", "template": 0, "click_position": [1, 1],
+                                                    "search_area": None}],
+                 [screen[:8, :8].copy()], [source])
+    images_before = sorted(os.listdir(os.path.join(scenarios.scenarios_dir, "images")))
+
+    assert scenarios.import_bundle(str(tmp_path / "bad.acb")) is None
+    assert sorted(os.listdir(os.path.join(scenarios.scenarios_dir, "images"))) == images_before
+    assert not os.path.exists(tmp_path / "escape.png")
+    assert not os.path.exists(tmp_path / "Bad.json")
+    assert not [name for name in os.listdir(scenarios.scenarios_dir) if name.endswith(".tmp")]
+
+
+@pytest.mark.parametrize("name", ["", ".", "..", "a/b", "a\\b", "C:evil", "../x"])
+def test_safe_file_name_rejects_paths(name):
+    with pytest.raises(ValueError):
+        safe_file_name(name)
+    assert safe_file_name(" Scenario_1.png ") == "Scenario_1.png"
+
+
+def test_rename_and_delete_move_all_scenario_files(scenarios, tmp_path):
+    scenarios.export_bundle("Visible")
+    memory = scenarios.location_memory("Visible")
+    memory.remember("Action_1", (40, 30), False)
+    memory.save()
+    scenarios.catalog.record_run("Visible", "finished", 1.0)
+
+    assert scenarios.rename_scenario("Visible", "Renamed")
+    root = scenarios.scenarios_dir
+    assert not any(os.path.exists(os.path.join(root, f"Visible{ext}")) for ext in (".json", ".acb"))
+    assert os.path.exists(os.path.join(root, "Renamed.json"))
+    assert read_bundle(os.path.join(root, "Renamed.acb"))[0]["name"] == "Renamed"
+    assert scenarios.location_memory("Renamed").predict("Action_1") == (40, 30)
+    assert scenarios.catalog.get("Renamed").run_count == 1
+    with open(os.path.join(root, "Renamed.json"), encoding="utf-8") as f:
+        images = [action["target_image"] for action in json.load(f)["actions"]]
+    assert all(os.path.basename(path).startswith("Renamed_action_") and os.path.exists(path) for path in images)
+    assert len(scenarios.load_scenario("Renamed")) == 2
+
+    assert not scenarios.rename_scenario("Renamed", "Missing")  # 이미 있는 이름
+    assert scenarios.delete_scenario("Renamed")
+    assert not any(os.path.exists(os.path.join(root, name))
+                   for name in ("Renamed.json", "Renamed.acb", os.path.join("locations", "Renamed.json")))
+    assert "Renamed" not in scenarios.list_scenarios()
+
+
+def test_edit_bundle_backed_scenario_unpacks_templates(scenarios, tmp_path):
+    from template_cache import template_cache
+
+    # 번들만 있는 시나리오 디렉토리
+    other = ScenarioManager(str(tmp_path / "other"))
+    scenarios.export_bundle("Visible", other.bundle_path("Visible"))
+    _, templates = read_bundle(other.bundle_path("Visible"))
+    loaded = other.load_scenario("Visible")
+    assert all(action.target_image_path.endswith(("#0", "#1")) for action in loaded)
+
+    # GUI의 액션 삭제와 같은 순서: 선택 -> 제거 -> 순서 재정렬 -> 저장
+    other.current_scenario, other.current_actions = "Visible", loaded
+    other.current_actions.pop(0)
+    other.current_actions[0].order = 1
+    assert other.save_current_scenario()
+
+    assert other.scenario_path("Visible").endswith(".json")
+    reloaded = other.load_scenario("Visible")
+    assert [action.name for action in reloaded] == ["Action_2"]
+    path = reloaded[0].target_image_path
+    assert os.path.dirname(path) == os.path.join(other.scenarios_dir, "images")
+    assert np.array_equal(cv2.imread(path), templates[1])
+    assert np.array_equal(template_cache.get(path), templates[1])
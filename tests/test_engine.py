@@ -0,0 +1,209 @@
+"""엔진 실행 루프: 취소, 파이프라인 실행, 감지 모드, 변화 감지, 위치 기억 (재생 캡처 + 기록 입력)"""
+
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from capture import ReplayCaptureSource
+from conftest import FULL_AREA, SCREEN_SIZE, TARGETS, clicked_positions, crop
+from engine import CancellationToken, ScenarioEngine
+from input_sink import RecordingInputSink
+from location_memory import LocationMemory
+from scenario import Action
+from watch import WatchRule
+
+
+def next_event(engine, *kinds, timeout=5.0):
+    """`kinds` 중 하나인 다음 이벤트 (다른 이벤트는 건너뜀)"""
+    while True:
+        event = engine.events.get(timeout=timeout)
+        if event.kind in kinds:
+            return event
+
+
+def test_watch_handler_error_ends_run_with_error_event(engine, screen):
+    def handler(rule, location):
+        raise RuntimeError("핸들러 실패")
+
+    rule = WatchRule("Action_1", crop(screen, "Action_1"), FULL_AREA, handler=handler)
+    token = engine.start_watch([rule])
+    event = next_event(engine, "error", "stopped")
+    assert event.kind == "error"
+    assert "핸들러 실패" in event.message
+    assert event.run == token.run_id
+    engine.join(timeout=5)
+    assert not engine.running
+    assert engine.last_error == "핸들러 실패"
+
+
+def test_watch_emits_stopped_when_cancelled(engine, screen):
+    rule = WatchRule("Action_1", crop(screen, "Action_1"), FULL_AREA, click_position=(1, 2))
+    token = engine.start_watch([rule])
+    assert next_event(engine, "click").data["rule"] == "Action_1"
+    token.cancel()
+    assert next_event(engine, "stopped", "error").kind == "stopped"
+    engine.join(timeout=5)
+    assert not engine.running
+
+
+def test_location_memory_window_uses_matched_scale(tmp_path):
+    rng = np.random.default_rng(2)
+    template = rng.integers(0, 256, (64, 80, 3), dtype=np.uint8)
+    screen = rng.integers(0, 256, (*SCREEN_SIZE, 3), dtype=np.uint8)
+    scaled = cv2.resize(template, (120, 96), interpolation=cv2.INTER_LINEAR)
+    screen[60:156, 100:220] = scaled
+    path = str(tmp_path / "scaled.png")
+    cv2.imwrite(path, template)
+    action = Action("Scaled", path, (1, 1), 1, 0.0, FULL_AREA, match_mode="multiscale")
+
+    capture_source = ReplayCaptureSource([screen])
+    engine = ScenarioEngine(capture_source, click=RecordingInputSink(), tick_interval=0.01, verbose=False)
+    engine.flight_dir = None
+    engine.location_memory = LocationMemory()
+    assert engine.execute_scenario_actions([action], CancellationToken(), report=False)
+    assert engine.location_memory.entries["Scaled"]["scale"] == 1.5
+
+    # 창은 1.5배 템플릿(120x96) + 여백 크기여야 두 번째 실행에서 창 안에서 찾는다
+    window = engine.location_memory.window("Scaled", template.shape, FULL_AREA)
+    assert window == (84, 44, 236, 172)
+    assert engine.execute_scenario_actions([action], CancellationToken(), report=False)
+    assert engine.location_stats.window_hits == 1
+    assert engine.location_stats.full_scans == 0
+    capture_source.close()
+
+
+@pytest.fixture
+def match_calls(monkeypatch):
+    """cv2.matchTemplate 호출 수"""
+    calls = []
+    match_template = cv2.matchTemplate
+
+    def counting(*args, **kwargs):
+        calls.append(args[1].shape)
+        return match_template(*args, **kwargs)
+
+    monkeypatch.setattr(cv2, "matchTemplate", counting)
+    return calls
+
+
+def test_unchanged_frame_skips_match_template(engine, scenarios, match_calls):
+    token = engine.start_scenario(scenarios.load_scenario("Missing"))
+    deadline = time.perf_counter() + 5
+    while engine.change_stats.skipped < 5 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    token.cancel()
+    assert next_event(engine, "stopped", "error").kind == "stopped"
+    engine.join(timeout=5)
+
+    # 같은 화면이 계속 재생되므로 처음 한 번만 매칭하고 이후 틱은 모두 건너뜀
+    report = engine.change_stats.report()
+    assert report["matches_performed"] == 1
+    assert report["matches_skipped"] >= 5
+    assert len(match_calls) == 1
+
+
+def test_watch_fires_cached_hit_again_only_for_repeat_rules(engine, screen, match_calls):
+    once = WatchRule("Action_1", crop(screen, "Action_1"), FULL_AREA, click_position=(1, 1))
+    repeat = WatchRule("Action_2", crop(screen, "Action_2"), (150, 100, 320, 240),
+                       click_position=(2, 2), repeat=True)
+    token = engine.start_watch([once, repeat])
+    clicks = [next_event(engine, "click").data["rule"] for _ in range(6)]
+    token.cancel()
+    engine.join(timeout=5)
+
+    assert clicks.count("Action_1") == 1
+    assert clicks.count("Action_2") == 5
+    assert len(match_calls) == 2  # 규칙마다 처음 한 번만 매칭
+
+
+def test_cancel_wakes_engine_thread_from_retry_wait(engine, scenarios, sink):
+    engine.tick_interval = 30.0  # 취소가 대기를 깨우지 않으면 시간 안에 끝나지 않음
+    token = engine.start_scenario(scenarios.load_scenario("Missing"))
+    assert next_event(engine, "status").data["action"] == "Never"
+    started = time.perf_counter()
+    engine.cancel()
+    engine.join(timeout=5)
+    assert not engine.running
+    assert time.perf_counter() - started < 2.0
+    event = next_event(engine, "stopped", "error")
+    assert (event.kind, event.run) == ("stopped", token.run_id)
+    assert not sink.recorded
+
+
+def test_cancel_during_wait_time_skips_remaining_actions(engine, scenarios, sink):
+    actions = scenarios.load_scenario("Visible")
+    actions[0].wait_time = 30.0
+    token = engine.start_scenario(actions)
+    assert next_event(engine, "action_done").data["action"] == "Action_1"
+    token.cancel()
+    engine.join(timeout=5)
+    assert not engine.running
+    assert next_event(engine, "stopped", "finished").kind == "stopped"
+    assert clicked_positions(sink) == [TARGETS["Action_1"][2]]
+
+
+def test_new_run_cancels_previous_and_tags_events(engine, scenarios):
+    first = engine.start_scenario(scenarios.load_scenario("Missing"))
+    second = engine.start_scenario(scenarios.load_scenario("Visible"))
+    assert first.cancelled
+    assert not second.cancelled
+    assert second.run_id > first.run_id
+    finished = next_event(engine, "finished")
+    assert finished.run == second.run_id
+    engine.join(timeout=5)
+
+
+def click_times(sink):
+    return [recorded_at for recorded_at, event in sink.recorded if event[0] == "move"]
+
+
+@pytest.mark.parametrize("pipelined", [True, False])
+def test_pipelined_run_clicks_next_target_as_soon_as_it_appears(scenarios, screen, sink, pipelined):
+    hidden = screen.copy()
+    (x, y), (w, h), _ = TARGETS["Action_2"]
+    hidden[y:y + h, x:x + w] = 0
+    # 첫 번째 대상을 찾은 뒤 몇 번의 캡처 동안은 두 번째 대상이 보이지 않음
+    capture_source = ReplayCaptureSource([screen, hidden, hidden, hidden, screen], loop=False)
+    engine = ScenarioEngine(capture_source, click=sink, tick_interval=0.01, verbose=False,
+                            pipelined=pipelined, settle_time=0.05, lookahead_interval=0.01)
+    engine.flight_dir = None
+    actions = scenarios.load_scenario("Visible")
+    actions[0].wait_time = 0.5
+
+    engine.start_scenario(actions)
+    assert next_event(engine, "finished", "error", "stopped").kind == "finished"
+    engine.join(timeout=5)
+    capture_source.close()
+
+    assert clicked_positions(sink) == [TARGETS["Action_1"][2], TARGETS["Action_2"][2]]
+    first, second = click_times(sink)
+    if pipelined:
+        # 정착 시간은 지키되 원래 대기 시간(0.5초)을 다 기다리지 않음
+        assert 0.05 <= second - first < 0.4
+    else:
+        assert second - first >= 0.5
+
+
+def test_pipelined_lookahead_retries_remembered_window_through_change_detection(scenarios, screen, sink):
+    hidden = screen.copy()
+    (x, y), (w, h), _ = TARGETS["Action_2"]
+    hidden[y:y + h, x:x + w] = 0
+    capture_source = ReplayCaptureSource([screen] + [hidden] * 6 + [screen], loop=False)
+    engine = ScenarioEngine(capture_source, click=sink, tick_interval=0.01, verbose=False,
+                            pipelined=True, settle_time=0.0, lookahead_interval=0.01)
+    engine.flight_dir = None
+    engine.location_memory = LocationMemory()
+    engine.location_memory.remember("Action_2", (x, y), predicted_hit=False)
+    actions = scenarios.load_scenario("Visible")
+    actions[0].wait_time = 2.0
+
+    assert engine.execute_scenario_actions(actions, CancellationToken(), report=False)
+    capture_source.close()
+
+    # 대기 시간 동안 틱마다 기억한 창부터 보고, 창이 그대로인 틱은 매칭하지 않음
+    assert engine.location_stats.window_hits == 1
+    assert engine.location_stats.window_misses == 3
+    assert engine.change_stats.skipped >= 2
+    assert clicked_positions(sink) == [TARGETS["Action_1"][2], TARGETS["Action_2"][2]]
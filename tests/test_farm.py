@@ -0,0 +1,41 @@
+"""팜 모드: 디스플레이 없이 replay 캡처 + dry-run 작업 프로세스로 실행"""
+
+import cv2
+import pytest
+
+from farm import ScenarioFarm
+
+
+@pytest.fixture
+def replay_dir(tmp_path, screen, monkeypatch):
+    # 작업 프로세스의 플라이트 기록(flight/)이 저장소가 아닌 임시 디렉토리에 쌓이도록
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "replay"
+    path.mkdir()
+    cv2.imwrite(str(path / "frame_0000.png"), screen)
+    return str(path)
+
+
+def test_farm_runs_jobs_and_reports_failures_per_job(scenarios, replay_dir):
+    farm = ScenarioFarm(workers=2, scenarios_dir=scenarios.scenarios_dir, capture="replay", replay=replay_dir,
+                        dry_run=True, use_xvfb=False, job_timeout=0.5, health_timeout=60.0)
+    with farm:
+        report = farm.run(["Visible", "Missing", "Visible", "NoSuchScenario"])
+    assert [(result.scenario, result.ok) for result in report.results] == [
+        ("Visible", True), ("Missing", False), ("Visible", True), ("NoSuchScenario", False)]
+    assert report.results[1].error == "시간 초과"
+    assert "NoSuchScenario" in report.results[3].error
+    assert report.restarts == 0
+
+
+def test_worker_startup_failure_does_not_abort_the_farm(scenarios, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    farm = ScenarioFarm(workers=1, scenarios_dir=scenarios.scenarios_dir, capture="replay",
+                        replay=str(tmp_path / "missing.mp4"), dry_run=True, use_xvfb=False,
+                        max_startup_failures=2, health_timeout=60.0)
+    with farm:
+        report = farm.run(["Visible", "Visible"])
+        assert farm.health()[0]["disabled"]
+    assert [result.ok for result in report.results] == [False, False]
+    assert all("초기화 실패" in result.error for result in report.results)
+    assert report.summary()["failed"] == 2
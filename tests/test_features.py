@@ -0,0 +1,107 @@
+"""특징점(ORB) 보조 매칭: 템플릿 매칭이 놓치는 확대된 대상, 특징점 저장 파일"""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import features
+from capture import ReplayCaptureSource
+from engine import ScenarioEngine
+from features import FeatureMatcher, FeatureStore, compute_features, feature_path
+from matching import TemplateMatcher
+
+SCALE = 1.6
+LOCATION = (100, 50)
+
+
+def textured_template(seed):
+    """도형과 글자가 있는 버튼 모양 템플릿 (특징점이 충분히 나옴)"""
+    rng = np.random.default_rng(seed)
+    template = np.full((90, 140, 3), 230, np.uint8)
+    for _ in range(12):
+        x, y = (int(v) for v in rng.integers(0, (130, 80)))
+        color = tuple(int(v) for v in rng.integers(0, 200, 3))
+        if rng.random() < 0.5:
+            w, h = (int(v) for v in rng.integers(8, 30, 2))
+            cv2.rectangle(template, (x, y), (x + w, y + h), color, -1)
+        else:
+            cv2.circle(template, (x, y), int(rng.integers(4, 14)), color, -1)
+    cv2.putText(template, "OK 42", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (20, 20, 20), 2)
+    return template
+
+
+@pytest.fixture
+def template():
+    return textured_template(0)
+
+
+@pytest.fixture
+def zoomed_screen(template):
+    """흐린 잡음 배경에 템플릿을 1.6배로 확대해 붙인 화면"""
+    noise = np.random.default_rng(9).integers(0, 256, (300, 400, 3), dtype=np.uint8)
+    screen = cv2.GaussianBlur(noise, (0, 0), 3)
+    zoomed = cv2.resize(template, None, fx=SCALE, fy=SCALE)
+    x, y = LOCATION
+    screen[y:y + zoomed.shape[0], x:x + zoomed.shape[1]] = zoomed
+    return screen
+
+
+def test_feature_matcher_finds_zoomed_target_that_template_matching_misses(template, zoomed_screen):
+    assert not TemplateMatcher().match(zoomed_screen, template, "default").found
+
+    result = FeatureMatcher().match(zoomed_screen, compute_features(template))
+    assert result.found
+    assert result.mode == "feature"
+    assert np.allclose(result.location, LOCATION, atol=3)
+    assert result.scale == pytest.approx(SCALE, rel=0.05)
+    assert set(result.timings) == {"describe", "query", "verify"}
+
+
+def test_feature_matcher_rejects_unrelated_and_featureless_templates(zoomed_screen):
+    assert not FeatureMatcher().match(zoomed_screen, compute_features(textured_template(5))).found
+
+    flat = compute_features(np.full((20, 20, 3), 128, np.uint8))
+    assert not flat.usable
+    assert not FeatureMatcher().match(zoomed_screen, flat).found
+
+
+def test_engine_falls_back_to_features_and_remembers_scale(template, zoomed_screen):
+    capture_source = ReplayCaptureSource([zoomed_screen])
+    area = (0, 0, 400, 300)
+    engine = ScenarioEngine(capture_source, verbose=False)
+    assert engine.find_target(zoomed_screen, template, area) is None
+
+    engine.feature_fallback = True
+    location = engine.find_target(zoomed_screen, template, area)
+    assert location is not None
+    assert np.allclose(location, LOCATION, atol=3)
+    assert engine.last_match_scale == pytest.approx(SCALE, rel=0.05)
+    assert engine.metrics.total("match_confidence") == 3  # default 두 번 + 특징점 한 번
+    capture_source.close()
+
+
+def test_feature_store_saves_and_reuses_descriptors(template, tmp_path, monkeypatch):
+    path = str(tmp_path / "button.png")
+    cv2.imwrite(path, template)
+    first = FeatureStore().load(path, template)
+    assert os.path.exists(feature_path(path))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("저장된 특징점이 있으면 다시 계산하지 않아야 함")
+
+    monkeypatch.setattr(features, "compute_features", fail)
+    loaded = FeatureStore().load(path, template)
+    assert np.array_equal(loaded.points, first.points)
+    assert np.array_equal(loaded.descriptors, first.descriptors)
+    assert loaded.shape == template.shape[:2]
+    monkeypatch.undo()
+
+    # 원본이 바뀌면 다시 계산해 저장
+    cv2.imwrite(path, textured_template(5))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    changed = textured_template(5)
+    recomputed = FeatureStore().load(path, changed)
+    assert not np.array_equal(recomputed.descriptors[:10], first.descriptors[:10])
@@ -0,0 +1,113 @@
+"""플라이트 레코더: 링 버퍼 덮어쓰기, 솎아 저장, 기록 파일 저장/읽기/정리"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from conftest import SCREEN_SIZE
+from flight_recorder import ALIGNMENT, FLIGHT_EXT, FlightRecorder, dump_name, prune_dumps, read_flight
+
+
+def frame(value, shape=(6, 8, 3)):
+    return np.full(shape, value, np.uint8)
+
+
+def test_ring_buffer_wraps_and_keeps_newest_frames_in_order():
+    recorder = FlightRecorder(capacity=3, slot_bytes=1024)
+    nbytes = recorder.nbytes
+    for index in range(5):
+        recorder.record(frame(index), f"action_{index % 2}", score=index / 10, found=index == 4,
+                        area=(index, 0, index + 8, 6))
+    assert recorder.count == 5
+    assert recorder.nbytes == nbytes  # 기록해도 메모리 사용량은 그대로
+
+    entries, frames = recorder.snapshot()
+    assert [entry["label"] for entry in entries] == ["action_0", "action_1", "action_0"]
+    assert [frame[0] for frame in frames] == [2, 3, 4]
+    assert [entry["score"] for entry in entries] == pytest.approx([0.2, 0.3, 0.4])
+    assert [entry["found"] for entry in entries] == [False, False, True]
+    assert entries[-1]["area"] == [4, 0, 12, 6]
+    assert recorder.labels == ["action_0", "action_1"]  # 이름은 한 번만 보관
+
+
+def test_large_frames_are_decimated_to_fit_slot():
+    recorder = FlightRecorder(capacity=2, slot_bytes=1000)
+    big = np.arange(40 * 50 * 3, dtype=np.uint32).astype(np.uint8).reshape(40, 50, 3)
+    recorder.record(big, "big", layout="RGB")
+    recorder.record(frame(9, (5, 5)), "gray")
+    entries, frames = recorder.snapshot()
+
+    decimation = entries[0]["decimation"]
+    assert decimation > 1
+    assert frames[0].nbytes <= 1000
+    expected = big[::decimation, ::decimation]
+    assert entries[0]["shape"] == list(expected.shape)
+    assert np.array_equal(frames[0].reshape(expected.shape), expected)
+    assert entries[0]["layout"] == "RGB"
+    assert (entries[1]["layout"], entries[1]["shape"], entries[1]["score"]) == ("GRAY", [5, 5], None)
+
+
+def test_dump_and_read_round_trip(tmp_path):
+    recorder = FlightRecorder(capacity=4, slot_bytes=4096)
+    assert recorder.dump(str(tmp_path / "empty.acfr")) is None
+
+    shapes = [(6, 8, 3), (7, 9, 4), (3, 5)]
+    for index, shape in enumerate(shapes):
+        recorder.record(np.random.default_rng(index).integers(0, 256, shape, dtype=np.uint8), "로그인",
+                        score=0.5, layout="BGRA" if len(shape) == 3 and shape[2] == 4 else "BGR")
+    expected = recorder.snapshot()[1]
+
+    path = recorder.dump(str(tmp_path / "sub" / dump_name("timeout: 로그인")), reason="timeout")
+    assert path.endswith(FLIGHT_EXT)
+    header, frames = read_flight(path)
+    assert header["reason"] == "timeout"
+    assert [entry["shape"] for entry in header["records"]] == [list(shape) for shape in shapes]
+    assert [entry["label"] for entry in header["records"]] == ["로그인"] * 3
+    for entry, stored, original in zip(header["records"], frames, expected):
+        assert entry["offset"] % ALIGNMENT == 0
+        assert np.array_equal(stored.reshape(-1), original)
+        assert not stored.flags.writeable
+    assert not list((tmp_path / "sub").glob("*.tmp"))
+
+
+def test_read_rejects_other_files(tmp_path):
+    path = tmp_path / "other.acfr"
+    path.write_bytes(b"NOTFLIGHT" + b"\0" * 16)
+    with pytest.raises(ValueError):
+        read_flight(str(path))
+
+
+def test_dump_names_are_unique_and_prune_keeps_newest(tmp_path):
+    names = {dump_name("error/../x") for _ in range(5)}
+    assert len(names) == 5
+    assert all("/" not in name and name.endswith("_error____x" + FLIGHT_EXT) for name in names)
+
+    for index in range(5):
+        path = tmp_path / f"{index}{FLIGHT_EXT}"
+        path.write_bytes(b"")
+        os.utime(path, ns=(index * 10**9, index * 10**9))
+    (tmp_path / "notes.txt").write_text("keep")
+    assert prune_dumps(str(tmp_path), 2) == 3
+    assert sorted(os.listdir(tmp_path)) == [f"3{FLIGHT_EXT}", f"4{FLIGHT_EXT}", "notes.txt"]
+    assert prune_dumps(str(tmp_path / "missing"), 2) == 0
+
+
+def test_engine_dumps_recent_frames_when_action_is_slow(engine, scenarios, tmp_path):
+    engine.flight_dir = str(tmp_path / "flight")
+    engine.slow_action_seconds = 0.05
+    token = engine.start_scenario(scenarios.load_scenario("Missing"))
+    deadline = time.perf_counter() + 5
+    while not os.path.isdir(engine.flight_dir) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    token.cancel()
+    engine.join(timeout=5)
+
+    dumps = os.listdir(engine.flight_dir)
+    assert len(dumps) == 1 and "slow_Never" in dumps[0]
+    header, frames = read_flight(os.path.join(engine.flight_dir, dumps[0]))
+    assert header["reason"] == "slow_Never"
+    assert {entry["label"] for entry in header["records"]} == {"Never"}
+    assert not any(entry["found"] for entry in header["records"])
+    assert frames[-1].shape == (*SCREEN_SIZE, 3)
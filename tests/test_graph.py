@@ -0,0 +1,109 @@
+"""그래프 시나리오: 먼저 보이는 후보 분기, 제한 시간, 시간 초과 분기, 클릭 없는 후보"""
+
+import json
+import os
+
+from conftest import TARGETS, clicked_positions, crop
+from engine import CancellationToken
+from scenario import Action, Branch, ScenarioGraph, ScenarioManager, Step
+
+
+def graph_actions(scenarios):
+    """Visible 시나리오의 두 대상 + 보이지 않는 대상. Action_2는 클릭 없이 분기 조건으로만 사용"""
+    visible = scenarios.load_scenario("Visible")
+    never = scenarios.load_scenario("Missing")[0]
+    actions = [visible[0], visible[1], never]
+    actions[1].click_position = None
+    for order, action in enumerate(actions, start=1):
+        action.order = order
+    return actions
+
+
+def make_graph(*steps, start=None):
+    return ScenarioGraph(start or steps[0].name, {step.name: step for step in steps})
+
+
+def run_graph(engine, actions, graph):
+    """그래프를 현재 스레드에서 실행하고 (결과, 보낸 이벤트 목록) 반환"""
+    result = engine.execute_graph(actions, graph, CancellationToken())
+    events = []
+    while not engine.events.empty():
+        events.append(engine.events.get_nowait())
+    return result, events
+
+
+def test_first_visible_candidate_wins(engine, scenarios, sink):
+    actions = graph_actions(scenarios)
+    # 후보 둘이 같은 틱에 보이면 먼저 적힌 후보 (Action_1)
+    graph = make_graph(Step("시작", [Branch("Never"), Branch("Action_1"), Branch("Action_2")]))
+    result, events = run_graph(engine, actions, graph)
+    assert result
+    assert events[-1].kind == "finished"
+    assert clicked_positions(sink) == [TARGETS["Action_1"][2]]
+
+
+def test_timeout_follows_fallback_edge_and_skips_click_less_branch(engine, scenarios, sink):
+    actions = graph_actions(scenarios)
+    graph = make_graph(
+        Step("대기", [Branch("Action_2", "보이지 않음")]),
+        Step("보이지 않음", [Branch("Never")], timeout=0.05, on_timeout="마지막"),
+        Step("마지막", [Branch("Action_1")]),
+    )
+    result, events = run_graph(engine, actions, graph)
+    assert result
+    # Action_2는 클릭 위치가 없으므로 클릭은 마지막 단계의 Action_1뿐
+    assert clicked_positions(sink) == [TARGETS["Action_1"][2]]
+    steps = [event.data["step"] for event in events if event.kind == "status"]
+    assert steps == ["대기", "보이지 않음", "마지막"]
+
+
+def test_timeout_without_fallback_is_an_error(engine, scenarios, sink):
+    actions = graph_actions(scenarios)
+    graph = make_graph(Step("보이지 않음", [Branch("Never")], timeout=0.05))
+    result, events = run_graph(engine, actions, graph)
+    assert not result
+    assert events[-1].kind == "error"
+    assert "보이지 않음" in engine.last_error
+    assert clicked_positions(sink) == []
+
+
+def test_graph_round_trips_through_scenario_json(scenarios):
+    actions = graph_actions(scenarios)
+    graph = make_graph(
+        Step("대기", [Branch("Action_2", "끝"), Branch("Never", None)], timeout=1.5, on_timeout="끝"),
+        Step("끝", [Branch("Action_1")]),
+    )
+    assert scenarios.create_scenario("Graph", actions, graph)
+    loaded = scenarios.load_graph("Graph")
+    assert loaded.to_dict() == graph.to_dict()
+    assert scenarios.load_scenario("Graph")[1].click_position is None
+    with open(os.path.join(scenarios.scenarios_dir, "Graph.json"), encoding="utf-8") as f:
+        assert json.load(f)["graph"]["start"] == "대기"
+
+
+def test_linear_run_waits_without_clicking_click_less_action(engine, scenarios, sink):
+    actions = graph_actions(scenarios)[:2]
+    assert engine.execute_scenario_actions(actions, CancellationToken())
+    assert clicked_positions(sink) == [TARGETS["Action_1"][2]]
+
+
+def test_benchmark_runs_graph_scenarios_with_graph_executor(tmp_path, screen):
+    import cv2
+    from benchmarks.pipeline import bench_scenarios
+
+    # 벤치마크는 각 템플릿을 검색 영역 왼쪽 위에 그리므로 영역이 겹치지 않게 둠
+    manager = ScenarioManager(str(tmp_path / "bench"))
+    actions = []
+    for order, (name, ((x, y), (w, h), click)) in enumerate(TARGETS.items(), start=1):
+        path = str(tmp_path / "bench" / "images" / f"Graph_action_{order}.png")
+        cv2.imwrite(path, crop(screen, name))
+        actions.append(Action(name, path, click if order == 2 else None, order, 0.0, (x, y, x + w + 8, y + h + 8)))
+    graph = make_graph(Step("시작", [Branch("Action_1", "끝")]), Step("끝", [Branch("Action_2")]))
+    assert manager.create_scenario("Graph", actions, graph)
+    assert manager.create_scenario("Linear", actions)
+
+    results = {result["scenario"]: result for result in bench_scenarios(manager.scenarios_dir, 2)}
+    assert results["Graph"]["kind"] == "graph"
+    assert results["Graph"]["completion_rate"] == 1.0
+    assert results["Linear"]["kind"] == "linear"
+    assert results["Linear"]["completion_rate"] == 1.0
@@ -0,0 +1,146 @@
+"""FakeInputListener로 영역/클릭 위치 지정 흐름 확인"""
+
+import os
+import threading
+
+import pytest
+
+from input_listener import FakeInputListener, PollingInputListener, create_input_listener
+
+
+def test_script_is_delivered_in_order_from_background_thread():
+    notified = threading.Event()
+    calls = []
+
+    def on_event():
+        calls.append(threading.current_thread().name)
+        if len(calls) == 3:
+            notified.set()
+
+    script = [(0.01, "press", "right", 10, 20), (0.01, "release", "right", 10, 20), (0.01, "key", "esc")]
+    with create_input_listener("fake", script=script, on_event=on_event) as listener:
+        assert notified.wait(2)
+        events = listener.drain()
+    assert [(event.kind, event.button, event.x, event.y) for event in events] == [
+        ("press", "right", 10, 20), ("release", "right", 10, 20), ("key", "esc", 0, 0)]
+    assert calls == ["input-fake"] * 3
+
+
+def test_events_are_ignored_when_stopped_and_drained_on_stop():
+    listener = FakeInputListener()
+    listener.click(1, 2)
+    assert listener.drain() == []
+
+    listener.start()
+    listener.click(1, 2)
+    listener.stop()
+    assert listener.drain() == []
+    assert not listener.running
+
+
+@pytest.fixture
+def gui(tmp_path, monkeypatch, screen):
+    """입력 감지를 FakeInputListener로, 캡처/입력을 재생/기록 백엔드로 바꾼 GUI"""
+    pytest.importorskip("pyautogui")
+    if not os.environ.get("DISPLAY") and os.name != "nt":
+        pytest.skip("GUI 테스트에는 디스플레이가 필요합니다")
+    import main
+    from capture import ReplayCaptureSource
+    from input_sink import RecordingInputSink
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "create_capture_source", lambda: ReplayCaptureSource([screen]))
+    monkeypatch.setattr(main, "create_input_sink", RecordingInputSink)
+    monkeypatch.setattr(main, "create_input_listener", lambda on_event: FakeInputListener(on_event=on_event))
+    app = main.ScreenClickSystem()
+    app.completed = []
+    # 이미지 저장/액션 저장 대화 상자는 건너뛰고 호출만 기록
+    monkeypatch.setattr(app, "auto_save_and_setup", lambda: app.completed.append("area"))
+    monkeypatch.setattr(app, "save_action", lambda: app.completed.append("click"))
+    yield app
+    app.quit_program()
+    app.root.destroy()
+
+
+def pump(app, condition, timeout=2.0):
+    deadline = threading.Event()
+    timer = threading.Timer(timeout, deadline.set)
+    timer.start()
+    try:
+        while not condition() and not deadline.is_set():
+            app.root.update()
+    finally:
+        timer.cancel()
+    return condition()
+
+
+def test_area_selection_uses_two_right_clicks(gui):
+    gui.start_area_selection()
+    gui.input_listener.click(110, 80)
+    gui.input_listener.click(10, 20, button="left")  # 왼쪽 버튼은 무시
+    gui.input_listener.click(10, 20)
+    assert pump(gui, lambda: gui.completed == ["area"])
+    assert gui.search_area == (10, 20, 110, 80)
+    assert not gui.listening_for_clicks
+    assert not gui.input_listener.running
+
+
+def test_click_selection_from_scripted_input(gui):
+    gui.input_listener.script = [(0.05, "press", "right", 55, 66), (0.01, "release", "right", 55, 66)]
+    gui.start_click_selection()
+    assert pump(gui, lambda: gui.completed == ["click"])
+    assert gui.click_position == (55, 66)
+    assert not gui.input_listener.running
+
+
+def test_escape_cancels_area_selection(gui):
+    gui.start_area_selection()
+    gui.input_listener.click(5, 5)
+    gui.input_listener.inject("key", "esc")
+    assert pump(gui, lambda: not gui.listening_for_clicks)
+    assert gui.temp_coords is None
+    assert gui.search_area is None
+    assert gui.completed == []
+
+
+class FakePointerReader:
+    """버튼 상태를 순서대로 돌려주는 읽기 객체 (마지막 상태 유지)"""
+
+    def __init__(self, states, opened):
+        self.states = list(states)
+        self.closed = False
+        opened.append(self)
+
+    def read(self):
+        state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+        return state, 7, 8, False
+
+    def close(self):
+        self.closed = True
+
+
+def poll_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "input-poll"]
+
+
+def test_polling_listener_reads_only_while_started(monkeypatch):
+    opened = []
+    states = [{"right": False}, {"right": True}, {"right": False}]
+    monkeypatch.setattr(PollingInputListener, "_open_reader",
+                        staticmethod(lambda: FakePointerReader(states, opened)))
+    notified = threading.Event()
+    listener = PollingInputListener(interval=0.001, on_event=lambda: notified.set())
+    assert opened[0].closed  # 생성 시에는 지원 여부만 확인
+    assert poll_threads() == []
+
+    listener.start()
+    assert notified.wait(2)
+    listener.stop()
+    assert poll_threads() == []
+    assert opened[1].closed
+    assert len(opened) == 2
+
+    listener.start()
+    listener.close()
+    assert poll_threads() == []
+    assert all(reader.closed for reader in opened)
@@ -0,0 +1,101 @@
+"""입력 주입 백엔드: 이벤트 순서, 간격/누름 시간, 전송 스레드 (기록 백엔드)"""
+
+import threading
+
+import pytest
+
+from input_sink import (InputSink, RecordingInputSink, XTestInputSink, chord_events, click_events,
+                        create_input_sink, measure_input_sink)
+
+
+def events(sink):
+    return [event for _, event in sink.recorded]
+
+
+def test_click_chord_and_call_send_expected_events(sink):
+    sink.click(10, 20, button="right", clicks=2)
+    sink.chord("ctrl", "shift", "t")
+    sink(3, 4)  # 엔진 click 콜백
+    assert events(sink) == [
+        ("move", 10, 20), ("down", "right"), ("up", "right"), ("down", "right"), ("up", "right"),
+        ("key_down", "ctrl"), ("key_down", "shift"), ("key_down", "t"),
+        ("key_up", "t"), ("key_up", "shift"), ("key_up", "ctrl"),
+        ("move", 3, 4), ("down", "left"), ("up", "left"),
+    ]
+    stats = sink.stats()
+    assert (stats["backend"], stats["batches"], stats["events"]) == ("record", 3, 14)
+    assert stats["max_ms"] >= stats["mean_ms"] >= 0
+
+
+def test_click_hold_interval_and_pause_are_applied_between_events():
+    sink = create_input_sink("record", interval=0.02, click_hold=0.05)
+    sink.send(click_events(1, 2) + [("pause", 0.03)] + chord_events("a"))
+    times = [recorded_at for recorded_at, _ in sink.recorded]
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    # move →(interval) down →(click_hold) up →(interval + pause) key_down →(interval) key_up
+    assert gaps[0] >= 0.02
+    assert gaps[1] >= 0.05
+    assert gaps[2] >= 0.05
+    assert gaps[3] >= 0.02
+    assert len(sink.recorded) == 5  # pause는 전송하지 않음
+
+
+def test_submitted_batches_are_sent_in_order_on_worker_thread():
+    threads = []
+
+    class ThreadRecordingSink(RecordingInputSink):
+        def _send_event(self, event):
+            threads.append(threading.current_thread().name)
+            super()._send_event(event)
+
+    sink = ThreadRecordingSink()
+    for index in range(20):
+        sink.submit(click_events(index, index))
+    sink.wait()
+    assert [event[1] for event in events(sink) if event[0] == "move"] == list(range(20))
+    assert set(threads) == {"input-record"}
+
+    worker = sink._worker
+    sink.close()
+    assert not worker.is_alive()
+    sink.click(1, 1)  # 닫은 뒤에도 직접 전송은 가능
+    assert events(sink)[-1] == ("up", "left")
+
+
+def test_worker_survives_failing_batch(capsys):
+    class FlakySink(RecordingInputSink):
+        def _send_event(self, event):
+            if event == ("move", 0, 0):
+                raise ValueError("전송 실패")
+            super()._send_event(event)
+
+    with FlakySink() as sink:
+        sink.submit(click_events(0, 0))
+        sink.submit(click_events(5, 5))
+        sink.wait()
+        assert events(sink) == click_events(5, 5)
+    assert "전송 실패" in capsys.readouterr().out
+
+
+def test_recording_is_bounded_and_measurable():
+    sink = RecordingInputSink(max_events=6)
+    report = measure_input_sink(sink, clicks=10, position=(7, 8))
+    assert report["backend"] == "record"
+    assert report["clicks"] == 10
+    assert report["p50_ms"] <= report["p95_ms"] <= report["max_ms"]
+    assert len(sink.recorded) == 6
+    sink.clear()
+    assert not sink.recorded
+
+
+def test_base_sink_requires_backend():
+    with pytest.raises(NotImplementedError):
+        InputSink().click(1, 1)
+
+
+@pytest.mark.skipif(not XTestInputSink.available(), reason="XTest에는 X 디스플레이가 필요합니다")
+def test_xtest_sink_moves_pointer():
+    with XTestInputSink(sync=True) as sink:
+        sink.move(5, 5)
+        sink.chord("shift")
+        assert sink.stats()["events"] == 3
@@ -0,0 +1,160 @@
+"""매칭 모드 결과를 cv2.matchTemplate(TM_CCOEFF_NORMED)과 비교"""
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import TARGETS, crop
+from matching import BatchMatcher, TemplateMatcher, convert_layout
+
+
+def reference(screen, template):
+    result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_loc, max_val
+
+
+@pytest.mark.parametrize("layout", ["BGR", "RGB", "BGRA"])
+@pytest.mark.parametrize("name", list(TARGETS))
+def test_exact_matches_default_location(screen, name, layout):
+    template = crop(screen, name)
+    frame = convert_layout(screen, "BGR", layout)
+    matcher = TemplateMatcher()
+
+    result = matcher.match(frame, template, "exact", layout)
+    assert result.mode == "exact"
+    assert result.score == 1.0
+    assert result.location == TARGETS[name][0]
+    assert result.location == reference(frame, convert_layout(template, "BGR", layout))[0]
+
+    # 두 번째부터는 지난 위치만 확인
+    again = matcher.match(frame, template, "exact", layout)
+    assert again.location == result.location
+    assert list(again.timings) == ["exact"]
+
+
+def test_exact_falls_back_to_default_when_pixels_differ(screen):
+    template = crop(screen, "Action_1").astype(np.int16)
+    template[::3, ::3] += 7  # 대부분 같지만 완전히 같지는 않음
+    template = np.clip(template, 0, 255).astype(np.uint8)
+
+    result = TemplateMatcher().match(screen, template, "exact")
+    location, score = reference(screen, template)
+    assert result.mode == "default"
+    assert result.location == location
+    assert result.score == pytest.approx(score)
+    assert set(result.timings) == {"exact", "full"}
+    assert result.found
+
+
+def test_exact_skips_comparison_for_too_many_candidates():
+    screen = np.full((60, 80, 3), 200, np.uint8)
+    screen[20:30, 30:45] = (10, 20, 30)
+    template = np.full((5, 5, 3), 200, np.uint8)  # 단색: 후보가 너무 많음
+
+    result = TemplateMatcher(max_exact_candidates=16).match(screen, template, "exact")
+    assert result.mode == "default"
+    assert "exact" in result.timings
+
+
+@pytest.mark.parametrize("layout", ["BGR", "RGB", "BGRA"])
+def test_batch_matches_per_template_match_template(screen, layout):
+    rng = np.random.default_rng(2)
+    templates = [crop(screen, name) for name in TARGETS]
+    templates.append(rng.integers(0, 256, (20, 36, 3), dtype=np.uint8))  # 화면에 없는 템플릿
+    templates.append(np.full((16, 16, 3), 90, np.uint8))  # 평탄한 템플릿
+    frame = convert_layout(screen, "BGR", layout)
+    matcher = BatchMatcher()
+
+    for _ in range(2):  # 두 번째는 캐시한 템플릿 스펙트럼 사용
+        results = matcher.match_many(frame, templates, layout)
+        assert len(results) == len(templates)
+        for template, result in zip(templates, results):
+            location, score = reference(frame[..., :3] if layout == "BGRA" else frame,
+                                        convert_layout(template, "BGR", layout)[..., :3])
+            assert result.score == pytest.approx(score, abs=1e-3)
+            if score > 0.5:
+                assert result.location == location
+    assert [result.location for result in results[:2]] == [target[0] for target in TARGETS.values()]
+    assert all(result.found for result in results[:2])
+    assert not results[2].found
+
+
+def test_batch_handles_templates_larger_than_frame(screen):
+    frame = screen[:20, :30]
+    results = BatchMatcher().match_many(frame, [crop(screen, "Action_1"), screen[:10, :10].copy()])
+    assert results[0].location is None
+    assert results[0].score == -1.0
+    assert results[1].location == (0, 0)
+    assert results[1].found
+
+
+@pytest.mark.parametrize("layout", ["BGR", "RGB", "BGRA"])
+@pytest.mark.parametrize("name", list(TARGETS))
+def test_pyramid_matches_default_location(screen, name, layout):
+    template = crop(screen, name)
+    frame = convert_layout(screen, "BGR", layout)
+    matcher = TemplateMatcher()
+
+    result = matcher.match(frame, template, "pyramid", layout)
+    default = matcher.match(frame, template, "default", layout)
+    assert result.mode == "pyramid"
+    assert result.location == default.location == TARGETS[name][0]
+    assert result.score == pytest.approx(default.score, abs=1e-5)
+    assert result.found
+    assert {"downsample", "level_0"} <= set(result.timings)
+
+
+def test_pyramid_does_not_find_absent_template(screen):
+    other = np.random.default_rng(1).integers(0, 256, (24, 32, 3), dtype=np.uint8)
+    result = TemplateMatcher().match(screen, other, "pyramid")
+    assert not result.found
+
+
+def test_pyramid_uses_precompiled_artifact_levels(screen):
+    from template_artifacts import compile_artifact
+
+    template = crop(screen, "Action_2")
+    artifact = compile_artifact(template)
+    matcher = TemplateMatcher()
+    matcher.warm(template, "pyramid", artifact=artifact)
+    prepared = matcher.prepare(template)
+    assert prepared.gray_pyramid(matcher.pyramid_levels)[1] is artifact.pyramid[1]
+    assert matcher.match(screen, template, "pyramid").location == TARGETS["Action_2"][0]
+
+
+@pytest.mark.parametrize("name", list(TARGETS))
+def test_multiscale_matches_default_location_at_native_scale(screen, name):
+    template = crop(screen, name)
+    matcher = TemplateMatcher()
+    result = matcher.match(screen, template, "multiscale")
+    default = matcher.match(screen, template, "default")
+    assert result.location == default.location == TARGETS[name][0]
+    assert result.score == pytest.approx(default.score, abs=1e-5)
+    assert result.scale == 1.0
+    assert list(result.timings) == ["scale_1"]  # 1배에서 찾으면 다른 배율은 시도하지 않음
+
+
+@pytest.mark.parametrize("scale", [1.25, 0.8])
+def test_multiscale_finds_resized_target_and_tries_that_scale_first(scale):
+    rng = np.random.default_rng(3)
+    template = rng.integers(0, 256, (40, 50, 3), dtype=np.uint8)
+    screen = rng.integers(0, 256, (200, 260, 3), dtype=np.uint8)
+    matcher = TemplateMatcher()
+    resized = matcher.prepare(template).scaled(scale)
+    h, w = resized.shape[:2]
+    screen[70:70 + h, 90:90 + w] = resized
+
+    result = matcher.match(screen, template, "multiscale", display="monitor")
+    assert result.found
+    assert result.location == (90, 70)
+    assert result.scale == scale
+    assert matcher.last_scale == {"monitor": scale}
+    assert len(result.timings) > 1
+
+    again = matcher.match(screen, template, "multiscale", display="monitor")
+    assert again.location == (90, 70)
+    assert list(again.timings) == [f"scale_{scale:g}"]
+    # 다른 디스플레이는 기억한 배율과 무관하게 기본 순서로 시도
+    other = matcher.match(screen, template, "multiscale", display="other")
+    assert list(other.timings)[0] == "scale_1"
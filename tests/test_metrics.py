@@ -0,0 +1,102 @@
+"""계측 내보내기: Prometheus 텍스트, JSONL 이벤트, Chrome trace (재생 캡처 + 기록 입력)"""
+
+import json
+import re
+
+import pytest
+
+from capture import ReplayCaptureSource
+from engine import ScenarioEngine
+from metrics import Instrumentation
+
+# 이름{라벨="값",...} 값  (라벨 값 안의 \\, \", \n 이스케이프 허용)
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{((?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_prometheus(text):
+    """{(이름, ((라벨, 값), ...)): 값}과 TYPE 선언. 형식이 맞지 않는 줄이 있으면 실패"""
+    samples, types = {}, {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name not in types, f"TYPE 중복 선언: {name}"
+            types[name] = kind
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"Prometheus 형식이 아닌 줄: {line!r}"
+        name, labels, value = match.groups()
+        key = (name, tuple(LABEL.findall(labels or "")))
+        assert key not in samples, f"중복 샘플: {line!r}"
+        samples[key] = float(value)
+    return samples, types
+
+
+@pytest.fixture
+def metrics(scenarios, screen, sink):
+    """"Visible" 시나리오를 한 번 실행한 계측 기록"""
+    metrics = Instrumentation(trace=True)
+    capture_source = ReplayCaptureSource([screen])
+    engine = ScenarioEngine(capture_source, click=sink, tick_interval=0.01, verbose=False, metrics=metrics)
+    engine.flight_dir = None
+    engine.start_scenario(scenarios.load_scenario("Visible"))
+    engine.join(timeout=10)
+    capture_source.close()
+    return metrics
+
+
+def test_prometheus_text_parses_with_cumulative_buckets(metrics):
+    metrics.increment("odd_total", label='a "quoted"\\path\nline')
+    samples, types = parse_prometheus(metrics.prometheus_text())
+
+    assert types["autoclicker_match_seconds"] == "histogram"
+    assert types["autoclicker_match_path_total"] == "counter"
+    assert samples[("autoclicker_odd_total", (("label", 'a \\"quoted\\"\\\\path\\nline'),))] == 1.0
+
+    histograms = {name[:-len("_count")] for name, _ in samples if name.endswith("_count")}
+    assert {"autoclicker_capture_seconds", "autoclicker_click_seconds",
+            "autoclicker_time_to_find_seconds"} <= histograms
+    # 계열(이름, le를 뺀 라벨)별 버킷은 누적값이고 +Inf 버킷은 _count와 같아야 함
+    series = {}
+    for (name, labels), value in samples.items():
+        if name.endswith("_bucket"):
+            rest = tuple(label for label in labels if label[0] != "le")
+            bound = float(dict(labels)["le"])
+            series.setdefault((name[:-len("_bucket")], rest), []).append((bound, value))
+    assert series
+    for (base, labels), buckets in series.items():
+        buckets.sort()
+        counts = [count for _, count in buckets]
+        assert counts == sorted(counts), f"누적되지 않은 버킷: {base}{labels}"
+        assert buckets[-1] == (float("inf"), samples[(base + "_count", labels)])
+
+def test_jsonl_and_chrome_trace_exports_parse(metrics, tmp_path):
+    metrics.export(str(tmp_path))
+
+    records = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text(encoding="utf-8").splitlines()]
+    kinds = [record["event"] for record in records]
+    assert kinds.count("action_found") == 2
+    assert kinds.count("action_clicked") == 2
+    assert kinds[-1] == "scenario_finished"
+    assert all(isinstance(record["ts"], float) for record in records)
+    assert [record["ts"] for record in records] == sorted(record["ts"] for record in records)
+
+    trace = json.loads((tmp_path / "trace.json").read_text(encoding="utf-8"))
+    events = trace["traceEvents"]
+    assert {"capture", "match", "click", "wait"} <= {event["name"] for event in events}
+    for event in events:
+        assert event["ph"] == "X"
+        assert event["dur"] >= 0
+        assert isinstance(event["tid"], int)
+    assert parse_prometheus((tmp_path / "metrics.prom").read_text(encoding="utf-8"))[0]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_disabled_instrumentation_records_nothing():
+    metrics = Instrumentation(enabled=False)
+    with metrics.span("capture"):
+        pass
+    metrics.increment("retries_total")
+    metrics.event("action_found")
+    assert metrics.prometheus_text() == "\n"
+    assert metrics.summary() == {"histograms": {}, "counters": {}}
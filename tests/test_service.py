@@ -0,0 +1,156 @@
+"""실행 서비스: 제출, 우선순위, 취소, 시간 초과, HTTP 인증 (재생 캡처 + 기록 입력)"""
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from capture import ReplayCaptureSource
+from conftest import TARGETS, clicked_positions
+from engine import ScenarioEngine
+from service import ScenarioService, ServiceClient, create_server
+
+
+@pytest.fixture
+def service(scenarios, screen, sink):
+    capture_source = ReplayCaptureSource([screen])
+    engine = ScenarioEngine(capture_source, click=sink, tick_interval=0.02, verbose=False)
+    engine.flight_dir = None
+    service = ScenarioService(engine, scenarios)
+    yield service
+    service.close()
+    engine.join(timeout=5)
+    capture_source.close()
+
+
+def wait(service, job, timeout=10.0):
+    for _ in service.stream_events(job, timeout=timeout):
+        pass
+    assert job.done, job.state
+    return job
+
+
+def test_submit_runs_scenario_and_clicks_targets(service, sink):
+    service.start()
+    job = wait(service, service.submit("Visible"))
+    assert job.state == "finished"
+    assert job.error is None
+    assert clicked_positions(sink) == [click for _, _, click in TARGETS.values()]
+    assert [event["kind"] for event in job.events][-1] == "finished"
+    assert service.manager.catalog.get("Visible").last_result == "finished"
+
+
+def test_unknown_scenario_is_rejected(service):
+    with pytest.raises(KeyError):
+        service.submit("NoSuchScenario")
+
+
+def test_scenario_name_outside_directory_is_rejected(service, tmp_path):
+    # 시나리오 디렉토리 밖의 JSON 파일
+    (tmp_path / "outside.json").write_text(json.dumps({"name": "outside", "actions": []}))
+    for name in ("../outside", "..", "sub/Visible", "C:\\outside"):
+        with pytest.raises(ValueError):
+            service.submit(name)
+    with pytest.raises(ValueError):
+        service.manager.location_memory("../outside")
+    assert service.manager.load_scenario("../outside") is None
+    assert not service.manager.delete_scenario("../outside")
+    assert (tmp_path / "outside.json").exists()
+
+
+def test_queued_jobs_run_by_priority_then_submission_order(service):
+    low = service.submit("Visible", priority=0)
+    high = service.submit("Visible", priority=10)
+    also_high = service.submit("Visible", priority=10)
+    assert [service.describe(job)["position"] for job in (high, also_high, low)] == [0, 1, 2]
+
+    service.start()
+    for job in (low, high, also_high):
+        wait(service, job)
+    assert high.started < also_high.started < low.started
+
+
+def test_cancel_queued_and_running_jobs(service):
+    running = service.submit("Missing")
+    queued = service.submit("Visible")
+    service.start()
+    with service._changed:
+        service._changed.wait_for(lambda: running.state == "running", timeout=5)
+
+    assert service.cancel(queued.job_id).state == "cancelled"
+    service.cancel(running.job_id)
+    assert wait(service, running).state == "stopped"
+    assert queued.started is None
+    assert service.cancel(12345) is None
+
+
+def test_timeout_stops_job(service):
+    service.start()
+    job = wait(service, service.submit("Missing", timeout=0.2))
+    assert job.state == "stopped"
+    assert job.error == "시간 초과"
+
+
+@pytest.fixture
+def server(service):
+    service.start()
+    server = create_server(service, "127.0.0.1", 0, token="secret")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def raw_request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        connection.request(method, path, body, headers or {})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_http_submit_and_stream_events(server):
+    client = ServiceClient(port=server.server_address[1], token="secret")
+    job = client.submit("Visible", priority=3)
+    events = list(client.events(job["id"]))
+    assert events[-1]["kind"] == "job"
+    assert events[-1]["state"] == "finished"
+    assert client.status(job["id"])["priority"] == 3
+    assert client.health()["status"] == "ok"
+
+
+def test_http_rejects_bad_token_host_and_content_type(server):
+    with pytest.raises(RuntimeError, match="401"):
+        ServiceClient(port=server.server_address[1], token="wrong").jobs()
+
+    auth = {"Authorization": "Bearer secret"}
+    assert raw_request(server, "GET", "/jobs", headers={**auth, "Host": "evil.example"})[0] == 403
+    assert raw_request(server, "GET", "/jobs", headers={**auth, "Host": "localhost:8765"})[0] == 200
+    body = json.dumps({"scenario": "Visible"})
+    assert raw_request(server, "POST", "/jobs", body, {**auth, "Content-Type": "text/plain"})[0] == 415
+    status, data = raw_request(server, "POST", "/jobs", body, {**auth, "Content-Type": "application/json"})
+    assert status == 202
+    assert data["job"]["scenario"] == "Visible"
+
+
+def test_http_rejects_scenario_path_traversal(server):
+    headers = {"Authorization": "Bearer secret", "Content-Type": "application/json"}
+    status, data = raw_request(server, "POST", "/jobs", json.dumps({"scenario": "../../x"}), headers)
+    assert status == 400
+    assert "사용할 수 없는 이름" in data["error"]
+    assert raw_request(server, "POST", "/jobs", json.dumps({"scenario": "Nope"}), headers)[0] == 404
+
+
+def test_http_rejects_oversized_and_malformed_bodies(server):
+    headers = {"Authorization": "Bearer secret", "Content-Type": "application/json"}
+    big = json.dumps({"scenario": "Visible", "padding": "x" * 8192})
+    assert raw_request(server, "POST", "/jobs", big, headers)[0] == 413
+    for length in ("-1", "abc"):
+        status, data = raw_request(server, "POST", "/jobs", "", {**headers, "Content-Length": length})
+        assert status == 400, length
+        assert "Content-Length" in data["error"]
+    assert raw_request(server, "POST", "/jobs", "{not json", headers)[0] == 400
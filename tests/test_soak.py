@@ -0,0 +1,102 @@
+"""반복 실행: 메모리 증가 추세 판정과 회차별 기록 (재생 캡처 + 기록 입력)"""
+
+import itertools
+import json
+
+import pytest
+
+import soak
+from conftest import clicked_positions
+from soak import MemoryMonitor, SoakRunner
+
+
+def sample_all(monitor, iterations):
+    for iteration in range(iterations + 1):
+        monitor.sample(iteration)
+
+
+def test_growing_probe_is_flagged_and_flat_or_noisy_ones_are_not():
+    growing = itertools.count()
+    noisy = itertools.cycle([5, 9, 4, 8, 6])
+    monitor = MemoryMonitor(warmup=3, probes={
+        "growing": lambda: next(growing),
+        "flat": lambda: 7,
+        "noisy": lambda: next(noisy),
+    })
+    sample_all(monitor, 20)
+
+    growth = monitor.growth()
+    assert growth["growing"]["growing"] is True
+    assert growth["growing"]["per_iteration"] == pytest.approx(1.0)
+    assert growth["flat"]["growing"] is False
+    assert growth["flat"]["change"] == 0
+    assert growth["noisy"]["growing"] is False
+    assert monitor.leaks() == ["growing"]
+
+
+def test_warmup_growth_and_short_runs_are_not_judged():
+    values = iter([0, 100, 200, 300] + [300] * 20)
+    monitor = MemoryMonitor(warmup=3, probes={"cache": lambda: next(values)})
+    sample_all(monitor, 20)
+    assert monitor.growth()["cache"]["first"] == 300  # 준비 회차(0~3)의 증가는 제외
+    assert monitor.leaks() == []
+
+    short = MemoryMonitor(warmup=0, probes={"growing": itertools.count().__next__})
+    sample_all(short, 5)
+    assert short.growth()["growing"]["growing"] is None
+
+
+@pytest.mark.parametrize("step, flagged", [(100, False), (512 * 1024, True)])
+def test_rss_growth_must_exceed_min_growth(monkeypatch, step, flagged):
+    rss = itertools.count(100 * 1024 * 1024, step)
+    monkeypatch.setattr(soak, "current_rss", lambda: next(rss))
+    monitor = MemoryMonitor(warmup=0, min_growth=1024 * 1024)
+    sample_all(monitor, 16)
+    assert ("rss" in monitor.leaks()) == flagged
+
+
+def test_samples_are_thinned_keeping_first():
+    monitor = MemoryMonitor(max_samples=8)
+    sample_all(monitor, 20)
+    iterations = [sample.iteration for sample in monitor.samples]
+    assert len(iterations) <= 8
+    assert iterations[0] == 0
+    assert iterations == sorted(iterations)
+    assert iterations[-1] >= 17
+
+
+def test_soak_runner_repeats_scenario_and_writes_report(engine, scenarios, tmp_path):
+    runner = SoakRunner(iterations=3, monitor=MemoryMonitor(probes={"constant": lambda: 1}))
+    engine.start_soak(scenarios.load_scenario("Visible"), None, runner)
+    engine.join(timeout=10)
+
+    events = []
+    while not engine.events.empty():
+        events.append(engine.events.get_nowait())
+    assert [event.kind for event in events if event.kind in ("iteration", "finished")] == \
+        ["iteration"] * 3 + ["finished"]
+    summary = events[-1].data
+    assert (summary["iterations"], summary["finished"], summary["errors"]) == (3, 3, 0)
+    assert summary["matches"] == 6
+    assert summary["suspected_leaks"] == []
+    assert len(clicked_positions(engine.click)) == 6
+
+    path = tmp_path / "reports" / "soak.json"
+    runner.write_report(str(path))
+    report = json.loads(path.read_text(encoding="utf-8"))
+    assert [result["index"] for result in report["results"]] == [1, 2, 3]
+    assert [sample["iteration"] for sample in report["samples"]] == [0, 1, 2, 3]
+    assert {"constant", "template_cache", "event_queue"} <= set(report["samples"][-1]["probes"])
+
+
+def test_soak_runner_stops_on_cancel(engine, scenarios):
+    runner = SoakRunner(iterations=None)
+    token = engine.start_soak(scenarios.load_scenario("Missing"), None, runner)
+    token.wait(0.1)
+    token.cancel()
+    engine.join(timeout=5)
+    kinds = []
+    while not engine.events.empty():
+        kinds.append(engine.events.get_nowait().kind)
+    assert kinds[-1] == "stopped"
+    assert runner.completed == 0
@@ -0,0 +1,82 @@
+"""템플릿 캐시: 파일 변경 감지(수정 시각/크기), LRU 제거, 번들 등록 항목"""
+
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from template_cache import TemplateCache
+
+
+def write_image(path, value, size=(8, 8)):
+    cv2.imwrite(str(path), np.full((*size, 3), value, np.uint8))
+    return str(path)
+
+
+def test_changed_file_is_decoded_again(tmp_path):
+    cache = TemplateCache()
+    path = write_image(tmp_path / "a.png", 10)
+    first = cache.get(path)
+    assert cache.get(path) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not first.flags.writeable
+
+    # 크기가 같은 내용으로 다시 써도 수정 시각이 다르면 다시 읽음
+    write_image(tmp_path / "a.png", 200)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = cache.get(path)
+    assert second is not first
+    assert second[0, 0, 0] == 200
+
+    # 수정 시각이 같아도 크기가 다르면 다시 읽음
+    mtime = os.stat(path).st_mtime_ns
+    write_image(tmp_path / "a.png", 200, size=(16, 8))
+    os.utime(path, ns=(mtime, mtime))
+    assert cache.get(path).shape == (16, 8, 3)
+    assert cache.misses == 3
+
+    os.remove(path)
+    assert cache.get(path) is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    paths = [write_image(tmp_path / f"{index}.png", index) for index in range(3)]
+    image_bytes = 8 * 8 * 3
+    cache = TemplateCache(budget_bytes=2 * image_bytes)
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])  # 0을 최근 사용으로 갱신 → 1이 가장 오래됨
+    cache.get(paths[2])
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 2 * image_bytes, 1)
+    misses = cache.misses
+    cache.get(paths[0])
+    cache.get(paths[2])
+    assert cache.misses == misses
+    cache.get(paths[1])
+    assert cache.misses == misses + 1
+
+    cache.set_budget(image_bytes)
+    assert cache.stats()["entries"] == 1
+
+
+def test_pinned_templates_are_counted_as_hits_from_threads():
+    cache = TemplateCache(budget_bytes=0)
+    image = np.zeros((4, 4, 3), np.uint8)
+    cache.register("bundle.acb#0", image)
+
+    def worker():
+        for _ in range(1000):
+            assert cache.get("bundle.acb#0") is image
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["hits"] == 4000
+    assert cache.unregister("bundle.acb") == 1
+    assert cache.get("bundle.acb#0") is None
@@ -0,0 +1,101 @@
+"""여러 (템플릿, 검색 영역, 클릭/핸들러) 규칙을 한 번의 캡처로 감시하는 규칙 세트"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from template_cache import template_cache
+
+BBox = Tuple[int, int, int, int]
+
+
+@dataclass
+class WatchRule:
+    name: str
+    template: np.ndarray  # BGR 템플릿
+    search_area: BBox
+    click_position: Optional[Tuple[int, int]] = None
+    # 클릭 대신 호출할 핸들러: handler(rule, location)
+    handler: Optional[Callable[["WatchRule", Tuple[int, int]], None]] = None
+    match_mode: str = "default"
+    # False면 대상이 보이는 동안 화면이 그대로일 때는 다시 실행하지 않음 (화면이 바뀐 뒤 다시 보이면 실행)
+    repeat: bool = False
+
+
+def union_area(areas: List[BBox]) -> BBox:
+    """모든 영역을 포함하는 최소 영역"""
+    return (
+        min(area[0] for area in areas),
+        min(area[1] for area in areas),
+        max(area[2] for area in areas),
+        max(area[3] for area in areas),
+    )
+
+
+def area_view(frame: np.ndarray, frame_area: BBox, area: BBox) -> Optional[np.ndarray]:
+    """`frame_area`를 캡처한 프레임에서 `area` 부분의 뷰 (복사 없음)"""
+    x1, y1 = area[0] - frame_area[0], area[1] - frame_area[1]
+    x2, y2 = area[2] - frame_area[0], area[3] - frame_area[1]
+    view = frame[max(0, y1):max(0, y2), max(0, x1):max(0, x2)]
+    if view.size == 0:
+        return None
+    return view
+
+
+def group_rules(rules: List[WatchRule]) -> List[List[WatchRule]]:
+    """같은 영역을 default 방식으로 검색하는 규칙끼리 묶음 (묶음은 일괄 매칭 대상)"""
+    grouped: Dict[tuple, List[WatchRule]] = {}
+    for rule in rules:
+        key = (tuple(rule.search_area),) if rule.match_mode == "default" else (id(rule),)
+        grouped.setdefault(key, []).append(rule)
+    return list(grouped.values())
+
+
+def rules_from_actions(actions) -> List[WatchRule]:
+    """시나리오 액션들을 감시 규칙으로 변환 (순서와 무관하게 동시에 감시)"""
+    rules = []
+    for action in actions:
+        template = template_cache.get(action.target_image_path)
+        if template is None:
+            raise Exception(f"이미지를 불러올 수 없습니다: {action.target_image_path}")
+        rules.append(WatchRule(
+            name=action.name,
+            template=template,
+            search_area=action.search_area,
+            click_position=action.click_position,
+            match_mode=action.match_mode,
+        ))
+    return rules
+
+
+@dataclass
+class WatchStats:
+    """감시 모드 통계 (규칙별 적중 수, 틱당 비용)"""
+
+    ticks: int = 0
+    capture_seconds: float = 0.0
+    match_seconds: float = 0.0
+    rule_hits: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_tick(self, capture_seconds: float, match_seconds: float):
+        with self._lock:
+            self.ticks += 1
+            self.capture_seconds += capture_seconds
+            self.match_seconds += match_seconds
+
+    def record_hit(self, rule_name: str):
+        with self._lock:
+            self.rule_hits[rule_name] = self.rule_hits.get(rule_name, 0) + 1
+
+    def report(self) -> dict:
+        with self._lock:
+            ticks = max(1, self.ticks)
+            return {
+                "ticks": self.ticks,
+                "capture_ms_per_tick": self.capture_seconds / ticks * 1000,
+                "match_ms_per_tick": self.match_seconds / ticks * 1000,
+                "rule_hits": dict(self.rule_hits),
+            }
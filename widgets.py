@@ -0,0 +1,93 @@
+"""GUI 보조 위젯"""
+
+import tkinter as tk
+from typing import Callable, List, Optional, Sequence
+
+
+class VirtualListbox(tk.Frame):
+    """보이는 줄만 Listbox에 그리는 목록
+
+    항목이 수천 개여도 Listbox에는 `height`줄만 들어가고, 스크롤할 때
+    보이는 범위만 다시 채운다. 선택은 인덱스가 아니라 항목 값으로 유지한다.
+    """
+
+    def __init__(self, master, height: int = 8, on_select: Optional[Callable[[str], None]] = None):
+        super().__init__(master)
+        self.height = height
+        self.on_select = on_select
+        self.items: List[str] = []
+        self.offset = 0
+        self.selected: Optional[str] = None
+
+        self.listbox = tk.Listbox(self, height=height, exportselection=False)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self._on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.pack(side="left", fill="both", expand=True)
+
+        self.listbox.bind('<<ListboxSelect>>', self._on_listbox_select)
+        self.listbox.bind('<MouseWheel>', lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.listbox.bind('<Button-4>', lambda e: self.scroll(-1))  # Linux 휠
+        self.listbox.bind('<Button-5>', lambda e: self.scroll(1))
+        self.listbox.bind('<Up>', lambda e: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda e: self._move_selection(1))
+
+    def set_items(self, items: Sequence[str]):
+        self.items = list(items)
+        if self.selected not in self.items:
+            self.selected = None
+        self.offset = max(0, min(self.offset, len(self.items) - self.height))
+        self._render()
+
+    def scroll(self, rows: int):
+        self.offset = max(0, min(self.offset + rows, len(self.items) - self.height))
+        self._render()
+        return "break"
+
+    def see(self, item: str):
+        index = self.items.index(item)
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.height:
+            self.offset = index - self.height + 1
+        self._render()
+
+    def _render(self):
+        self.listbox.delete(0, tk.END)
+        visible = self.items[self.offset:self.offset + self.height]
+        for item in visible:
+            self.listbox.insert(tk.END, item)
+        if self.selected in visible:
+            self.listbox.selection_set(visible.index(self.selected))
+
+        if self.items:
+            first = self.offset / len(self.items)
+            last = min(1.0, (self.offset + self.height) / len(self.items))
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+
+    def _on_scroll(self, *args):
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.items))
+            self.scroll(0)
+        elif args[0] == "scroll":
+            amount = int(args[1]) * (self.height if args[2] == "pages" else 1)
+            self.scroll(amount)
+
+    def _on_listbox_select(self, event):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        self.selected = self.items[self.offset + selection[0]]
+        if self.on_select:
+            self.on_select(self.selected)
+
+    def _move_selection(self, step: int):
+        if not self.items:
+            return "break"
+        index = self.items.index(self.selected) + step if self.selected in self.items else 0
+        self.selected = self.items[max(0, min(index, len(self.items) - 1))]
+        self.see(self.selected)
+        if self.on_select:
+            self.on_select(self.selected)
+        return "break"